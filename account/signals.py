@@ -1,5 +1,5 @@
 from django.conf import settings
-from django.db.models.signals import post_save
+from django.db.models.signals import post_save, post_delete, m2m_changed
 from django.dispatch import receiver
 from django.contrib.auth.models import Group
 from django.contrib.auth import get_user_model
@@ -13,4 +13,28 @@ def assign_group_on_signup(sender, instance, created, **kwargs):
             group = Group.objects.get(name='user')
             instance.groups.add(group)
         except Group.DoesNotExist:
-            pass
\ No newline at end of file
+            pass
+
+
+@receiver(m2m_changed, sender=User.groups.through)
+def forget_roles_on_group_change(sender, instance, action, reverse, pk_set, **kwargs):
+    from controller.logic.common_data_access_operations import forget_roles
+    if action not in ('post_add', 'post_remove', 'post_clear'):
+        return
+    if not reverse:
+        # user.groups changed
+        forget_roles([instance.pk])
+    elif pk_set:
+        # group.user_set changed
+        forget_roles(pk_set)
+    else:
+        # group.user_set cleared, the users are not known anymore
+        forget_roles()
+
+
+@receiver(post_save, sender=Group)
+@receiver(post_delete, sender=Group)
+def forget_roles_on_group_save_or_delete(sender, instance, **kwargs):
+    from controller.logic.common_data_access_operations import forget_roles
+    # a renamed or deleted group changes the role of all its members
+    forget_roles()
@@ -1,12 +1,55 @@
 from django.contrib.auth import get_user_model
+from django.db import connection
+from django.conf import settings
+
+import threading, time, io, gzip, contextlib, csv, locale
+from pathlib import Path
 
 User = get_user_model()
 
+# Process wide cache of user id -> (is steward, time of lookup).
+# Entries are dropped by the group change hooks in account.signals, and expire after ROLE_CACHE_TTL seconds
+# so that group changes made in other processes are picked up as well.
+steward_flags = {}
+steward_flags_lock = threading.Lock()
+
+
 def is_steward(user_id: int):
     """Check if the user is a steward"""
-    user = User.objects.get(id=user_id)
-    print(f"User id {user_id} got mapped to user {user} with groups {user.groups.all()}")
-    return user.groups.filter(name='steward').exists()
+    with steward_flags_lock:
+        cached = steward_flags.get(user_id)
+    if cached is not None and time.monotonic() - cached[1] < settings.ROLE_CACHE_TTL:
+        return cached[0]
+    cursor = connection.cursor()
+    try:
+        cursor.execute(
+            """
+            SELECT EXISTS (
+                SELECT 1 
+                FROM auth_user_groups 
+                INNER JOIN auth_group ON auth_user_groups.group_id = auth_group.id 
+                WHERE auth_user_groups.user_id = %s 
+                AND auth_group.name = 'steward'
+            )
+            """,
+            [user_id]
+        )
+        user_is_steward = cursor.fetchone()[0]
+    finally:
+        cursor.close()
+    with steward_flags_lock:
+        steward_flags[user_id] = (user_is_steward, time.monotonic())
+    return user_is_steward
+
+
+def forget_roles(user_ids=None):
+    """Drop the cached roles of these users, or of every user if none are given"""
+    with steward_flags_lock:
+        if user_ids is None:
+            steward_flags.clear()
+        else:
+            for user_id in user_ids:
+                steward_flags.pop(user_id, None)
 
 
 def dict_fetchall(cursor):
@@ -34,3 +77,111 @@ def dict_fetchone(cursor):
         return None
     columns = [col[0] for col in cursor.description]
     return dict(zip(columns, row))
+
+
+@contextlib.contextmanager
+def read_columnar_file(source_file_path: Path):
+    """
+    Open a parquet or arrow ipc file with pyarrow (an optional dependency, needed for these files only).
+    Yields its arrow schema, its count of rows (None if not known up front), and an iterator on its record batches,
+    which reads a parquet file row group by row group. The file (and its memory map) is closed on exit.
+    """
+    try:
+        import pyarrow
+        import pyarrow.ipc
+        import pyarrow.parquet
+    except ImportError:
+        raise ValueError("pyarrow has to be installed to read " + source_file_path.suffix + " files")
+    if source_file_path.suffix == '.parquet':
+        with source_file_path.open(mode='rb') as stored_file:
+            parquet_file = pyarrow.parquet.ParquetFile(stored_file)
+            yield parquet_file.schema_arrow, parquet_file.metadata.num_rows, \
+                parquet_file.iter_batches(batch_size=settings.INGESTION_BATCH_SIZE)
+        return
+    # arrow ipc file (feather v2), memory mapped
+    with pyarrow.memory_map(str(source_file_path)) as stored_file:
+        reader = pyarrow.ipc.open_file(stored_file)
+        yield reader.schema, None, (reader.get_batch(i) for i in range(reader.num_record_batches))
+
+
+class HashingReader(io.RawIOBase):
+    """Raw reader of a binary file, updating a hash with the bytes read through it"""
+    def __init__(self, raw, file_hash):
+        self.raw = raw
+        self.file_hash = file_hash
+
+    def readable(self):
+        return True
+
+    def readinto(self, b):
+        count_bytes = self.raw.readinto(b)
+        if count_bytes:
+            self.file_hash.update(memoryview(b)[:count_bytes])
+        return count_bytes
+
+
+@contextlib.contextmanager
+def open_data_file(source_file_path: Path, file_hash=None):
+    """
+    Open a csv data file for reading its (decompressed) bytes line by line. A gzip (.gz) or zstandard (.zst) file is
+    decompressed on the fly, zstandard with the zstandard package (an optional dependency, needed for these files only).
+    If a hash is given, it is updated with the stored (compressed) bytes of the file, all of them once the file has been
+    read without errors.
+    """
+    with contextlib.ExitStack() as stack:
+        raw = stack.enter_context(source_file_path.open(mode='rb', buffering=0))
+        if file_hash is not None:
+            raw = HashingReader(raw=raw, file_hash=file_hash)
+        stored_file = io.BufferedReader(raw, buffer_size=settings.INGESTION_READ_BYTES)
+        if source_file_path.suffix == '.gz':
+            data_file = stack.enter_context(gzip.GzipFile(fileobj=stored_file, mode='rb'))
+        elif source_file_path.suffix == '.zst':
+            try:
+                import zstandard
+            except ImportError:
+                raise ValueError("zstandard has to be installed to read .zst files")
+            data_file = io.BufferedReader(
+                stack.enter_context(
+                    zstandard.ZstdDecompressor().stream_reader(stored_file, read_across_frames=True, closefd=False)
+                ),
+                buffer_size=settings.INGESTION_READ_BYTES
+            )
+        else:
+            data_file = stored_file
+        yield data_file
+        if file_hash is not None:
+            # anything the decompressor left unread (it stops at the end of the compressed data) is hashed as well
+            while stored_file.read(settings.INGESTION_READ_BYTES):
+                pass
+
+
+def count_records_up_to(source_file_path: Path, max_records: int):
+    """
+    Count the records of a data file, but only as far as needed to tell whether there are more than max_records.
+    Counts the rows of a parquet file from its metadata, and of an arrow ipc file from the headers of its batches.
+    A csv file is first bounded cheaply by its lines, and only if they are more than max_records are its records
+    (which can span lines) counted by parsing it. Returns the count (or for a csv file within the limit, its count of
+    lines, which bounds it from above), or max_records + 1 if there are more.
+    """
+    if source_file_path.suffix in settings.COLUMNAR_FILE_EXTENSIONS:
+        with read_columnar_file(source_file_path) as (schema, num_rows, batches):
+            if num_rows is None:
+                num_rows = sum(batch.num_rows for batch in batches)
+        return min(num_rows, max_records + 1)
+    # every record but the last ends with a line break, and so does the header
+    count_lines = 0
+    with open_data_file(source_file_path) as data_file:
+        for block in iter(lambda: data_file.read(settings.INGESTION_READ_BYTES), b''):
+            count_lines = count_lines + block.count(b'\n')
+            if count_lines > max_records:
+                break
+    if count_lines <= max_records:
+        return count_lines
+    count_records = -1      # the header is not a record
+    with open_data_file(source_file_path) as data_file:
+        encoding = locale.getpreferredencoding(False)
+        for row in csv.reader(io.TextIOWrapper(data_file, encoding=encoding, newline='')):
+            count_records = count_records + 1
+            if count_records > max_records:
+                break
+    return count_records
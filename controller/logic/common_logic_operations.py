@@ -1,5 +1,6 @@
-import re
+import re, hashlib
 from pathlib import Path
+from datetime import datetime
 from django.conf import settings
 
 import controller.logic.workflow.components as workflow_components
@@ -30,6 +31,90 @@ def parse_string_to_list_of_strings(x: str):
     return list_str
 
 
+def parse_column_types(x: str):
+    """Break '["column_1:integer","column_2:text",...]' string into dict {column_1: integer, column_2: text, ... }"""
+    column_types = dict()
+    for column_type in parse_string_to_list_of_strings(x):
+        if column_type.count(':') != 1:
+            raise ValueError("Column type should be declared as column:type")
+        column, type_name = [y.strip() for y in column_type.split(':')]
+        type_name = type_name.lower()
+        if type_name not in settings.INPUT_COLUMN_TYPES:
+            raise ValueError("Column type " + type_name + " is not one of " + ", ".join(settings.INPUT_COLUMN_TYPES))
+        column_types[column] = type_name
+    return column_types
+
+
+INTEGER_REGEX = re.compile(r'\s*[+-]?\d+\s*')
+NUMERIC_REGEX = re.compile(r'\s*[+-]?(\d+\.?\d*|\.\d+)([eE][+-]?\d+)?\s*')
+BOOLEAN_VALUES = {'true', 'false', 't', 'f', 'yes', 'no', 'y', 'n'}
+
+
+def is_value_of_type(value: str, type_name: str):
+    """Check if the csv field value can be cast into the postgres type"""
+    if type_name in ['integer', 'bigint']:
+        if INTEGER_REGEX.fullmatch(value) is None:
+            return False
+        bits = 31 if type_name == 'integer' else 63
+        return -2**bits <= int(value) < 2**bits
+    elif type_name == 'numeric':
+        return NUMERIC_REGEX.fullmatch(value) is not None
+    elif type_name == 'boolean':
+        return value.strip().lower() in BOOLEAN_VALUES
+    elif type_name in ['timestamp', 'timestamptz']:
+        try:
+            timestamp = datetime.fromisoformat(value.strip())
+        except ValueError:
+            return False
+        # a timestamp with a time zone offset does not fit in a timestamp without time zone
+        return type_name == 'timestamptz' or timestamp.tzinfo is None
+    return True     # text
+
+
+def infer_column_types(headers: list, sample_rows: list):
+    """
+    Infer the type of each column from a sample of the rows of a csv file.
+    A column gets the first type of settings.INPUT_COLUMN_TYPES that all its non-empty values in the sample can be cast
+    into, and text if it has no non-empty value in the sample.
+    Returns dict {header: type}
+    """
+    column_types = dict()
+    for index, header in enumerate(headers):
+        values = [row[index] for row in sample_rows if index < len(row) and row[index] != '']
+        column_types[header] = 'text'
+        if not values:
+            continue
+        for type_name in settings.INPUT_COLUMN_TYPES:
+            if all(is_value_of_type(value, type_name) for value in values):
+                column_types[header] = type_name
+                break
+    return column_types
+
+
+def get_data_file_format(file_name: str):
+    """Extension of the format of a data file, without its compression extension ('.csv' for 'xyz.csv.gz')"""
+    file_path = Path(file_name)
+    if file_path.suffix in settings.COMPRESSED_FILE_EXTENSIONS:
+        file_path = file_path.with_suffix('')
+    return file_path.suffix
+
+
+def is_ingested_in_parallel(input_file_path: Path):
+    """Whether the input file of read_table is loaded by a pool of processes (see settings.PARALLEL_INGESTION)"""
+    # a compressed file can not be split into byte ranges, it is decompressed in one stream
+    return settings.PARALLEL_INGESTION and \
+        get_data_file_format(input_file_path.name) not in settings.COLUMNAR_FILE_EXTENSIONS and \
+        input_file_path.suffix not in settings.COMPRESSED_FILE_EXTENSIONS and \
+        input_file_path.stat().st_size >= settings.PARALLEL_INGESTION_MIN_BYTES
+
+
+def get_input_max_records(input_file_path: Path):
+    """Maximum number of records allowed in the input file of read_table"""
+    if is_ingested_in_parallel(input_file_path):
+        return settings.INPUT_N_MAX_RECORDS_PARALLEL
+    return settings.INPUT_N_MAX_RECORDS
+
+
 def get_workflow_dir_path(obj_workflow: workflow_components.Workflow):
     """Get directory path of workflow related files"""
     return Path(settings.MEDIA_ROOT).joinpath(
@@ -66,3 +151,10 @@ def get_job_prefix_table_name(obj_job: job_components.Job):
                             "r" + str(obj_job.run_id) + "_" + \
                             "j" + str(obj_job.id) + "_"
     return job_prefix_table_name
+
+
+def get_dataset_table_name(content_hash: str, infer_types: bool, column_types: dict):
+    """Get name of the read-only table ingested from a data file with these contents and column type options"""
+    load_options = content_hash + ";" + str(infer_types) + ";" + \
+                   ",".join(column + ":" + column_types[column] for column in sorted(column_types or {}))
+    return "dataset_" + hashlib.sha256(load_options.encode()).hexdigest()[:40]
@@ -12,7 +12,8 @@ import controller.logic.project.components as project_components
 import controller.logic.project.data_access_operations as project_dao
 import controller.logic.job.components as job_components
 import controller.logic.job.data_access_operations as job_dao
-from controller.logic.common_logic_operations import get_workflow_dir_path, get_run_dir_path, get_job_prefix_table_name
+from controller.logic.common_logic_operations import get_workflow_dir_path, get_run_dir_path
+from controller.logic.common_logic_operations import get_data_file_format
 
 from collections import OrderedDict
 from cryptography.fernet import Fernet
@@ -91,7 +92,7 @@ def create(request: HttpRequest):
                     file_type = settings.UPLOADED_FILE_TYPES[2]     # it is inst type
                 elif settings.DESIGN_LAYOUT_BEGIN in file_contents and settings.DESIGN_LAYOUT_END in file_contents:
                     file_type = settings.UPLOADED_FILE_TYPES[3]     # it is layout type
-            elif extension == '.csv':
+            elif get_data_file_format(file_path.name) in settings.INPUT_FILE_EXTENSIONS:
                 file_type = settings.UPLOADED_FILE_TYPES[1]
 
             if file_type == settings.UPLOADED_FILE_TYPES[1]:    # it is a data file
@@ -308,7 +309,9 @@ def status(request: HttpRequest):
     """
     Get the status of a curation run
     Inputs: Run ID (composite - user_id . project_id . workflow_id . run_id)
-    Outputs: Status of the run (COMPLETED, RUNNING, IDLE, ABORTED)
+    Outputs:
+    1. Status of the run (COMPLETED, RUNNING, IDLE, ABORTED)
+    2. Progress of its 3a_kn or 3a_knlm job (total_tasks, done_tasks, in_progress), once that job exists
     """
     try:
         # Capture the inputs
@@ -317,7 +320,15 @@ def status(request: HttpRequest):
 
         # Get the run
         obj_run: run_components.Run = run_dao.find_run(run_id=run_id, workflow_id=workflow_id, project_id=project_id, user_id=user_id)
-        return JsonResponse({'run_status': obj_run.status}, status=200)
+        context = {'run_status': obj_run.status}
+
+        # Get the progress counters of the 3a_kn or 3a_knlm job, a single row read
+        obj_job = job_dao.find_3a_kn_job(run_id=run_id, workflow_id=workflow_id, project_id=project_id, user_id=user_id)
+        if not obj_job:
+            obj_job = job_dao.find_3a_knlm_job(run_id=run_id, workflow_id=workflow_id, project_id=project_id, user_id=user_id)
+        if obj_job and obj_job.status != settings.JOB_STATUS[0]:   # 'IDLE'
+            context['progress'] = job_dao.get_progress(obj_job=obj_job)
+        return JsonResponse(context, status=200)
     except Exception as e:
         print(f"Error getting status of curation run: {e}")
         return JsonResponse({'status': 'error', 'message': f'Internal server error: {e}'}, status=500)
@@ -370,11 +381,11 @@ def download_tables(request: HttpRequest):
             # Get the tables
             for table_name in table_names:
                 if table_name == 'Assignments':
-                    export_table = get_job_prefix_table_name(obj_job=obj_job) + 'assignments'
+                    export_table = 'assignments'
                 elif table_name == 'Annotations':
-                    export_table = get_job_prefix_table_name(obj_job=obj_job) + 'outputs'
+                    export_table = 'outputs'
                 elif table_name == 'Aggregations':
-                    export_table = get_job_prefix_table_name(obj_job=obj_job) + 'final_labels'
+                    export_table = 'final_labels'
                 
                 # Export the table alongwith original id field name and tuples
                 dest_file_name = table_name + '.csv'
@@ -13,6 +13,8 @@ from controller.logic.common_logic_operations import  parse_string_to_list_of_st
 
 from controller.enums import UserType
 
+import time
+
 
 def index_3a_kn(request: HttpRequest):
     """Return the job listing and options to manipulate them"""
@@ -82,15 +84,8 @@ def work_3a_kn(request: HttpRequest):
     # 1. prepare for assign and annotate
     obj_job: job_components.Job = load_common_variables_for_assign_and_annotate(request)
 
-    # 2. assign task to worker for this 3a_kn job
-    task_id = job_helper_functions.assign_3a_kn(
-        worker_id,
-        obj_job,
-        request.session['job_k'],
-        request.session['job_n'],
-        request.session['task_annotation_time_limit'],
-        request.session['count_tasks']
-    )
+    # 2. assign task to worker for this 3a_kn job (waiting for one to become available, if asked to)
+    task_id, tuple_row = assign_for_work(request, obj_job, worker_id, UserType.REGULAR)
     request.session['assigned_task_id'] = task_id
     if task_id == 0:
         context = {
@@ -124,7 +119,8 @@ def work_3a_kn(request: HttpRequest):
         task_annotation_time_limit=request.session['task_annotation_time_limit'],
         task_short_instructions=request.session['task_short_instructions'],
         task_long_instructions=request.session['task_long_instructions'],
-        task_design_layout=request.session['task_design_layout']
+        task_design_layout=request.session['task_design_layout'],
+        tuple_row=tuple_row
     )
 
     # show on screen via the response
@@ -155,28 +151,8 @@ def work_3a_knlm(request: HttpRequest):
     worker_id = request.user.id
     obj_job: job_components.Job = load_common_variables_for_assign_and_annotate(request)
 
-    # Assign task to worker for this 3a_knlm job depending on user type coming in.
-    task_id = None
-    if user_type == UserType.REGULAR:
-        # Regular-specific logic
-        task_id = job_helper_functions.assign_3a_kn(
-            worker_id,
-            obj_job,
-            request.session['job_k'],
-            request.session['job_n'],
-            request.session['task_annotation_time_limit'],
-            request.session['count_tasks']
-        )
-    elif user_type == UserType.STEWARD:
-        # Steward-specific logic
-        task_id = job_helper_functions.assign_3a_lm(
-            worker_id,
-            obj_job,
-            request.session['job_l'],
-            request.session['job_m'],
-            request.session['task_annotation_time_limit'],
-            request.session['count_tasks']
-        )
+    # Assign task to worker for this 3a_knlm job depending on user type coming in (waiting for one to become available, if asked to).
+    task_id, tuple_row = assign_for_work(request, obj_job, worker_id, user_type)
 
     # Common completion code here.
     request.session['assigned_task_id'] = task_id
@@ -212,7 +188,8 @@ def work_3a_knlm(request: HttpRequest):
         task_annotation_time_limit=request.session['task_annotation_time_limit'],
         task_short_instructions=request.session['task_short_instructions'],
         task_long_instructions=request.session['task_long_instructions'],
-        task_design_layout=request.session['task_design_layout']
+        task_design_layout=request.session['task_design_layout'],
+        tuple_row=tuple_row
     )
     # show on screen via the response
     context = {
@@ -240,28 +217,20 @@ def process_annotation_3a_kn(request: HttpRequest):
     obj_job: job_components.Job = load_job_from_session(request)
     job_k = request.session['job_k']
     job_n = request.session['job_n']
-    count_tasks = request.session['count_tasks']
     task_annotation_time_limit = request.session['task_annotation_time_limit']
     worker_id = request.user.id
     task_id = request.session['assigned_task_id']
     selected_choice = request.POST['choice']
-    # aggregate logic
-    job_helper_functions.aggregate_3a_kn(
+    # aggregate logic, and assign task to worker for this 3a_kn job (along with its tuple), in one transaction
+    new_task_id, new_tuple_row = job_dao.submit_and_assign_3a_kn(
         obj_job=obj_job,
-        job_k=job_k,
-        job_n=job_n,
         worker_id=worker_id,
         task_id=task_id,
-        answer=selected_choice
-    )
-    # assign task to worker for this 3a_kn job
-    new_task_id = job_helper_functions.assign_3a_kn(
-        worker_id,
-        obj_job,
-        job_k,
-        job_n,
-        task_annotation_time_limit,
-        count_tasks
+        job_k=job_k,
+        job_n=job_n,
+        answer=selected_choice,
+        task_annotation_time_limit=task_annotation_time_limit,
+        assignment_priority=request.session.get('job_assignment_priority', settings.ASSIGNMENT_PRIORITIES[0])
     )
     if new_task_id > 0: # assign returned a task
         request.session['assigned_task_id'] = new_task_id
@@ -274,7 +243,8 @@ def process_annotation_3a_kn(request: HttpRequest):
             task_annotation_time_limit=request.session['task_annotation_time_limit'],
             task_short_instructions=request.session['task_short_instructions'],
             task_long_instructions=request.session['task_long_instructions'],
-            task_design_layout=request.session['task_design_layout']
+            task_design_layout=request.session['task_design_layout'],
+            tuple_row=new_tuple_row
         )
         # show on screen via the response
         context = {
@@ -359,55 +329,39 @@ def process_annotation_3a_knlm(request: HttpRequest):
     job_n = request.session['job_n']
     job_l = request.session['job_l']
     job_m = request.session['job_m']
-    count_tasks = request.session['count_tasks']
     task_annotation_time_limit = request.session['task_annotation_time_limit']
     worker_id = request.user.id
     task_id = request.session['assigned_task_id']
     selected_choice = request.POST['choice']
 
-    # Aggregate annotations of this task depending on user type that is annotating.
+    # Aggregate annotations of this task, and assign the next task to worker (along with its tuple), in one transaction,
+    # depending on user type that is annotating.
+    new_task_id = None
+    new_tuple_row = None
     if user_type == UserType.REGULAR:
         # Regular-specific logic
-        job_helper_functions.aggregate_for_regular_workers_as_part_of_knlm(
+        new_task_id, new_tuple_row = job_dao.submit_and_assign_3a_kn(
             obj_job=obj_job,
-            job_k=job_k,
-            job_n=job_n,
             worker_id=worker_id,
             task_id=task_id,
-            answer=selected_choice
+            job_k=job_k,
+            job_n=job_n,
+            answer=selected_choice,
+            task_annotation_time_limit=task_annotation_time_limit,
+            assignment_priority=request.session.get('job_assignment_priority', settings.ASSIGNMENT_PRIORITIES[0]),
+            worker_type=UserType.REGULAR
         )
     elif user_type == UserType.STEWARD:
         # Steward-specific logic
-        job_helper_functions.aggregate_for_steward_workers_as_part_of_knlm(
+        new_task_id, new_tuple_row = job_dao.submit_and_assign_3a_lm(
             obj_job=obj_job,
-            job_l=job_l,
-            job_m=job_m,
             worker_id=worker_id,
             task_id=task_id,
-            answer=selected_choice
-        )
-    
-    # Assign task to worker for this 3a_knlm job depending on user type coming in.
-    new_task_id = None
-    if user_type == UserType.REGULAR:
-        # Regular-specific logic
-        new_task_id = job_helper_functions.assign_3a_kn(
-            worker_id,
-            obj_job,
-            job_k,
-            job_n,
-            task_annotation_time_limit,
-            count_tasks
-        )
-    elif user_type == UserType.STEWARD:
-        # Steward-specific logic
-        new_task_id = job_helper_functions.assign_3a_lm(
-            worker_id,
-            obj_job,
-            job_l,
-            job_m,
-            task_annotation_time_limit,
-            count_tasks
+            job_l=job_l,
+            job_m=job_m,
+            answer=selected_choice,
+            task_annotation_time_limit=task_annotation_time_limit,
+            assignment_priority=request.session.get('job_assignment_priority', settings.ASSIGNMENT_PRIORITIES[0])
         )
     
     # Common completion code here.
@@ -422,7 +376,8 @@ def process_annotation_3a_knlm(request: HttpRequest):
             task_annotation_time_limit=request.session['task_annotation_time_limit'],
             task_short_instructions=request.session['task_short_instructions'],
             task_long_instructions=request.session['task_long_instructions'],
-            task_design_layout=request.session['task_design_layout']
+            task_design_layout=request.session['task_design_layout'],
+            tuple_row=new_tuple_row
         )
         # show on screen via the response
         context = {
@@ -506,6 +461,10 @@ def quit_3a_kn(request: HttpRequest):
     task_id = request.session['assigned_task_id']
     # reclaim task: update tasks and task assignments table
     job_dao.skip_3a_kn(obj_job=obj_job, task_id=task_id, worker_id=worker_id)
+    # reclaim the leased tasks that did not get an annotation
+    for leased_task_id in request.session.get('leased_task_ids', []):
+        job_dao.skip_3a_kn(obj_job=obj_job, task_id=leased_task_id, worker_id=worker_id)
+    request.session['leased_task_ids'] = []
     # return 'successfully quit' screen
     context = {
         'section': 'worker',
@@ -530,11 +489,14 @@ def quit_3a_knlm(request: HttpRequest):
     task_id = request.session['assigned_task_id']
 
     # Execute logic depending on user type that is annotating.
-    if user_type == UserType.REGULAR:
-        # reclaim task: update tasks and task assignments table
-        job_dao.skip_3a_kn(obj_job=obj_job, task_id=task_id, worker_id=worker_id)
-    elif user_type == UserType.STEWARD:
-        job_dao.skip_3a_lm(obj_job=obj_job, task_id=task_id, worker_id=worker_id)
+    # reclaim the assigned task as well as the leased tasks that did not get an annotation
+    for reclaimed_task_id in [task_id] + request.session.get('leased_task_ids', []):
+        if user_type == UserType.REGULAR:
+            # reclaim task: update tasks and task assignments table
+            job_dao.skip_3a_kn(obj_job=obj_job, task_id=reclaimed_task_id, worker_id=worker_id)
+        elif user_type == UserType.STEWARD:
+            job_dao.skip_3a_lm(obj_job=obj_job, task_id=reclaimed_task_id, worker_id=worker_id)
+    request.session['leased_task_ids'] = []
     
     # Common completion code here.
     # return 'successfully quit' screen
@@ -567,13 +529,14 @@ def skip_3a_kn(request: HttpRequest):
     job_dao.skip_3a_kn(obj_job=obj_job, task_id=task_id, worker_id=worker_id)
 
     # assign a new task to worker for this 3a_kn job
-    new_task_id = job_helper_functions.assign_3a_kn(
+    new_task_id, new_tuple_row = job_helper_functions.assign_3a_kn(
         worker_id,
         obj_job,
         job_k,
         job_n,
         task_annotation_time_limit,
-        count_tasks
+        count_tasks,
+        request.session.get('job_assignment_priority', settings.ASSIGNMENT_PRIORITIES[0])
     )
     if new_task_id > 0:  # assign returned a task
         request.session['assigned_task_id'] = new_task_id
@@ -586,7 +549,8 @@ def skip_3a_kn(request: HttpRequest):
             task_annotation_time_limit=request.session['task_annotation_time_limit'],
             task_short_instructions=request.session['task_short_instructions'],
             task_long_instructions=request.session['task_long_instructions'],
-            task_design_layout=request.session['task_design_layout']
+            task_design_layout=request.session['task_design_layout'],
+            tuple_row=new_tuple_row
         )
         # show on screen via the response
         context = {
@@ -656,26 +620,28 @@ def skip_3a_knlm(request: HttpRequest):
         job_dao.skip_3a_lm(obj_job=obj_job, task_id=task_id, worker_id=worker_id)
 
     # Assign a new task to worker for this 3a_knlm job depending on user type coming in.
-    new_task_id = None
+    new_task_id, new_tuple_row = None, None
     if user_type == UserType.REGULAR:
         # Regular-specific logic
-        new_task_id = job_helper_functions.assign_3a_kn(
+        new_task_id, new_tuple_row = job_helper_functions.assign_3a_kn(
             worker_id,
             obj_job,
             job_k,
             job_n,
             task_annotation_time_limit,
-            count_tasks
+            count_tasks,
+            request.session.get('job_assignment_priority', settings.ASSIGNMENT_PRIORITIES[0])
         )
     elif user_type == UserType.STEWARD:
         # Steward-specific logic
-        new_task_id = job_helper_functions.assign_3a_lm(
+        new_task_id, new_tuple_row = job_helper_functions.assign_3a_lm(
             worker_id,
             obj_job,
             job_l,
             job_m,
             task_annotation_time_limit,
-            count_tasks
+            count_tasks,
+            request.session.get('job_assignment_priority', settings.ASSIGNMENT_PRIORITIES[0])
         )
     
     # Common completion code here.
@@ -690,7 +656,8 @@ def skip_3a_knlm(request: HttpRequest):
             task_annotation_time_limit=request.session['task_annotation_time_limit'],
             task_short_instructions=request.session['task_short_instructions'],
             task_long_instructions=request.session['task_long_instructions'],
-            task_design_layout=request.session['task_design_layout']
+            task_design_layout=request.session['task_design_layout'],
+            tuple_row=new_tuple_row
         )
         # show on screen via the response
         context = {
@@ -736,59 +703,319 @@ def skip_3a_knlm(request: HttpRequest):
         """
         raise ValueError("You just skipped a task, but the job is completed. This should not happen.")
 
+def lease_3a_kn(request: HttpRequest):
+    """Lease a batch of tasks to this worker and return their annotation contents"""
+
+    # get this worker's id
+    worker_id = request.user.id
+
+    # 1. prepare for assign and annotate
+    obj_job: job_components.Job = load_common_variables_for_assign_and_annotate(request)
+
+    # 2. lease tasks to worker for this 3a_kn job
+    task_ids = job_helper_functions.lease_3a_kn(
+        worker_id,
+        obj_job,
+        request.session['job_k'],
+        request.session['job_n'],
+        request.session['task_annotation_time_limit'],
+        request.session['count_tasks'],
+        get_lease_size(request),
+        request.session.get('job_assignment_priority', settings.ASSIGNMENT_PRIORITIES[0])
+    )
+    return get_lease_response(request, obj_job, task_ids)
+
+
+def lease_3a_knlm(request: HttpRequest):
+    """Lease a batch of tasks to this worker and return their annotation contents for 3a_knlm job"""
+    user_type = getattr(request, 'user_type', UserType.REGULAR)
+
+    # Common setup code: get this worker's id, and prepare for assign and annotate.
+    worker_id = request.user.id
+    obj_job: job_components.Job = load_common_variables_for_assign_and_annotate(request)
+
+    # Lease tasks to worker for this 3a_knlm job depending on user type coming in.
+    task_ids = None
+    if user_type == UserType.REGULAR:
+        task_ids = job_helper_functions.lease_3a_kn(
+            worker_id,
+            obj_job,
+            request.session['job_k'],
+            request.session['job_n'],
+            request.session['task_annotation_time_limit'],
+            request.session['count_tasks'],
+            get_lease_size(request),
+            request.session.get('job_assignment_priority', settings.ASSIGNMENT_PRIORITIES[0])
+        )
+    elif user_type == UserType.STEWARD:
+        task_ids = job_helper_functions.lease_3a_lm(
+            worker_id,
+            obj_job,
+            request.session['job_l'],
+            request.session['job_m'],
+            request.session['task_annotation_time_limit'],
+            request.session['count_tasks'],
+            get_lease_size(request),
+            request.session.get('job_assignment_priority', settings.ASSIGNMENT_PRIORITIES[0])
+        )
+    return get_lease_response(request, obj_job, task_ids)
+
+
+def submit_batch_3a_kn(request: HttpRequest):
+    """Process the annotations provided by worker for the leased tasks"""
+
+    obj_job: job_components.Job = load_job_from_session(request)
+    worker_id = request.user.id
+    answers = get_batch_answers(request)
+
+    # record and aggregate all votes at once
+    recorded_task_ids = job_dao.submit_batch_3a_kn(
+        obj_job=obj_job,
+        worker_id=worker_id,
+        job_k=request.session['job_k'],
+        job_n=request.session['job_n'],
+        answers=answers
+    )
+    return get_submit_batch_response(request, obj_job, answers, recorded_task_ids)
+
+
+def submit_batch_3a_knlm(request: HttpRequest):
+    """Process the annotations provided by worker for the leased tasks of 3a_knlm job"""
+    user_type = getattr(request, 'user_type', UserType.REGULAR)
+
+    obj_job: job_components.Job = load_job_from_session(request)
+    worker_id = request.user.id
+    answers = get_batch_answers(request)
+
+    # record and aggregate all votes at once, depending on user type that is annotating.
+    recorded_task_ids = []
+    if user_type == UserType.REGULAR:
+        recorded_task_ids = job_dao.submit_batch_3a_kn(
+            obj_job=obj_job,
+            worker_id=worker_id,
+            job_k=request.session['job_k'],
+            job_n=request.session['job_n'],
+            answers=answers,
+            worker_type=UserType.REGULAR
+        )
+    elif user_type == UserType.STEWARD:
+        recorded_task_ids = job_dao.submit_batch_3a_lm(
+            obj_job=obj_job,
+            worker_id=worker_id,
+            job_l=request.session['job_l'],
+            job_m=request.session['job_m'],
+            answers=answers
+        )
+    return get_submit_batch_response(request, obj_job, answers, recorded_task_ids)
+
+
+def assign_for_work(request: HttpRequest, obj_job: job_components.Job, worker_id: int, user_type: UserType):
+    """
+    Assign a task to the worker, depending on user type.
+    With wait=<seconds>, a worker who gets no task is parked until a task of the job gets abandoned, skipped or reopened
+    (as announced by the task availability notifications), and assign is tried again, until a task is assigned or the
+    wait is over. Returns (task id, tuple row of the task) as assign does ((0, None) if no task, (-1, None) if the job is complete).
+    """
+    deadline = time.monotonic() + get_work_wait(request)
+    while True:
+        # taken before assigning, so that a task freed up in between wakes the wait right away
+        task_availability_version = job_dao.get_task_availability_version(obj_job=obj_job)
+        task_id, tuple_row = None, None
+        if user_type == UserType.REGULAR:
+            # Regular-specific logic
+            task_id, tuple_row = job_helper_functions.assign_3a_kn(
+                worker_id,
+                obj_job,
+                request.session['job_k'],
+                request.session['job_n'],
+                request.session['task_annotation_time_limit'],
+                request.session['count_tasks'],
+                request.session.get('job_assignment_priority', settings.ASSIGNMENT_PRIORITIES[0])
+            )
+        elif user_type == UserType.STEWARD:
+            # Steward-specific logic
+            task_id, tuple_row = job_helper_functions.assign_3a_lm(
+                worker_id,
+                obj_job,
+                request.session['job_l'],
+                request.session['job_m'],
+                request.session['task_annotation_time_limit'],
+                request.session['count_tasks'],
+                request.session.get('job_assignment_priority', settings.ASSIGNMENT_PRIORITIES[0])
+            )
+        remaining_wait = deadline - time.monotonic()
+        if task_id != 0 or remaining_wait <= 0:
+            return task_id, tuple_row
+        job_dao.wait_for_available_tasks(obj_job=obj_job, version=task_availability_version, timeout=remaining_wait)
+
+
+def get_work_wait(request: HttpRequest):
+    """Seconds the worker is willing to wait for a task in a work request, capped at MAX_WORK_WAIT (0 by default)"""
+    wait = int(request.GET.get('wait', 0))
+    if wait < 0:
+        raise ValueError('Wait has to be at least 0', wait)
+    return min(wait, settings.MAX_WORK_WAIT)
+
+
+def get_lease_size(request: HttpRequest):
+    """Number of tasks the worker asked to lease, capped at MAX_LEASE_SIZE"""
+    lease_size = int(request.GET.get('lease_size', settings.DEFAULT_LEASE_SIZE))
+    if lease_size < 1:
+        raise ValueError('Lease size has to be at least 1', lease_size)
+    return min(lease_size, settings.MAX_LEASE_SIZE)
+
+
+def get_lease_response(request: HttpRequest, obj_job: job_components.Job, task_ids):
+    """Response to a lease request, carrying the annotation contents of every leased task"""
+    worker_id = request.user.id
+    if 'assigned_task_id' not in request.session:
+        # nothing assigned one at a time, so quit only has the leased tasks to reclaim
+        request.session['assigned_task_id'] = 0
+    if task_ids == -1:
+        request.session['leased_task_ids'] = []
+        context = {
+            'section': 'worker',
+            'message': 'human operator is not collecting annotations for any task',
+            'worker_code': settings.WORKER_CODES['QUIT']
+        }
+    elif not task_ids:
+        request.session['leased_task_ids'] = []
+        context = {
+            'section': 'worker',
+            'message': 'this worker did not get any task',
+            'worker_code': settings.WORKER_CODES['DELAYED_RETRY']
+        }
+    else:
+        request.session['leased_task_ids'] = task_ids
+        tasks = []
+        for task_id in task_ids:
+            page_contents = job_helper_functions.get_annotation_page_3a_kn(
+                obj_job=obj_job,
+                task_id=task_id,
+                task_question=request.session['task_question'],
+                task_option_list=request.session['task_option_list'],
+                task_annotation_time_limit=request.session['task_annotation_time_limit'],
+                task_short_instructions=request.session['task_short_instructions'],
+                task_long_instructions=request.session['task_long_instructions'],
+                task_design_layout=request.session['task_design_layout']
+            )
+            tasks.append({
+                'task_id': task_id,
+                'task_question': page_contents['task_question'],
+                'task_representation': page_contents['task_representation'],
+                'header_value_dict': page_contents['header_value_dict']
+            })
+        context = {
+            'section': 'worker',
+            'tasks': tasks,
+            'task_option_list': request.session['task_option_list'],
+            'task_short_instructions': request.session['task_short_instructions'],
+            'task_long_instructions': request.session['task_long_instructions'],
+            'timer': request.session['task_annotation_time_limit'],
+            'debug_message': 'worker_id: ' + str(worker_id),
+            'worker_code': settings.WORKER_CODES['ANNOTATE']
+        }
+    # the batch actions have no page of their own, so GUI and api requests (such as by simulated workers) alike get json
+    return JsonResponse(context)
+
+
+def get_batch_answers(request: HttpRequest):
+    """Map of leased task id -> answer, from the parallel task_id and choice lists of the submission"""
+    leased_task_ids = set(request.session.get('leased_task_ids', []))
+    task_ids = request.POST.getlist('task_id')
+    choices = request.POST.getlist('choice')
+    if len(task_ids) != len(choices):
+        raise ValueError('Every submitted task_id needs a choice', len(task_ids), len(choices))
+    answers = {}
+    for task_id, choice in zip(task_ids, choices):
+        task_id = int(task_id)
+        # votes are only accepted on tasks leased to this worker
+        if task_id in leased_task_ids:
+            answers[task_id] = choice
+    return answers
+
+
+def get_submit_batch_response(request: HttpRequest, obj_job: job_components.Job, answers: dict, recorded_task_ids: list):
+    """Response to a batch submission, completing the job if that was the last of its annotations"""
+    worker_id = request.user.id
+    request.session['leased_task_ids'] = [
+        task_id for task_id in request.session.get('leased_task_ids', []) if task_id not in answers
+    ]
+    all_tasks_have_aggregated_labels: bool = job_dao.check_all_tasks_have_aggregated_labels(obj_job, request.session['count_tasks'])
+    if all_tasks_have_aggregated_labels:
+        # human operator just finished, do bookkeeping and mark complete; and progress dag
+        complete_job_and_progress_dag(obj_job)
+        context = {
+            'section': 'worker',
+            'message': 'This job has completed, and not collecting any more annotations.',
+            'recorded_task_ids': recorded_task_ids,
+            'debug_message': 'worker_id: ' + str(worker_id),
+            'worker_code': settings.WORKER_CODES['QUIT']
+        }
+    else:
+        context = {
+            'section': 'worker',
+            'message': 'Annotations submitted. Lease the next batch of tasks to continue.',
+            'recorded_task_ids': recorded_task_ids,
+            'debug_message': 'worker_id: ' + str(worker_id),
+            'worker_code': settings.WORKER_CODES['ANNOTATE']
+        }
+    # the batch actions have no page of their own, so GUI and api requests (such as by simulated workers) alike get json
+    return JsonResponse(context)
+
+
+def complete_job_and_progress_dag(obj_job: job_components.Job):
+    """Complete the human job (at most once, guarded by the job lock in bookkeeping) and progress the dag"""
+    obj_run: run_components.Run = run_dao.find_run(
+        run_id=obj_job.run_id,
+        workflow_id=obj_job.workflow_id,
+        project_id=obj_job.project_id,
+        user_id=obj_job.user_id
+    )
+    if obj_run.type == settings.RUN_TYPES[2]:   # pipelined run
+        pipelined_simulated_run_helper_functions.complete_processing_job_and_progress_dag(this_job=obj_job)
+    else:
+        run_helper_functions.complete_processing_job_and_progress_dag(this_job=obj_job)
+    return
+
+
 def load_common_variables_for_assign_and_annotate(request: HttpRequest):
     """Load common variables for assign and annotate."""
 
     # get this job's identifiers
     requester_id, project_id, workflow_id, run_id, job_id = job_helper_functions.get_job_identifiers(request)
 
-    obj_job: job_components.Job = job_dao.find_job(
+    # the context of this job is cached in this process, so only the first request for this job reads its metadata from db
+    job_context: job_components.JobContext = job_dao.get_job_context(
         job_id=job_id,
         run_id=run_id,
         workflow_id=workflow_id,
         project_id=project_id,
         user_id=requester_id
     )
+    obj_job: job_components.Job = job_context.get_job()
+    if request.session.get('current_job_context') == job_context.version:
+        # the session already holds the variables of this very job (and job status)
+        return obj_job
     request.session['current_job_requester'] = obj_job.user_id
     request.session['current_job_project'] = obj_job.project_id
     request.session['current_job_workflow'] = obj_job.workflow_id
     request.session['current_job_run'] = obj_job.run_id
     request.session['current_job'] = obj_job.id
 
-    # load worker instructions for this job,
-    # and save it in session to fasten repeated access during successive assignments
-    instructions_dict = job_dao.get_instructions(
-        requester_id=request.session['current_job_requester'],
-        project_id=request.session['current_job_project'],
-        workflow_id=request.session['current_job_workflow'],
-        run_id=request.session['current_job_run'],
-        job_id=request.session['current_job']
-    )
-    for key, value in instructions_dict.items():
+    # save worker instructions for this job in session to fasten repeated access during successive assignments
+    for key, value in job_context.instructions.items():
         if key == 'short_instructions':
             request.session['task_short_instructions'] = value
         elif key == 'long_instructions':
             request.session['task_long_instructions'] = value
-    # load layout for this job, and save it in session to fasten repeated access during successive assignments
-    layout_dict = job_dao.get_layout(
-        requester_id=request.session['current_job_requester'],
-        project_id=request.session['current_job_project'],
-        workflow_id=request.session['current_job_workflow'],
-        run_id=request.session['current_job_run'],
-        job_id=request.session['current_job']
-    )
-    for key, value in layout_dict.items():
+    # save layout for this job in session to fasten repeated access during successive assignments
+    for key, value in job_context.layout.items():
         if key == 'design_layout':
             request.session['task_design_layout'] = value
-    # load config parameters for this job, , and save them in session to fasten repeated access during successive assignments
-    configuration_dict = job_dao.get_configuration(
-        requester_id=request.session['current_job_requester'],
-        project_id=request.session['current_job_project'],
-        workflow_id=request.session['current_job_workflow'],
-        run_id=request.session['current_job_run'],
-        job_id=request.session['current_job']
-    )
-    for key, value in configuration_dict.items():
+    # save config parameters for this job in session to fasten repeated access during successive assignments
+    request.session['job_assignment_priority'] = settings.ASSIGNMENT_PRIORITIES[0]  # 'fifo', unless configured below
+    for key, value in job_context.configuration.items():
         # pre-processing
         if value.startswith('"') and value.endswith('"'):
             value = value[1:-1]
@@ -812,8 +1039,12 @@ def load_common_variables_for_assign_and_annotate(request: HttpRequest):
             request.session['job_l'] = int(value)
         elif key == 'm':
             request.session['job_m'] = int(value)
-    count_tasks: int = job_dao.get_count_tasks(obj_job=obj_job)
-    request.session['count_tasks'] = count_tasks
+        elif key == 'assignment_priority':
+            if value not in settings.ASSIGNMENT_PRIORITIES:
+                raise ValueError('Unknown assignment priority', value)
+            request.session['job_assignment_priority'] = value
+    request.session['count_tasks'] = job_context.count_tasks
+    request.session['current_job_context'] = job_context.version
     return obj_job
 
 def load_job_from_session(request: HttpRequest):
@@ -823,11 +1054,12 @@ def load_job_from_session(request: HttpRequest):
     workflow_id = request.session['current_job_workflow']
     run_id = request.session['current_job_run']
     job_id = request.session['current_job']
-    obj_job: job_components.Job = job_dao.find_job(
+    job_context: job_components.JobContext = job_dao.get_job_context(
         job_id=job_id,
         run_id=run_id,
         workflow_id=workflow_id,
         project_id=project_id,
         user_id=requester_id
     )
-    return obj_job
\ No newline at end of file
+    obj_job: job_components.Job = job_context.get_job()
+    return obj_job
@@ -1,6 +1,12 @@
 from django.utils import timezone
 from django.conf import settings
 
+import collections
+import threading
+import copy
+import time
+import re
+
 
 class Job:
     """
@@ -67,3 +73,201 @@ class Job:
             self.id, self.run_id, self.workflow_id, self.project_id, self.user_id, self.name, self.type, self.status, self.date_creation
         )
 
+
+
+class ReadyQueue:
+    """
+        A class to represent the process local queue of tasks of a job that are ready to be assigned.
+        The tasks table stays the source of truth, the queue only holds candidate task ids
+        that assignment tries (and locks in the tasks table) before falling back to scanning the tasks table.
+
+        Attributes
+        ----------
+        task_ids : collections.deque
+            candidate task ids, in the order they should be tried
+        last_task_id : int
+            largest task id fetched so far, refills continue after it
+        date_refill : float
+            time of the last refill from the tasks table (time.monotonic())
+        lock : threading.Lock
+            lets only one thread refill the queue at a time
+    """
+    def __init__(self):
+        """
+            Constructs an empty ready queue, which gets filled on first use.
+        """
+        self.task_ids = collections.deque()
+        self.last_task_id = 0
+        self.date_refill = None
+        self.lock = threading.Lock()
+
+    def pop(self):
+        """Pop the next candidate task id, None if the queue is empty"""
+        try:
+            return self.task_ids.popleft()
+        except IndexError:
+            return None
+
+    def push_front(self, task_ids: list):
+        """Put task ids back at the front of the queue, keeping their order"""
+        self.task_ids.extendleft(reversed(task_ids))
+
+    def push_back(self, task_ids: list):
+        """Put task ids at the back of the queue"""
+        self.task_ids.extend(task_ids)
+
+    def is_stale(self, refresh_interval: int):
+        """Whether the queue is empty or was refilled more than refresh_interval seconds ago"""
+        return not self.task_ids or self.date_refill is None or time.monotonic() - self.date_refill > refresh_interval
+
+    def __str__(self):
+        return 'ReadyQueue({0}, {1}, {2})'.format(
+            len(self.task_ids), self.last_task_id, self.date_refill
+        )
+
+
+class JobContext:
+    """
+        A class to represent the process local context of a job that the annotation requests need on every call.
+        Instructions, layout, configuration and the count of tasks never change once the job is bookkept,
+        so the context only goes stale when the status of the job changes.
+
+        Attributes
+        ----------
+        job : Job
+            the job, as it was when the context got loaded
+        instructions : dict
+            worker instructions of the job (short_instructions, long_instructions)
+        layout : dict
+            layout of the job (design_layout)
+        configuration : dict
+            config parameters of the job, as stored (e.g. question, answers, k, n)
+        count_tasks : int
+            count of tasks in the job
+        version : str
+            composite id of the job along with its status, changes whenever the job status does
+        date_loaded : float
+            time the context got loaded from the db (time.monotonic())
+    """
+    def __init__(self, job: Job, instructions: dict, layout: dict, configuration: dict, count_tasks: int):
+        """
+            Constructs the context of the job from its metadata loaded from the db.
+        """
+        self.job = job
+        self.instructions = instructions
+        self.layout = layout
+        self.configuration = configuration
+        self.count_tasks = count_tasks
+        self.version = '.'.join(str(part) for part in [job.user_id, job.project_id, job.workflow_id, job.run_id, job.id, job.status])
+        self.date_loaded = time.monotonic()
+
+    def get_job(self):
+        """A copy of the job, so that the caller may change it without touching the cached one"""
+        return copy.copy(self.job)
+
+    def is_stale(self, time_to_live: int):
+        """Whether the context was loaded more than time_to_live seconds ago"""
+        return time.monotonic() - self.date_loaded > time_to_live
+
+    def __str__(self):
+        return 'JobContext({0}, {1})'.format(
+            self.version, self.date_loaded
+        )
+
+
+class CompiledLayout:
+    """
+        A class to represent the question and the layout of a job, compiled once against the headers of its tuples.
+        Each template is split into a slot list: pairs of literal text and the column whose value follows that text
+        (None for the trailing text), so that rendering a tuple is a single pass over the slots.
+        A ${...} placeholder naming no column of the tuples is kept as literal text.
+
+        Attributes
+        ----------
+        tuple_header : list
+            headers of the tuples of the job (except _id and date_creation), in table order
+        question : str
+            question the slots were compiled from
+        design_layout : str
+            layout the slots were compiled from (settings.DEFAULT_LAYOUT for a table of the tuple)
+        question_slots : list
+            slots of the question
+        representation_slots : list
+            slots of the layout
+        prerendered : bool
+            whether the rendered question and layout of every tuple are stored in the representations table of the job
+    """
+    placeholder_pattern = re.compile(r'\$\{([^}]*)\}')
+
+    def __init__(self, tuple_header: list, question: str, design_layout: str):
+        """
+            Compiles the question and the layout against the headers of the tuples.
+        """
+        self.tuple_header = list(tuple_header)
+        self.question = question
+        self.design_layout = design_layout
+        self.question_slots = self.compile(question)
+        if design_layout == settings.DEFAULT_LAYOUT:
+            self.representation_slots = self.compile_default_layout()
+        else:
+            self.representation_slots = self.compile(design_layout)
+        self.prerendered = False
+
+    def compile(self, template: str):
+        """Split the template into slots at the placeholders of the columns"""
+        columns = set(self.tuple_header)
+        slots = []
+        text = ''
+        position = 0
+        for match in self.placeholder_pattern.finditer(template):
+            text = text + template[position:match.start()]
+            position = match.end()
+            if match.group(1) in columns:
+                slots.append((text, match.group(1)))
+                text = ''
+            else:
+                text = text + match.group(0)
+        slots.append((text + template[position:], None))
+        return slots
+
+    def compile_default_layout(self):
+        """Slots of the tabular representation of the tuple: a row of headers followed by a row of values"""
+        text = "<table border=\"1px black\">" + "".join("<th>" + header + "</th>" for header in self.tuple_header) + "<tr>"
+        slots = []
+        for header in self.tuple_header:
+            slots.append((text + "<td>", header))
+            text = "</td>"
+        slots.append((text + "</tr></table>", None))
+        return slots
+
+    def compiled_from(self, question: str, design_layout: str):
+        """Whether these slots were compiled from the given question and layout"""
+        return self.question == question and self.design_layout == design_layout
+
+    def get_header_value_dict(self, tuple_row: dict):
+        """Column name vs value of the tuple, in header order"""
+        return collections.OrderedDict((header, tuple_row.get(header)) for header in self.tuple_header)
+
+    def render_question(self, header_value_dict: dict):
+        """Question with the values of the tuple filled in"""
+        return self.render(self.question_slots, header_value_dict)
+
+    def render_representation(self, header_value_dict: dict):
+        """Layout with the values of the tuple filled in"""
+        return self.render(self.representation_slots, header_value_dict)
+
+    @staticmethod
+    def render(slots: list, header_value_dict: dict):
+        """Fill the values of the tuple into the slots, as text (columns can be typed, and NULL is filled in as empty)"""
+        parts = []
+        for text, column in slots:
+            parts.append(text)
+            if column is not None:
+                value = header_value_dict[column]
+                parts.append('' if value is None else str(value))
+        return ''.join(parts)
+
+    def __str__(self):
+        return 'CompiledLayout({0}, {1}, {2})'.format(
+            len(self.tuple_header), len(self.question_slots), len(self.representation_slots)
+        )
@@ -3,12 +3,17 @@ from django.utils import timezone
 from django.conf import settings
 
 import controller.logic.job.components as job_components
-from controller.logic.common_data_access_operations import dict_fetchall, dict_fetchone, is_steward
-from controller.logic.common_logic_operations import get_job_prefix_table_name
+import controller.logic.job.helper_functions as job_helper_functions
+from controller.logic.common_data_access_operations import dict_fetchall, dict_fetchone, is_steward, read_columnar_file
+from controller.logic.common_data_access_operations import open_data_file
+from controller.logic.common_logic_operations import get_job_prefix_table_name, infer_column_types
 
 from pathlib import Path
 from datetime import datetime, timedelta
-import pytz, psycopg2, time, csv, random
+import pytz, psycopg2, time, csv, random, threading, select, io, itertools, hashlib, locale, re, multiprocessing
+import django
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
 
 import time
 
@@ -276,6 +281,10 @@ def edit_job(obj_job: job_components.Job):
                 obj_job.id,
             ]
         )
+        if obj_job.status == settings.JOB_STATUS[1] and obj_job.name in (settings.HUMAN_OPERATORS[0], settings.HUMAN_OPERATORS[2]):
+            # human job started collecting annotations (RUNNING 3a_kn or 3a_knlm), tell the task monitor
+            notify_job_started(cursor=cursor, obj_job=obj_job)
+        notify_job_status_changed(cursor=cursor, obj_job=obj_job)
         return
 
     except ValueError as err:
@@ -286,57 +295,158 @@ def edit_job(obj_job: job_components.Job):
         cursor.close()
 
 
-def create_table_from_file(source_file_path: Path, target_table_name: str):
-    """Create a table from a csv file"""
+def notify_job_started(cursor, obj_job: job_components.Job):
+    """Publish the composite id (user_id.project_id.workflow_id.run_id.job_id) of the job on the job started channel"""
+    cursor.execute(
+        "SELECT pg_notify(%s, %s)",
+        [
+            settings.JOB_STARTED_CHANNEL,
+            '.'.join(str(part) for part in [obj_job.user_id, obj_job.project_id, obj_job.workflow_id, obj_job.run_id, obj_job.id])
+        ]
+    )
+    return
+
+
+def read_decoded_lines(binary_file, encoding: str):
+    """Yield the decoded lines of the binary file"""
+    for line in binary_file:
+        yield line.decode(encoding)
+
+
+def get_column_types_of_file(headers: list, sample_rows: list, column_types: dict, infer_types: bool):
+    """Validate the headers of a csv file (naming conventions and max limit), and return their types {header: type}:
+    text, or as inferred from the sample rows (if infer_types), and as declared in column_types over the inferred ones"""
+    naming_convention_regex = re.compile(settings.NAMING_CONVENTION_PATTERN)
+    for header in headers:
+        if naming_convention_regex.match(header) is None:
+            raise ValueError("One or more header of input data file does not follow naming conventions")
+    if len(headers) > settings.INPUT_N_MAX_HEADERS:
+        raise ValueError("Number of columns in data file exceeds the maximum allowed")
+    types = {header: 'text' for header in headers}
+    if infer_types:
+        types.update(infer_column_types(headers=headers, sample_rows=sample_rows))
+    if column_types:
+        types.update({header: column_types[header] for header in headers if header in column_types})
+    return types
+
+
+def get_create_table_from_file_query(
+        target_table_name: str,
+        headers: list,
+        types: dict,
+        constraints: str = "",
+        table_options: str = ""
+):
+    """Query creating the table of a csv file: the _id header, the headers of the file, and date_creation"""
+    main_header = "_id"
+    column_list = ""
+    for header in headers:
+        column_list = column_list + ", " + header + " " + types[header]
+    query_string = "CREATE TABLE " + \
+                   target_table_name + "(" + \
+                   main_header + " integer" + \
+                   column_list + \
+                   ", date_creation TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP" + \
+                   constraints + \
+                   ")" + table_options
+    return query_string
+
+
+def get_copy_from_file_query(target_table_name: str, headers: list, types: dict):
+    """Query copying numbered csv rows into the table of a csv file"""
+    # an empty field of a text column stays an empty string (as with insert), instead of COPY's default
+    # of NULL. an empty field of a typed column is NULL.
+    text_headers = [header for header in headers if types[header] == 'text']
+    query_string = "COPY " + \
+                   target_table_name + \
+                   "(" + ", ".join(["_id"] + headers) + ")" + \
+                   " FROM STDIN WITH (FORMAT csv" + \
+                   (", FORCE_NOT_NULL (" + ", ".join(text_headers) + ")" if text_headers else "") + \
+                   ")"
+    return query_string
+
+
+def copy_rows_in_batches(cursor, query_string: str, rows, first_id: int, max_records: int = None):
+    """Copy the rows into a table, numbered from first_id, one batch at a time,
+    so that only one batch of rows is ever held in memory. Returns the count of rows copied"""
+    count_rows: int = 0
+    while True:
+        batch = io.StringIO()
+        csv_writer = csv.writer(batch)
+        for row in itertools.islice(rows, settings.INGESTION_BATCH_SIZE):
+            count_rows = count_rows + 1
+            if max_records is not None and count_rows > max_records:
+                raise ValueError("Number of records in data file exceeds the maximum allowed")
+            csv_writer.writerow([first_id + count_rows - 1] + row)
+        if batch.tell() == 0:
+            break
+        batch.seek(0)
+        cursor.copy_expert(sql=query_string, file=batch)
+    return count_rows
+
+
+def create_table_from_file(
+        source_file_path: Path,
+        target_table_name: str,
+        column_types: dict = None,
+        infer_types: bool = False,
+        max_records: int = settings.INPUT_N_MAX_RECORDS,
+        content_hash: str = None
+):
+    """Create a table from a csv file, streaming its rows into the table with COPY, one batch at a time.
+    Columns are text, or typed as inferred from the first rows of the file (if infer_types), and as declared in
+    column_types {header: type} over the inferred ones.
+    The file is read once: its headers are validated, and its rows counted, hashed and loaded on the way. Loading
+    aborts (and the table is rolled back) as soon as the rows exceed max_records (no limit if None), or at the end if
+    the file does not hash to the expected content_hash (if given).
+    Returns the count of rows loaded, and the sha256 hex digest of the file contents"""
     # Remarks:
-    # Since open() is used to open a CSV file for reading,
-    # the file will by default be decoded into unicode using the system default encoding.
-    # To decode a file using a different encoding, use the encoding argument of open:
-    # import csv
-    # with open('some.csv', newline='', encoding='utf-8') as f:
-    #   reader = csv.reader(f)`
+    # The file is read as bytes (to hash its exact stored contents, and to decompress a .gz or .zst file on the fly),
+    # and each line is decoded into unicode using the system default encoding, as open() would.
+    # To decode a file using a different encoding, pass it to read_decoded_lines instead.
     cursor = connection.cursor()
+    count_rows: int = 0
+    file_hash = hashlib.sha256()
     try:
         if source_file_path.is_file():
-            # 1. create target table: open the csv, read the headers, pass to callproc alongwith _id header
-            with source_file_path.open() as data_file:
-                csv_reader = csv.reader(data_file)
-                headers = next(csv_reader)
-            main_header = "_id"
-            column_list = ""
-            for header in headers:
-                column_list = column_list + ", " + header.strip() + " " + "text"
-            query_string = "CREATE TABLE " + \
-                           target_table_name + "(" + \
-                           main_header + " integer"+ \
-                           column_list + \
-                           ", date_creation TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP" + \
-                           ")"
-            # print(query_string)
-            cursor.execute(query_string, [])
-
-            # 2. fill target table: open the csv, read the data, insert into the table (TODO: bulk insert)
-            column_list = ""
-            placeholder_list = ""
-            for header in headers:
-                column_list = column_list + ", " + header.strip()
-                placeholder_list = placeholder_list + ", " + "%s"
-            query_string = "INSERT INTO " + \
-                           target_table_name + \
-                           "(" + main_header + column_list + ")" + \
-                           " VALUES (" + "%s" + placeholder_list + ")"
-            with source_file_path.open() as data_file:
-                csv_reader = csv.reader(data_file)
-                headers = next(csv_reader)  # to get header row out of the way
-                id_value = 0
-                for row in csv_reader:     # traverse non-header rows
-                    id_value = id_value + 1
-                    value_list = []
-                    value_list.append(id_value)
-                    value_list.extend(row)
-                    # print('size =' + str(len(value_list)) + ': ', value_list)
-                    cursor.execute(query_string, value_list)
-        return
+            with transaction.atomic():
+                with open_data_file(source_file_path=source_file_path, file_hash=file_hash) as data_file:
+                    csv_reader = csv.reader(
+                        read_decoded_lines(binary_file=data_file, encoding=locale.getpreferredencoding(False))
+                    )
+                    headers = [header.strip() for header in next(csv_reader)]
+                    # 1. create target table: read the headers off the csv, and add the _id header
+                    sample_rows = []
+                    if infer_types:
+                        # the sampled rows are loaded like the rest, ahead of them
+                        sample_rows = list(itertools.islice(csv_reader, settings.TYPE_INFERENCE_SAMPLE_SIZE))
+                    types = get_column_types_of_file(
+                        headers=headers, sample_rows=sample_rows, column_types=column_types, infer_types=infer_types
+                    )
+                    print('Column types of ' + target_table_name + ': ' + str(types))
+                    query_string = get_create_table_from_file_query(
+                        target_table_name=target_table_name, headers=headers, types=types
+                    )
+                    # print(query_string)
+                    cursor.execute(query_string, [])
+
+                    # 2. fill target table: numbered rows of the csv are copied in, one batch at a time
+                    count_rows = copy_rows_in_batches(
+                        cursor=cursor,
+                        query_string=get_copy_from_file_query(
+                            target_table_name=target_table_name, headers=headers, types=types
+                        ),
+                        rows=itertools.chain(sample_rows, csv_reader),  # traverse non-header rows
+                        first_id=1,
+                        max_records=max_records
+                    )
+                    # 3. index _id once loaded (quicker than maintaining it while loading), for the jobs reading the table
+                    cursor.execute("CREATE INDEX ON " + target_table_name + " (_id)", [])
+                    print('Loaded ' + str(count_rows) + ' rows into ' + target_table_name)
+                # the whole stored file has been hashed once it is closed
+                if content_hash is not None and file_hash.hexdigest() != content_hash:
+                    raise ValueError("Contents of input data file changed since it was hashed")
+        return count_rows, file_hash.hexdigest()
     except ValueError as err:
         print(err.args)
         raise ValueError('Data access exception in create table from file')
@@ -344,6 +454,532 @@ def create_table_from_file(source_file_path: Path, target_table_name: str):
         cursor.close()
 
 
+def get_postgres_type(arrow_type):
+    """Postgres type of the column of a columnar file, from its arrow type"""
+    import pyarrow.types
+    if pyarrow.types.is_dictionary(arrow_type):
+        return get_postgres_type(arrow_type.value_type)
+    if pyarrow.types.is_boolean(arrow_type):
+        return 'boolean'
+    elif pyarrow.types.is_int8(arrow_type) or pyarrow.types.is_int16(arrow_type) or \
+            pyarrow.types.is_int32(arrow_type) or pyarrow.types.is_uint8(arrow_type) or \
+            pyarrow.types.is_uint16(arrow_type):
+        return 'integer'
+    elif pyarrow.types.is_int64(arrow_type) or pyarrow.types.is_uint32(arrow_type):
+        return 'bigint'
+    elif pyarrow.types.is_uint64(arrow_type) or pyarrow.types.is_decimal(arrow_type):
+        return 'numeric'
+    elif pyarrow.types.is_floating(arrow_type):
+        return 'double precision'
+    elif pyarrow.types.is_timestamp(arrow_type):
+        return 'timestamptz' if arrow_type.tz is not None else 'timestamp'
+    elif pyarrow.types.is_date(arrow_type):
+        return 'date'
+    elif pyarrow.types.is_string(arrow_type) or pyarrow.types.is_large_string(arrow_type):
+        return 'text'
+    raise ValueError("Columns of arrow type " + str(arrow_type) + " can not be read")
+
+
+def create_table_from_columnar_file(
+        source_file_path: Path,
+        target_table_name: str,
+        column_types: dict = None,
+        max_records: int = settings.INPUT_N_MAX_RECORDS,
+        content_hash: str = None
+):
+    """Create a table from a parquet or arrow ipc file, streaming its record batches (a parquet file's row groups)
+    into the table with COPY, one batch at a time, without a csv file in between.
+    Columns get the postgres types of their arrow types, or as declared in column_types {header: type} over them.
+    Null values are NULL, and empty strings stay empty strings.
+    Returns the count of rows loaded, and the sha256 hex digest of the file contents"""
+    cursor = connection.cursor()
+    count_rows: int = 0
+    file_hash = hashlib.sha256()
+    try:
+        # pyarrow is imported by read_columnar_file, or it raises
+        with read_columnar_file(source_file_path) as (schema, num_rows, batches):
+            import pyarrow
+            import pyarrow.csv
+            with source_file_path.open(mode='rb') as data_file:
+                for block in iter(lambda: data_file.read(settings.INGESTION_READ_BYTES), b''):
+                    file_hash.update(block)
+            if content_hash is not None and file_hash.hexdigest() != content_hash:
+                raise ValueError("Contents of input data file changed since it was hashed")
+            if max_records is not None and num_rows is not None and num_rows > max_records:
+                raise ValueError("Number of records in data file exceeds the maximum allowed")
+            headers = schema.names
+            types = get_column_types_of_file(
+                headers=headers,
+                sample_rows=[],
+                column_types={**{field.name: get_postgres_type(field.type) for field in schema}, **(column_types or {})},
+                infer_types=False
+            )
+            print('Column types of ' + target_table_name + ': ' + str(types))
+            with transaction.atomic():
+                cursor.execute(
+                    get_create_table_from_file_query(target_table_name=target_table_name, headers=headers, types=types),
+                    []
+                )
+                # arrow's csv writer quotes strings, so an unquoted empty field is a null, and "" an empty string
+                query_string = "COPY " + \
+                               target_table_name + \
+                               "(" + ", ".join(["_id"] + headers) + ")" + \
+                               " FROM STDIN WITH (FORMAT csv)"
+                write_options = pyarrow.csv.WriteOptions(include_header=False)
+                for batch in batches:
+                    if max_records is not None and count_rows + batch.num_rows > max_records:
+                        raise ValueError("Number of records in data file exceeds the maximum allowed")
+                    columns = [
+                        column.dictionary_decode() if pyarrow.types.is_dictionary(column.type) else column
+                        for column in batch.columns
+                    ]
+                    ids = pyarrow.array(range(count_rows + 1, count_rows + 1 + batch.num_rows), type=pyarrow.int32())
+                    count_rows = count_rows + batch.num_rows
+                    buffer = pyarrow.BufferOutputStream()
+                    pyarrow.csv.write_csv(
+                        pyarrow.RecordBatch.from_arrays([ids] + columns, names=["_id"] + headers),
+                        buffer,
+                        write_options=write_options
+                    )
+                    cursor.copy_expert(sql=query_string, file=io.BytesIO(buffer.getvalue()))
+                    print('Loaded ' + str(count_rows) + ' rows into ' + target_table_name)
+                # index _id once loaded, for the jobs reading the table
+                cursor.execute("CREATE INDEX ON " + target_table_name + " (_id)", [])
+        return count_rows, file_hash.hexdigest()
+    except ValueError as err:
+        print(err.args)
+        raise ValueError('Data access exception in create table from columnar file')
+    finally:
+        cursor.close()
+
+
+def read_lines_in_range(binary_file, start: int, end: int, encoding: str):
+    """Yield the decoded lines of the binary file in the byte range [start, end), which starts at a line boundary"""
+    binary_file.seek(start)
+    position = start
+    while position < end:
+        line = binary_file.readline()
+        if not line:
+            break
+        position = position + len(line)
+        yield line.decode(encoding)
+
+
+def count_lines_in_range(source_file_path: Path, start: int, end: int):
+    """Count the lines of the file in the byte range [start, end), which starts and ends at line boundaries"""
+    count_lines = 0
+    last_byte = b'\n'
+    with source_file_path.open(mode='rb') as data_file:
+        data_file.seek(start)
+        remaining = end - start
+        while remaining > 0:
+            block = data_file.read(min(remaining, settings.INGESTION_READ_BYTES))
+            if not block:
+                break
+            remaining = remaining - len(block)
+            count_lines = count_lines + block.count(b'\n')
+            last_byte = block[-1:]
+    # the last line of the file may not end in a newline
+    if last_byte != b'\n':
+        count_lines = count_lines + 1
+    return count_lines
+
+
+def copy_range_into_partition(
+        source_file_path: Path,
+        start: int,
+        end: int,
+        first_id: int,
+        count_lines: int,
+        partition_table_name: str,
+        headers: list,
+        types: dict,
+        encoding: str
+):
+    """Worker of create_table_from_file_in_parallel: create a table for one partition of the target table, and copy
+    the rows in the byte range [start, end) of the file into it, numbered from first_id.
+    Returns the count of rows copied"""
+    cursor = connection.cursor()
+    try:
+        with transaction.atomic(), source_file_path.open(mode='rb') as data_file:
+            # the check constraint on the partition's range of _id lets the attach skip the validation scan
+            cursor.execute(
+                get_create_table_from_file_query(
+                    target_table_name=partition_table_name,
+                    headers=headers,
+                    types=types,
+                    constraints=", CHECK (_id >= " + str(first_id) + " AND _id < " + str(first_id + count_lines) + ")"
+                ),
+                []
+            )
+            count_rows = copy_rows_in_batches(
+                cursor=cursor,
+                query_string=get_copy_from_file_query(
+                    target_table_name=partition_table_name, headers=headers, types=types
+                ),
+                rows=csv.reader(read_lines_in_range(binary_file=data_file, start=start, end=end, encoding=encoding)),
+                first_id=first_id
+            )
+            if count_rows != count_lines:
+                # a quoted field spanned lines, so records cannot be numbered by lines
+                raise ValueError("Records of the data file span lines, it can not be loaded in parallel")
+            # the index of each partition is built here, concurrently, and attached to the target table's index
+            cursor.execute("CREATE INDEX ON " + partition_table_name + " (_id)", [])
+        return count_rows
+    except ValueError as err:
+        print(err.args)
+        raise ValueError('Data access exception in copy range into partition')
+    finally:
+        cursor.close()
+
+
+def create_table_from_file_in_parallel(
+        source_file_path: Path,
+        target_table_name: str,
+        column_types: dict = None,
+        infer_types: bool = False,
+        max_records: int = settings.INPUT_N_MAX_RECORDS_PARALLEL,
+        content_hash: str = None,
+        workers: int = settings.INGESTION_WORKERS
+):
+    """Create a table from a large csv file, as create_table_from_file does, but partitioned by range of _id:
+    the file is split into byte ranges of about settings.INGESTION_CHUNK_BYTES, aligned to lines, and a pool of worker
+    processes loads the ranges concurrently into one table each. The partitioned target table is created and the
+    tables attached to it as its partitions in one transaction at the end, so it only ever exists complete.
+    Records of the file must not span lines (no quoted newlines), as they are numbered by lines.
+    Returns the count of rows loaded, and the sha256 hex digest of the file contents"""
+    cursor = connection.cursor()
+    partition_table_names = []
+    try:
+        encoding = locale.getpreferredencoding(False)
+        file_size = source_file_path.stat().st_size
+        with source_file_path.open(mode='rb') as data_file:
+            header_line = data_file.readline()
+            headers = [header.strip() for header in next(csv.reader([header_line.decode(encoding)]))]
+            sample_rows = []
+            if infer_types:
+                sample_rows = list(itertools.islice(
+                    csv.reader(read_lines_in_range(
+                        binary_file=data_file, start=len(header_line), end=file_size, encoding=encoding
+                    )),
+                    settings.TYPE_INFERENCE_SAMPLE_SIZE
+                ))
+            # byte ranges, each one ending at the end of the line its size limit falls in
+            starts = []
+            ends = []
+            start = len(header_line)
+            while start < file_size:
+                data_file.seek(min(start + settings.INGESTION_CHUNK_BYTES, file_size) - 1)
+                data_file.readline()
+                starts.append(start)
+                ends.append(data_file.tell())
+                start = data_file.tell()
+        types = get_column_types_of_file(
+            headers=headers, sample_rows=sample_rows, column_types=column_types, infer_types=infer_types
+        )
+        print('Column types of ' + target_table_name + ': ' + str(types))
+
+        # workers are spawned (not forked from a process with threads and an open db connection),
+        # and set django up to get their own db connection
+        file_hash = hashlib.sha256()
+        with ProcessPoolExecutor(
+                max_workers=workers,
+                mp_context=multiprocessing.get_context('spawn'),
+                initializer=django.setup
+        ) as pool:
+            # 1. count the records of each range, so that the records of every range can be numbered up front
+            counts = list(pool.map(count_lines_in_range, [source_file_path] * len(starts), starts, ends))
+            count_rows = sum(counts)
+            if max_records is not None and count_rows > max_records:
+                raise ValueError("Number of records in data file exceeds the maximum allowed")
+            first_ids = [1 + first_id for first_id in itertools.accumulate([0] + counts[:-1])]
+            # 2. load the ranges concurrently, and hash the file in the meantime
+            futures = []
+            for i in range(len(starts)):
+                partition_table_name = target_table_name + "_p" + str(i)
+                partition_table_names.append(partition_table_name)
+                futures.append(pool.submit(
+                    copy_range_into_partition,
+                    source_file_path=source_file_path,
+                    start=starts[i],
+                    end=ends[i],
+                    first_id=first_ids[i],
+                    count_lines=counts[i],
+                    partition_table_name=partition_table_name,
+                    headers=headers,
+                    types=types,
+                    encoding=encoding
+                ))
+            try:
+                with source_file_path.open(mode='rb') as data_file:
+                    for block in iter(lambda: data_file.read(settings.INGESTION_READ_BYTES), b''):
+                        file_hash.update(block)
+                for future in futures:
+                    future.result()
+                    print('Loaded a partition of ' + target_table_name)
+            except Exception:
+                # do not load the ranges still waiting, their tables would be dropped anyway
+                for future in futures:
+                    future.cancel()
+                raise
+        if content_hash is not None and file_hash.hexdigest() != content_hash:
+            raise ValueError("Contents of input data file changed since it was hashed")
+
+        # 3. create the partitioned target table, and attach the loaded tables as its partitions
+        with transaction.atomic():
+            cursor.execute(
+                get_create_table_from_file_query(
+                    target_table_name=target_table_name,
+                    headers=headers,
+                    types=types,
+                    table_options=" PARTITION BY RANGE (_id)"
+                ),
+                []
+            )
+            for i in range(len(partition_table_names)):
+                cursor.execute(
+                    "ALTER TABLE " + target_table_name +
+                    " ATTACH PARTITION " + partition_table_names[i] +
+                    " FOR VALUES FROM (" + str(first_ids[i]) + ") TO (" + str(first_ids[i] + counts[i]) + ")",
+                    []
+                )
+            # takes over the indexes of the partitions
+            cursor.execute("CREATE INDEX ON " + target_table_name + " (_id)", [])
+        # attached, so they are dropped with the target table from now on
+        partition_table_names = []
+        print('Loaded ' + str(count_rows) + ' rows into ' + target_table_name)
+        return count_rows, file_hash.hexdigest()
+    except ValueError as err:
+        print(err.args)
+        raise ValueError('Data access exception in create table from file in parallel')
+    finally:
+        for partition_table_name in partition_table_names:
+            cursor.execute("DROP TABLE IF EXISTS " + partition_table_name, [])
+        cursor.close()
+
+
+def create_view_of_dataset(dataset_table_name: str, target_table_name: str):
+    """Create the target as a view of the dataset table, if the dataset table has been ingested already.
+    Returns True if the view was created"""
+    cursor = connection.cursor()
+    try:
+        with transaction.atomic():
+            # the dataset table is created and filled in one transaction, so it is complete if it exists
+            cursor.execute("SELECT to_regclass(%s)", [dataset_table_name])
+            if cursor.fetchone()[0] is None:
+                return False
+            cursor.execute("CREATE VIEW " + target_table_name + " AS TABLE " + dataset_table_name, [])
+            return True
+    except ValueError as err:
+        print(err.args)
+        raise ValueError('Data access exception in create view of dataset')
+    finally:
+        cursor.close()
+
+
+def get_multi_row_insert(table_name: str, columns: list, rows: list):
+    """Statement (query, params) inserting all the rows into the table at once, or None if there are no rows"""
+    if not rows:
+        return None
+    placeholders = "(" + ", ".join(["%s"] * len(columns)) + ")"
+    query_string = "INSERT INTO " + table_name + " (" + ", ".join(columns) + ") VALUES " + \
+                   ", ".join([placeholders] * len(rows))
+    return query_string, [value for row in rows for value in row]
+
+
+def execute_statements(cursor, statements: list):
+    """Send the statements [(query, params), ...] (None ones skipped) to the server in one round trip"""
+    statements = [statement for statement in statements if statement is not None]
+    cursor.execute(
+        ";\n".join(query_string for query_string, params in statements),
+        [param for query_string, params in statements for param in params]
+    )
+
+
+def create_id_index(cursor, table_name: str):
+    """Index the _id column of the table (or of the one table a view selects from), unless it is indexed already"""
+    cursor.execute(
+        "SELECT c.oid, c.relkind, EXISTS (" +
+        " SELECT 1 FROM pg_index i JOIN pg_attribute a ON a.attrelid = i.indrelid AND a.attnum = i.indkey[0]" +
+        " WHERE i.indrelid = c.oid AND a.attname = '_id'" +
+        ") FROM pg_class c WHERE c.oid = to_regclass(%s)",
+        [table_name]
+    )
+    oid, relkind, has_id_index = cursor.fetchone()
+    if relkind == 'v':
+        # the relations the view's rule depends on, other than the view itself
+        cursor.execute(
+            "SELECT DISTINCT d.refobjid::regclass::text FROM pg_rewrite r JOIN pg_depend d ON d.objid = r.oid" +
+            " WHERE r.ev_class = %s AND d.classid = 'pg_rewrite'::regclass AND d.refclassid = 'pg_class'::regclass" +
+            " AND d.refobjid <> r.ev_class",
+            [oid]
+        )
+        base_tables = [row[0] for row in cursor.fetchall()]
+        if len(base_tables) == 1:
+            create_id_index(cursor, table_name=base_tables[0])
+    elif relkind in ('r', 'p') and not has_id_index:
+        cursor.execute("CREATE INDEX ON " + table_name + " (_id)", [])
+
+
+# Global tables of the consolidated job storage (settings.CONSOLIDATED_JOB_STORAGE), by the table of a job they stand in
+# for, with the columns of that table. Every row carries the key of its job (its job prefix table name), by which the
+# tables are hash partitioned, so the number of these tables does not depend on the number of jobs. Queries on them
+# name the job explicitly, with the condition of get_job_key_condition, and insert with get_job_key_column.
+CONSOLIDATED_JOB_TABLES = {
+    "tasks": [
+        "_id integer NOT NULL",
+        "total_assigned integer DEFAULT 0",
+        "abandoned integer DEFAULT 0",
+        "pending_annotations integer DEFAULT 0",
+        "done boolean DEFAULT False",
+        "date_creation TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP",
+    ],
+    "assignments": [
+        "_id integer NOT NULL",
+        "worker_id integer NOT NULL",
+        "status text",
+        "timeout_threshold_at TIMESTAMP WITH TIME ZONE",
+        "completed_at TIMESTAMP WITH TIME ZONE",
+        "abandoned_at TIMESTAMP WITH TIME ZONE",
+        "date_creation TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP",
+        "worker_class varchar(16)",
+    ],
+    "outputs": [
+        "_id integer NOT NULL",
+        "annotation text",
+        "worker_id integer NOT NULL",
+        "date_creation TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP",
+        "worker_class varchar(16)",
+    ],
+    "final_labels": [
+        "_id integer NOT NULL",
+        "label text",
+        "date_creation TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP",
+    ],
+}
+# indexes of the global tables, the counterparts of the indexes do_bookkeeping_3a_kn builds on the tables of a job
+CONSOLIDATED_JOB_INDEXES = {
+    "tasks": [
+        "CREATE UNIQUE INDEX IF NOT EXISTS {table}_key_id ON {table} (job_key, _id)",
+        "CREATE INDEX IF NOT EXISTS {table}_open ON {table} (job_key, _id) WHERE done = False",
+        "CREATE INDEX IF NOT EXISTS {table}_in_progress ON {table} (job_key, (total_assigned - abandoned) DESC, _id) WHERE done = False",
+    ],
+    "assignments": [
+        "CREATE INDEX IF NOT EXISTS {table}_key_id ON {table} (job_key, _id)",
+        "CREATE INDEX IF NOT EXISTS {table}_worker_id ON {table} (job_key, worker_id)",
+        "CREATE INDEX IF NOT EXISTS {table}_status_timeout ON {table} (job_key, status, timeout_threshold_at)",
+    ],
+    "outputs": [
+        "CREATE INDEX IF NOT EXISTS {table}_key_id ON {table} (job_key, _id)",
+        "CREATE INDEX IF NOT EXISTS {table}_worker_id_id ON {table} (job_key, worker_id, _id)",
+    ],
+    "final_labels": [
+        "CREATE INDEX IF NOT EXISTS {table}_key_id ON {table} (job_key, _id)",
+    ],
+}
+
+
+def create_consolidated_job_storage(cursor):
+    """
+    Create the global tables of the consolidated job storage, with their partitions and indexes, unless they exist.
+    Run by the create_shared_tables management command, never while serving requests.
+    """
+    # one process at a time, so that concurrent IF NOT EXISTS cannot collide
+    statements = [("SELECT pg_advisory_xact_lock(hashtext(%s))", ["all_job_tables"])]
+    for table, columns in CONSOLIDATED_JOB_TABLES.items():
+        global_table_name = "all_job_" + table
+        statements.append((
+            "CREATE TABLE IF NOT EXISTS " + global_table_name +
+            " (job_key text NOT NULL, " + ", ".join(columns) + ")" +
+            " PARTITION BY HASH (job_key)",
+            []
+        ))
+        for remainder in range(settings.CONSOLIDATED_JOB_STORAGE_PARTITIONS):
+            statements.append((
+                "CREATE TABLE IF NOT EXISTS " + global_table_name + "_" + str(remainder) +
+                " PARTITION OF " + global_table_name + " FOR VALUES WITH (MODULUS %s, REMAINDER %s)",
+                [settings.CONSOLIDATED_JOB_STORAGE_PARTITIONS, remainder]
+            ))
+        for index_query_string in CONSOLIDATED_JOB_INDEXES[table]:
+            statements.append((index_query_string.format(table=global_table_name), []))
+    execute_statements(cursor, statements=statements)
+
+
+# Whether a job keeps its tasks, assignments, outputs and final labels in the consolidated job storage, keyed by job
+# prefix table name. A job never moves from one storage to the other, so this is looked up once per job and process.
+consolidated_jobs = {}
+consolidated_jobs_lock = threading.Lock()
+
+
+def is_job_in_consolidated_storage(cursor, obj_job: job_components.Job):
+    """
+    Whether the job keeps its rows in the global tables of the consolidated job storage: with
+    settings.CONSOLIDATED_JOB_STORAGE, every job without a tasks table of its own, once the global tables exist
+    (see create_shared_tables).
+    """
+    if not settings.CONSOLIDATED_JOB_STORAGE:
+        return False
+    job_prefix_table_name = get_job_prefix_table_name(obj_job=obj_job)
+    in_consolidated_storage = consolidated_jobs.get(job_prefix_table_name)
+    if in_consolidated_storage is None:
+        cursor.execute(
+            "SELECT to_regclass(%s) IS NULL AND to_regclass(%s) IS NOT NULL",
+            [job_prefix_table_name + "tasks", "all_job_tasks"]
+        )
+        in_consolidated_storage = cursor.fetchone()[0]
+        with consolidated_jobs_lock:
+            consolidated_jobs[job_prefix_table_name] = in_consolidated_storage
+    return in_consolidated_storage
+
+
+def get_job_table_names(cursor, obj_job: job_components.Job, *tables: str):
+    """
+    Names of the given tables of the job (e.g. "tasks", "outputs"). For a job in the consolidated job storage, the
+    tasks, assignments, outputs and final labels are the global tables, holding the rows of every job: queries on them
+    have to be restricted to the job with get_job_key_condition.
+    """
+    job_prefix_table_name = get_job_prefix_table_name(obj_job=obj_job)
+    if any(table in CONSOLIDATED_JOB_TABLES for table in tables) and is_job_in_consolidated_storage(cursor, obj_job):
+        return [
+            "all_job_" + table if table in CONSOLIDATED_JOB_TABLES else job_prefix_table_name + table
+            for table in tables
+        ]
+    return [job_prefix_table_name + table for table in tables]
+
+
+def get_job_table_name(cursor, obj_job: job_components.Job, table: str):
+    """Name of the given table of the job, see get_job_table_names"""
+    return get_job_table_names(cursor, obj_job, table)[0]
+
+
+def get_job_key_condition(cursor, obj_job: job_components.Job, alias: str = None):
+    """
+    Condition restricting a query on the tasks, assignments, outputs or final labels of the job (named by
+    get_job_table_names, aliased as alias if given) to the rows of the job, and its parameters:
+    job_key = %s in the consolidated job storage, true on the tables of the job's own.
+    """
+    if not is_job_in_consolidated_storage(cursor, obj_job):
+        return "true", []
+    return ("" if alias is None else alias + ".") + "job_key = %s", [get_job_prefix_table_name(obj_job=obj_job)]
+
+
+def get_job_key_column(cursor, obj_job: job_components.Job):
+    """
+    Leading column and value placeholder (each followed by a comma, or empty), and parameters, giving the rows inserted
+    into the tasks, assignments, outputs or final labels of the job its key in the consolidated job storage.
+    """
+    if not is_job_in_consolidated_storage(cursor, obj_job):
+        return "", "", []
+    return "job_key, ", "%s, ", [get_job_prefix_table_name(obj_job=obj_job)]
+
+
+def get_job_table_columns(cursor, obj_job: job_components.Job, table: str):
+    """Columns of the table of the job, to select instead of * (the global tables have the job key besides)"""
+    if not is_job_in_consolidated_storage(cursor, obj_job):
+        return "*"
+    return ", ".join(column.split()[0] for column in CONSOLIDATED_JOB_TABLES[table])
+
+
 def do_bookkeeping_3a_kn(
         data_table_name: str,
         instructions: dict,
@@ -354,106 +990,135 @@ def do_bookkeeping_3a_kn(
         aggregated_annotations_table_name: str,
         id_field_name: str=None
 ):
-    """Do some bookkeeping operations for 3a_kn job"""
+    """Do some bookkeeping operations for 3a_kn job.
+    All statements go to the server together in one transaction, so the job is provisioned in a constant number of
+    round trips, however many instructions, layout and config rows it has."""
     cursor = connection.cursor()
     try:
         job_prefix_table_name = get_job_prefix_table_name(obj_job=obj_job)
+        statements = []
 
         # 1. create and populate the parsed instructions, parsed layout, and config in j_instructions, j_layout, and j_config table
         table_instructions = job_prefix_table_name + "worker_instructions"
-        cursor.callproc('create_table_instructions', [table_instructions])
-        for key in instructions.keys():
-            value = instructions.get(key)
-            cursor.execute(
-                "INSERT into " + table_instructions +
-                " (type, content) VALUES (%s, %s)",
-                [key, value]
-            )
+        statements.append(("SELECT create_table_instructions(%s)", [table_instructions]))
+        statements.append(get_multi_row_insert(
+            table_name=table_instructions, columns=["type", "content"], rows=list(instructions.items())
+        ))
         table_layout = job_prefix_table_name + "layout"
-        cursor.callproc('create_table_layout', [table_layout])
-        for key in layout.keys():
-            value = layout.get(key)
-            cursor.execute(
-                "INSERT into " + table_layout +
-                " (type, content) VALUES (%s, %s)",
-                [key, value]
-            )
+        statements.append(("SELECT create_table_layout(%s)", [table_layout]))
+        statements.append(get_multi_row_insert(
+            table_name=table_layout, columns=["type", "content"], rows=list(layout.items())
+        ))
         table_configuration = job_prefix_table_name + "config_parameters"
-        cursor.callproc('create_table_configuration', [table_configuration])
-        for key in configuration.keys():
-            value = configuration.get(key)
-            cursor.execute(
-                "INSERT into " + table_configuration +
-                " (key, value, value_data_type) VALUES (%s, %s, %s)",
-                [key, value, str(type(value))]
-            )
+        statements.append(("SELECT create_table_configuration(%s)", [table_configuration]))
+        statements.append(get_multi_row_insert(
+            table_name=table_configuration,
+            columns=["key", "value", "value_data_type"],
+            rows=[[key, value, str(type(value))] for key, value in configuration.items()]
+        ))
 
         # 2. create empty j_tables
+        # with settings.CONSOLIDATED_JOB_STORAGE, the tasks, assignments, outputs and final labels of the job are its rows
+        # in the global tables instead, which have their defaults and indexes already
+        table_tasks, table_assignments, table_outputs, table_final_labels = get_job_table_names(
+            cursor, obj_job, "tasks", "assignments", "outputs", "final_labels"
+        )
+        own_tables = not is_job_in_consolidated_storage(cursor, obj_job)
+        job_key_column, job_key_value, job_key_parameters = get_job_key_column(cursor, obj_job)
         # create j_tasks table
-        table_tasks = job_prefix_table_name + "tasks"
-        cursor.callproc('create_table_tasks', [table_tasks])
-        # add defaults before insert
-        cursor.execute("ALTER TABLE ONLY " + table_tasks + " ALTER COLUMN total_assigned SET DEFAULT 0", [])
-        cursor.execute("ALTER TABLE ONLY " + table_tasks + " ALTER COLUMN abandoned SET DEFAULT 0", [])
-        cursor.execute("ALTER TABLE ONLY " + table_tasks + " ALTER COLUMN pending_annotations SET DEFAULT 0", [])
-        cursor.execute("ALTER TABLE ONLY " + table_tasks + " ALTER COLUMN done SET DEFAULT False", [])
+        if own_tables:
+            statements.append(("SELECT create_table_tasks(%s)", [table_tasks]))
+            # add defaults before insert
+            statements.append((
+                "ALTER TABLE ONLY " + table_tasks +
+                " ALTER COLUMN total_assigned SET DEFAULT 0, ALTER COLUMN abandoned SET DEFAULT 0," +
+                " ALTER COLUMN pending_annotations SET DEFAULT 0, ALTER COLUMN done SET DEFAULT False",
+                []
+            ))
         # populate j_tasks table
-        cursor.execute(
-            "INSERT INTO " + table_tasks + "(_id) SELECT _id FROM " + data_table_name,
+        statements.append((
+            "INSERT INTO " + table_tasks + "(" + job_key_column + "_id) SELECT " + job_key_value + "_id FROM " + data_table_name,
+            job_key_parameters
+        ))
+        if own_tables:
+            statements.append(("CREATE INDEX " + table_tasks + "_id_done ON " + table_tasks + " (_id, done)", []))
+        # create and populate j_progress table, a single row of counters kept up to date by assign, aggregate and abandon
+        table_progress = job_prefix_table_name + "progress"
+        statements.append((
+            "CREATE TABLE " + table_progress +
+            " (total_tasks integer NOT NULL, done_tasks integer NOT NULL DEFAULT 0, in_progress integer NOT NULL DEFAULT 0)",
             []
-        )
-        # cursor.execute("SELECT _id FROM " + data_table_name, [])
-        # list_ids = cursor.fetchall()
-        # print('data table ids fetched.')
-        #
-        # for id in list_ids:
-        #     cursor.execute(
-        #         "INSERT into " + table_tasks +
-        #         " (_id, total_assigned, abandoned, pending_annotations, done) VALUES (%s, %s, %s, %s, %s)",
-        #         [id, 0, 0, 0, False]
-        #     )
-        cursor.execute("CREATE INDEX " + table_tasks + "_id_done ON " + table_tasks + " (_id, done)")
-        # TODO: date_creation also getting copied here. replace with updated timestamp of copying
+        ))
+        job_rows, job_rows_parameters = get_job_key_condition(cursor, obj_job)
+        statements.append((
+            "INSERT INTO " + table_progress + " (total_tasks) SELECT count(*) FROM " + table_tasks + " WHERE " + job_rows,
+            job_rows_parameters
+        ))
+        if own_tables:
+            # partial index over the open tasks only, so that assignment never walks the done part of the job
+            statements.append(("CREATE INDEX " + table_tasks + "_open ON " + table_tasks + " (_id) WHERE done = False", []))
+            assignment_priority = str(configuration.get('assignment_priority', settings.ASSIGNMENT_PRIORITIES[0])).strip('"')
+            if assignment_priority == settings.ASSIGNMENT_PRIORITIES[1]:    # 'nearly_done'
+                # open tasks by number of votes in progress or submitted, matching the order by of the assignment query
+                statements.append((
+                    "CREATE INDEX " + table_tasks + "_in_progress ON " + table_tasks +
+                    " ((total_assigned - abandoned) DESC, _id) WHERE done = False",
+                    []
+                ))
+        # the tuples are a view of the input instead of a copy of it, so that starting a job does not depend on the size
+        # of its input; the job only ever reads its tuples
         table_tuples = job_prefix_table_name + "tuples"
-        cursor.execute(
-            "CREATE TABLE " +
-            table_tuples +
-            " AS TABLE " +
-            data_table_name,
-            []
-        )
-        cursor.execute(
-            "ALTER TABLE " +
-            table_tuples +
-            " ADD PRIMARY KEY (_id)",
+        statements.append(("CREATE VIEW " + table_tuples + " AS TABLE " + data_table_name, []))
+        if own_tables:
+            # create p1_w1_task_assignments table
+            statements.append(("SELECT create_table_assignments(%s)", [table_assignments]))
+            # worker class (steward or regular) of the worker, stored at assignment time so that no query needs the auth tables
+            statements.append(("ALTER TABLE " + table_assignments + " ADD COLUMN worker_class varchar(16)", []))
+            statements.append((
+                "CREATE INDEX " + table_assignments + "_worker_id ON " + table_assignments + " (worker_id)", []
+            ))
+            # index backing the sweep for pending assignments past their timeout
+            statements.append((
+                "CREATE INDEX " + table_assignments + "_status_timeout ON " + table_assignments + " (status, timeout_threshold_at)",
+                []
+            ))
+
+            # 2. create output B and C tables at the run level
+            # create p1_w1_task_outputs table
+            # table_outputs = annotations_per_tuple_per_worker_table_name
+            statements.append(("SELECT create_table_outputs(%s)", [table_outputs]))
+            # worker class (steward or regular) of the worker, stored at vote time
+            statements.append(("ALTER TABLE " + table_outputs + " ADD COLUMN worker_class varchar(16)", []))
+            # composite index backing the "not yet annotated by this worker" anti-join in assignment
+            statements.append((
+                "CREATE INDEX " + table_outputs + "_worker_id_id ON " + table_outputs + " (worker_id, _id)", []
+            ))
+            # create p1_w1_final_labels table
+            # table_final_labels = aggregated_annotations_table_name
+            statements.append(("SELECT create_table_final_labels(%s)", [table_final_labels]))
+        # create p1_w1_vote_tally table, the number of votes per (task, label, worker class), kept up to date by aggregate
+        table_vote_tally = job_prefix_table_name + "vote_tally"
+        statements.append((
+            "CREATE TABLE " + table_vote_tally +
+            " (_id integer NOT NULL, annotation text NOT NULL, worker_class varchar(16) NOT NULL, n_votes integer NOT NULL DEFAULT 0," +
+            " PRIMARY KEY (_id, worker_class, annotation))",
             []
-        )
-        # create p1_w1_task_assignments table
-        table_assignments = job_prefix_table_name + "assignments"
-        cursor.callproc('create_table_assignments', [table_assignments])
-        cursor.execute("CREATE INDEX " + table_assignments + "_worker_id ON " + table_assignments + " (worker_id)")
-
-        # 2. create output B and C tables at the run level
-        # create p1_w1_task_outputs table
-        # table_outputs = annotations_per_tuple_per_worker_table_name
-        table_outputs = job_prefix_table_name + "outputs"
-        cursor.callproc('create_table_outputs', [table_outputs])
-        cursor.execute("CREATE INDEX " + table_outputs + "_worker_id ON " + table_outputs + " (worker_id)")
-        # create p1_w1_final_labels table
-        # table_final_labels = aggregated_annotations_table_name
-        table_final_labels = job_prefix_table_name + "final_labels"
-        cursor.callproc('create_table_final_labels', [table_final_labels])
+        ))
 
         if id_field_name != None:
             # create a table to store drive-by-curation votes <id_field_name, worker_id, annotation>
             table_drive_by_curation_votes = job_prefix_table_name + "drive_by_curation_votes"
             # the id_field_name should be coming from the variable id_field_name, not hardcoded as string 'id_field_name'
-            cursor.execute(
+            statements.append((
                 "CREATE TABLE " +
                 table_drive_by_curation_votes +
                 f" ({id_field_name} TEXT, worker_id integer, annotation text, date_creation TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP)",
                 []
-            )
+            ))
+        with transaction.atomic():
+            execute_statements(cursor, statements=statements)
+            # the tuples are a view of the input, looked up by the input's index on _id
+            create_id_index(cursor, table_name=data_table_name)
         return
     except ValueError as err:
         print('Data access exception in bookkeeping 3a_kn job')
@@ -558,30 +1223,28 @@ def join_temp_table_with_tuples(obj_job: job_components.Job, id_field_name: str,
         cursor.close()
 
 def export_customized_table(obj_job: job_components.Job, table: str, destination_file_path: Path):
-    """Export the table with the original id field name"""
-    db_params = settings.DATABASES['default']
-    con = psycopg2.connect(
-        database=db_params['NAME'],
-        user=db_params['USER'],
-        password=db_params['PASSWORD'],
-        host=db_params['HOST'],
-        port=db_params['PORT']
-    )
-    cursor = con.cursor()
+    """Export the table of the job (e.g. "assignments") with the original id field name"""
+    cursor = connection.cursor()
     try:
-        job_prefix_table_name = get_job_prefix_table_name(obj_job=obj_job)
-        table_tuples = job_prefix_table_name + "tuples"
+        table_export, table_tuples = get_job_table_names(cursor, obj_job, table, "tuples")
+        job_key_condition, job_key_parameters = get_job_key_condition(cursor, obj_job)
+        # COPY takes no parameters, the driver fills in the job key
+        table_export_rows = cursor.mogrify(
+            "SELECT " + get_job_table_columns(cursor, obj_job, table) + " FROM " + table_export + " WHERE " + job_key_condition,
+            job_key_parameters
+        ).decode()
         custom_query = f"""
             COPY (
             SELECT *
-            FROM {table} AS t
+            FROM ({table_export_rows}) AS t
             INNER JOIN {table_tuples} AS tup USING (_id)
             )
             TO STDOUT WITH CSV HEADER
         """
+        # files of the run directory may be hard links to the uploaded files, replace rather than write through
+        destination_file_path.unlink(missing_ok=True)
         with destination_file_path.open(mode='w') as f:
             cursor.copy_expert(sql=custom_query, file=f)
-            con.commit()
         return
     except ValueError as err:
         print('Data access exception in export customized table')
@@ -604,7 +1267,10 @@ def create_file_from_table(source_table_name: str, destination_file_path: Path):
     try:
         # query = "COPY " + source_table_name + " TO " + "'" + str(destination_file_path) + "'" + " WITH CSV HEADER"
         # cursor.execute(query, [])
-        custom_query = "COPY " + source_table_name + " TO STDOUT WITH CSV HEADER"
+        # a select, so that the source can be a view as well
+        custom_query = "COPY (SELECT * FROM " + source_table_name + ") TO STDOUT WITH CSV HEADER"
+        # files of the run directory may be hard links to the uploaded files, replace rather than write through
+        destination_file_path.unlink(missing_ok=True)
         with destination_file_path.open(mode='w') as f:
             cursor.copy_expert(sql=custom_query, file=f)
             con.commit()
@@ -731,71 +1397,13 @@ def select_candidate(candidate_tasks, k, n):
     return candidate_tasks[0]
 
 
-def assign_3a_kn(worker_id: int, obj_job: job_components.Job, job_k: int, job_n: int, task_annotation_time_limit: int):
-    """Assign task to worker"""
+def assign_3a_kn(worker_id: int, obj_job: job_components.Job, job_k: int, job_n: int, task_annotation_time_limit: int, assignment_priority: str = settings.ASSIGNMENT_PRIORITIES[0]):
+    """Assign task to worker. Returns (task id, tuple row of the task), (0, None) if there was none"""
     cursor = connection.cursor()
     try:
-        with transaction.atomic():
+        with progress_atomic(cursor):
             # This code executes inside a transaction.
-            task = None
-            # while True:
-            #
-            #     # print('worker ', worker_id, ' attempting to get candidate tasks')
-            #     candidate_tasks_for_this_worker = get_candidate_tasks_of_job_for_worker(cursor=cursor, worker_id=worker_id, obj_job=obj_job)
-            #
-            #     if not candidate_tasks_for_this_worker:
-            #         # print('worker ', worker_id, ' did not get any candidate tasks despite some label aggregations remaining')
-            #         print('return No available tasks for you')
-            #         return 0
-            #
-            #     # print('worker ', worker_id, ' selecting candidate task out of candidate tasks based on some criteria')
-            #     # select task out of this
-            #     candidate_task = select_candidate(candidate_tasks_for_this_worker, job_k, job_n)
-            #
-            #     # lock task and see if it is still done
-            #     # print('worker ', worker_id, ' locking candidate task ', candidate_task[0], 'to see if it still done')
-            #     task = lock_task_of_job_for_worker(cursor=cursor, task_id=candidate_task[0], obj_job=obj_job, worker_id=worker_id)
-            #
-            #     # null will be returned from above if the task is not acceptable (i.e. it is already done)
-            #     if not task:
-            #         # print('worker ', worker_id,
-            #         #       ' had to drop candidate task', candidate_task[0], ' because it was already done')
-            #         time.sleep(random.uniform(0, 0.25))  # to prevent too much looping
-            #         continue
-            #     else:
-            #         # this row has been locked, will be released automatically when t is updated
-            #         # print('worker ', worker_id,
-            #         #       ' locked the candidate task', candidate_task[0], ' as the assigned task in tasks table')
-            #         task = task
-            #         break
-            task = get_and_lock_task_of_job_for_worker(cursor=cursor, worker_id=worker_id, obj_job=obj_job)
-            if not task:
-                # print('worker ', worker_id, ' did not get any candidate tasks despite some label aggregations remaining')
-                # either all tasks were done, or all tasks had been annotated by this worker or a combination of the previous two
-                # or some tasks had been locked by other workers (for assign or submit annotation) so this worker skipped over them
-                print('return No available tasks for you')
-                return 0
-
-            task_id = task[0]
-
-            # assign t to w
-            # print('worker ', worker_id, ' getting assignment of ', task_id, ' in assignments table')
-            add_assignment_for_task_in_assign(cursor=cursor, task_id=task_id, obj_job=obj_job, worker_id=worker_id, annotation_time_limit=task_annotation_time_limit)
-
-            #  t.total_assigned++, t.pending_annotation+
-            task_total_assigned = task[1] + 1
-            task_pending_annotations = task[3] + 1
-            task_abandoned = task[2]
-            task_done = task[4]
-            if task_total_assigned - task_abandoned >= job_k:
-                task_done = True
-
-            # this will unlock the task as well
-            # print('worker ', worker_id,
-            #       ' updating task stats', task_id, ' in tasks table and hence, releasing lock on task')
-            update_tasks_for_task_in_assign(cursor=cursor, obj_job=obj_job, task_id=task_id, task_total_assigned=task_total_assigned, task_pending_annotations=task_pending_annotations, task_done=task_done)
-
-            return task_id
+            return assign_task_3a_kn(cursor=cursor, worker_id=worker_id, obj_job=obj_job, job_k=job_k, task_annotation_time_limit=task_annotation_time_limit, assignment_priority=assignment_priority)
 
     except ValueError as err:
         print('Data access exception in assign_3a_kn')
@@ -807,45 +1415,78 @@ def assign_3a_kn(worker_id: int, obj_job: job_components.Job, job_k: int, job_n:
         # break
 
 
-def assign_3a_lm(worker_id: int, obj_job: job_components.Job, job_l: int, job_m: int, task_annotation_time_limit: int):
-    """Assign task to worker"""
-    cursor = connection.cursor()
-    try:
-        with transaction.atomic():
-            task = None
-            task = get_and_lock_task_of_job_for_worker(cursor=cursor, worker_id=worker_id, obj_job=obj_job)
-            if not task:
-                # worker did not get any candidate tasks despite some label aggregations remaining'
-                # either all tasks were done, or all tasks had been annotated by this worker or a combination of the previous two
-                # or some tasks had been locked by other workers (for assign or submit annotation) so this worker skipped over them
-                print('return No available tasks for you')
-                return 0
-
-            # For the steward, I am only concerned about the task id and the done status in the task table
-            task_id = task[0]
-            task_done = task[4]
+def assign_task_3a_kn(cursor, worker_id: int, obj_job: job_components.Job, job_k: int, task_annotation_time_limit: int, assignment_priority: str = settings.ASSIGNMENT_PRIORITIES[0]):
+    """Pick a task for the worker, assign it and fetch its tuple, as part of the caller's transaction.
+    Returns (task id, tuple row of the task), (0, None) if there was none"""
+    assigned = None
+    # while True:
+    #
+    #     # print('worker ', worker_id, ' attempting to get candidate tasks')
+    #     candidate_tasks_for_this_worker = get_candidate_tasks_of_job_for_worker(cursor=cursor, worker_id=worker_id, obj_job=obj_job)
+    #
+    #     if not candidate_tasks_for_this_worker:
+    #         # print('worker ', worker_id, ' did not get any candidate tasks despite some label aggregations remaining')
+    #         print('return No available tasks for you')
+    #         return 0
+    #
+    #     # print('worker ', worker_id, ' selecting candidate task out of candidate tasks based on some criteria')
+    #     # select task out of this
+    #     candidate_task = select_candidate(candidate_tasks_for_this_worker, job_k, job_n)
+    #
+    #     # lock task and see if it is still done
+    #     # print('worker ', worker_id, ' locking candidate task ', candidate_task[0], 'to see if it still done')
+    #     task = lock_task_of_job_for_worker(cursor=cursor, task_id=candidate_task[0], obj_job=obj_job, worker_id=worker_id)
+    #
+    #     # null will be returned from above if the task is not acceptable (i.e. it is already done)
+    #     if not task:
+    #         # print('worker ', worker_id,
+    #         #       ' had to drop candidate task', candidate_task[0], ' because it was already done')
+    #         time.sleep(random.uniform(0, 0.25))  # to prevent too much looping
+    #         continue
+    #     else:
+    #         # this row has been locked, will be released automatically when t is updated
+    #         # print('worker ', worker_id,
+    #         #       ' locked the candidate task', candidate_task[0], ' as the assigned task in tasks table')
+    #         task = task
+    #         break
+    if assignment_priority == settings.ASSIGNMENT_PRIORITIES[0]:    # 'fifo'
+        # the ready queue hands out tasks in the order of their ids
+        assigned = get_and_lock_task_from_ready_queue(
+            cursor=cursor,
+            worker_id=worker_id,
+            obj_job=obj_job,
+            lock_task=lambda task_id: assign_and_fetch_task_for_worker(
+                cursor=cursor, worker_id=worker_id, obj_job=obj_job, task_annotation_time_limit=task_annotation_time_limit, job_k=job_k, task_id=task_id
+            )
+        )
+    if not assigned:
+        # none of the queued candidates worked out for this worker, so scan the tasks table
+        assigned = assign_and_fetch_task_for_worker(
+            cursor=cursor, worker_id=worker_id, obj_job=obj_job, task_annotation_time_limit=task_annotation_time_limit, job_k=job_k, assignment_priority=assignment_priority
+        )
+    if not assigned:
+        # print('worker ', worker_id, ' did not get any candidate tasks despite some label aggregations remaining')
+        # either all tasks were done, or all tasks had been annotated by this worker or a combination of the previous two
+        # or some tasks had been locked by other workers (for assign or submit annotation) so this worker skipped over them
+        print('return No available tasks for you')
+        return 0, None
 
-            # assign t to w
-            # print('worker ', worker_id, ' getting assignment of ', task_id, ' in assignments table')
-            add_assignment_for_task_in_assign(cursor=cursor, task_id=task_id, obj_job=obj_job, worker_id=worker_id, annotation_time_limit=task_annotation_time_limit)
+    # t was assigned to w, with t.total_assigned++, t.pending_annotation++ and t.done if k are now in progress
+    tuple_row, task_done = assigned
+    task_id = tuple_row['_id']
+    if not task_done:
+        # task still needs more workers, offer it to the next worker first
+        requeue_task(obj_job=obj_job, task_id=task_id)
 
-            #  Since it is a steward, we don't change these values since they are relevant for regular workers.
-            task_total_assigned = task[1]
-            task_pending_annotations = task[3] 
-            task_abandoned = task[2]
-            
-            # Instead of having and comparing fields like total_assigned and abandoned for steward workers, we check based on the number of active assignments by stewards in assignments table.
-            task_active_assignments_by_stewards = get_active_assignments_by_stewards(cursor=cursor, task_id=task_id, obj_job=obj_job)
-            # assignments in progress for this task, by stewards
-            if task_active_assignments_by_stewards >= job_l:
-                task_done = True
+    return task_id, tuple_row
 
-            # this will unlock the task as well
-            # print('worker ', worker_id,
-            #       ' updating task stats', task_id, ' in tasks table and hence, releasing lock on task')
-            update_tasks_for_task_in_assign(cursor=cursor, obj_job=obj_job, task_id=task_id, task_total_assigned=task_total_assigned, task_pending_annotations=task_pending_annotations, task_done=task_done)
 
-            return task_id
+def assign_3a_lm(worker_id: int, obj_job: job_components.Job, job_l: int, job_m: int, task_annotation_time_limit: int, assignment_priority: str = settings.ASSIGNMENT_PRIORITIES[0]):
+    """Assign task to steward. Returns (task id, tuple row of the task), (0, None) if there was none"""
+    cursor = connection.cursor()
+    try:
+        with progress_atomic(cursor):
+            return assign_task_3a_lm(cursor=cursor, worker_id=worker_id, obj_job=obj_job, job_l=job_l, task_annotation_time_limit=task_annotation_time_limit, assignment_priority=assignment_priority)
 
     except ValueError as err:
         print('Data access exception in assign_3a_knm')
@@ -857,204 +1498,1025 @@ def assign_3a_lm(worker_id: int, obj_job: job_components.Job, job_l: int, job_m:
         # break
 
 
-def get_and_lock_task_of_job_for_worker(
-        cursor,
-        worker_id: int,
-        obj_job: job_components.Job
-):
-    """Get task and lock it"""
-    job_prefix_table_name = get_job_prefix_table_name(obj_job=obj_job)
-
-    # create j_tasks table
-    table_tasks = job_prefix_table_name + "tasks"
-    table_outputs = job_prefix_table_name + "outputs"
+def assign_task_3a_lm(cursor, worker_id: int, obj_job: job_components.Job, job_l: int, task_annotation_time_limit: int, assignment_priority: str = settings.ASSIGNMENT_PRIORITIES[0]):
+    """Pick a task for the steward, assign it and fetch its tuple, as part of the caller's transaction.
+    Returns (task id, tuple row of the task), (0, None) if there was none"""
+    assigned = None
+    if assignment_priority == settings.ASSIGNMENT_PRIORITIES[0]:    # 'fifo'
+        # the ready queue hands out tasks in the order of their ids
+        assigned = get_and_lock_task_from_ready_queue(
+            cursor=cursor,
+            worker_id=worker_id,
+            obj_job=obj_job,
+            lock_task=lambda task_id: assign_and_fetch_task_for_worker(
+                cursor=cursor, worker_id=worker_id, obj_job=obj_job, task_annotation_time_limit=task_annotation_time_limit, job_l=job_l, task_id=task_id
+            )
+        )
+    if not assigned:
+        # none of the queued candidates worked out for this worker, so scan the tasks table
+        assigned = assign_and_fetch_task_for_worker(
+            cursor=cursor, worker_id=worker_id, obj_job=obj_job, task_annotation_time_limit=task_annotation_time_limit, job_l=job_l, assignment_priority=assignment_priority
+        )
+    if not assigned:
+        # worker did not get any candidate tasks despite some label aggregations remaining'
+        # either all tasks were done, or all tasks had been annotated by this worker or a combination of the previous two
+        # or some tasks had been locked by other workers (for assign or submit annotation) so this worker skipped over them
+        print('return No available tasks for you')
+        return 0, None
 
-    # print('worker ', worker_id, ' querying tasks not annotated by him which are not done yet')
-    cursor.execute(
-        "SELECT _id, total_assigned, abandoned, pending_annotations, done, date_creation FROM " +
-        # "SELECT * FROM " +
-        table_tasks +
-        " WHERE done = %s AND _id NOT IN " +
-        "(SELECT _id FROM " +
-        table_outputs +
-        # " WHERE worker_id = %s) LIMIT 1 FOR UPDATE OF TABLE " + table_tasks,    # fastest possible serial execution of workers picking up tasks
-        " WHERE worker_id = %s) LIMIT 1 FOR UPDATE OF " + table_tasks + " SKIP LOCKED",    # truly parallel execution of workers picking up tasks parallely
-        [False, worker_id]
-    )
-    task = cursor.fetchone()
+    # t was assigned to the steward. Since it is a steward, total_assigned, pending_annotations and abandoned
+    # (relevant for regular workers) stay as they are, t is done once l stewards have active assignments for it
+    tuple_row, task_done = assigned
+    task_id = tuple_row['_id']
+    if not task_done:
+        # task still needs more workers, offer it to the next worker first
+        requeue_task(obj_job=obj_job, task_id=task_id)
 
-    return task
+    return task_id, tuple_row
 
 
-def get_candidate_tasks_of_job_for_worker(
+def assign_and_fetch_task_for_worker(
         cursor,
         worker_id: int,
-        obj_job: job_components.Job     # ,
-        # tasks_already_annotated_by_worker: list
+        obj_job: job_components.Job,
+        task_annotation_time_limit: int,
+        job_k: int = None,
+        job_l: int = None,
+        task_id: int = None,
+        assignment_priority: str = settings.ASSIGNMENT_PRIORITIES[0]
 ):
-    """Get candidate tasks"""
+    """
+    Lock a task for the worker, assign it, update the task and return the tuple of the task, all in one statement
+    (as part of the caller's transaction), and move the progress counters.
+    The task is task_id (e.g. a candidate from the ready queue) if given, else the first one as per the assignment priority policy.
+    With job_k, the assignment counts towards the k votes of the task (regular workers). With job_l, the task is done once
+    l stewards have active assignments for it (stewards).
+    Returns (tuple row of the task, whether the task is done now), None if no task could be locked
+    """
+    order_by = ASSIGNMENT_PRIORITY_ORDER_BY.get(assignment_priority)
+    if order_by is None:
+        raise ValueError('Unknown assignment priority', assignment_priority)
     job_prefix_table_name = get_job_prefix_table_name(obj_job=obj_job)
-
-    # create j_tasks table
-    table_tasks = job_prefix_table_name + "tasks"
-    table_outputs = job_prefix_table_name + "outputs"
-
-    # tasks_already_annotated_by_worker_string: str = ""
-    # if len(tasks_already_annotated_by_worker) > 0:
-    #     for x in tasks_already_annotated_by_worker:
-    #         tasks_already_annotated_by_worker_string = tasks_already_annotated_by_worker_string + str(x) + ", "
-    #     tasks_already_annotated_by_worker_string = tasks_already_annotated_by_worker_string[:-2]
-    # else:
-    #     # since the NOT IN () brackets cannot be left empty by syntax, put in an impossible value here
-    #     # -1 is impossible for _id column
-    #     tasks_already_annotated_by_worker_string = "-1"
-    # # print(tasks_already_annotated_by_worker_string)
-
-    # print('worker ', worker_id, ' querying tasks not annotated by him which are not done yet')
+    table_tasks, table_outputs, table_assignments = get_job_table_names(cursor, obj_job, "tasks", "outputs", "assignments")
+    table_tuples = job_prefix_table_name + "tuples"
+    worker_class = get_worker_class(worker_id=worker_id)
+    tasks_of_job, job_key_parameters = get_job_key_condition(cursor, obj_job, alias="T")
+    outputs_of_job = get_job_key_condition(cursor, obj_job, alias="O")[0]
+    steward_assignments_of_job = get_job_key_condition(cursor, obj_job, alias="S")[0]
+    job_key_column, job_key_value = get_job_key_column(cursor, obj_job)[:2]
+
+    candidate_condition = ""
+    candidate_parameters = []
+    if task_id is not None:
+        candidate_condition = " AND T._id = %s"
+        candidate_parameters = [task_id]
+    if job_l is None:
+        # t.total_assigned++, t.pending_annotation++, and t.done if k are now in progress
+        set_tasks = "total_assigned = T.total_assigned + 1, pending_annotations = T.pending_annotations + 1," + \
+                    " done = (T.total_assigned + 1 - T.abandoned >= %s)"
+        set_tasks_parameters = [job_k]
+    else:
+        # active assignments by stewards as of before this statement, plus this one if the worker is a steward
+        set_tasks = "done = ((SELECT count(*) FROM " + table_assignments + " S" + \
+                    " WHERE " + steward_assignments_of_job + " AND S._id = T._id AND S.worker_class = %s AND S.status IN (%s, %s)) + %s >= %s)"
+        set_tasks_parameters = job_key_parameters + [
+            UserType.STEWARD.value,
+            settings.ASSIGNMENT_STATUS[0],  # 'PENDING_ANNOTATION'
+            settings.ASSIGNMENT_STATUS[1],  # 'COMPLETED'
+            1 if worker_class == UserType.STEWARD.value else 0,
+            job_l
+        ]
     cursor.execute(
-        "SELECT _id, total_assigned, abandoned, pending_annotations, done, date_creation FROM " +
-        table_tasks +
-        " WHERE done = %s AND _id NOT IN " +
-        "(SELECT _id FROM " +
-        table_outputs +
-        " WHERE worker_id = %s) LIMIT 1",   # FOR SHARE SKIP LOCKED",
-        [False, worker_id]
-        #
-        # " WHERE done = %s AND _id NOT IN " +
-        # "(" +
-        # tasks_already_annotated_by_worker_string +
-        # ") ",
-        # [False]
+        "WITH LOCKED AS (" +
+        "SELECT T._id FROM " + table_tasks + " T" +
+        " WHERE " + tasks_of_job + " AND T.done = %s" + candidate_condition + " AND NOT EXISTS " +
+        "(SELECT 1 FROM " + table_outputs + " O WHERE " + outputs_of_job + " AND O.worker_id = %s AND O._id = T._id)" +
+        " ORDER BY " + order_by +
+        " LIMIT 1 FOR UPDATE OF T SKIP LOCKED" +
+        "), ASSIGNED AS (" +
+        "INSERT INTO " + table_assignments + " (" + job_key_column + "_id, worker_id, timeout_threshold_at, status, worker_class)" +
+        " SELECT " + job_key_value + "_id, %s, %s, %s, %s FROM LOCKED RETURNING _id" +
+        "), UPDATED AS (" +
+        "UPDATE " + table_tasks + " T SET " + set_tasks +
+        " FROM ASSIGNED A WHERE " + tasks_of_job + " AND T._id = A._id RETURNING T._id, T.done" +
+        ")" +
+        " SELECT U.done AS _done, D.* FROM UPDATED U JOIN " + table_tuples + " D ON D._id = U._id",
+        job_key_parameters + [False] + candidate_parameters + job_key_parameters + [worker_id] +
+        job_key_parameters + [
+            worker_id,
+            datetime.utcnow().replace(tzinfo=pytz.UTC) + timedelta(seconds=task_annotation_time_limit),
+            settings.ASSIGNMENT_STATUS[0],  # 'PENDING_ANNOTATION'
+            worker_class
+        ] +
+        set_tasks_parameters + job_key_parameters
     )
-    candidate_tasks_for_this_worker = cursor.fetchall()
-    # print(candidate_tasks_for_this_worker)
+    tuple_row = dict_fetchone(cursor)
+    if tuple_row is None:
+        return None
+    task_done = tuple_row.pop('_done')
+    update_progress(cursor=cursor, obj_job=obj_job, in_progress_delta=1)
+    return tuple_row, task_done
 
-    return candidate_tasks_for_this_worker
 
+def lease_3a_kn(worker_id: int, obj_job: job_components.Job, job_k: int, job_n: int, task_annotation_time_limit: int, lease_size: int, assignment_priority: str = settings.ASSIGNMENT_PRIORITIES[0]):
+    """Assign up to lease_size tasks to worker at once, all expiring together"""
+    cursor = connection.cursor()
+    try:
+        with progress_atomic(cursor):
+            tasks = get_and_lock_tasks_of_job_for_worker(
+                cursor=cursor,
+                worker_id=worker_id,
+                obj_job=obj_job,
+                count_tasks=lease_size,
+                assignment_priority=assignment_priority
+            )
+            if not tasks:
+                # either all tasks were done, or all tasks had been annotated by this worker or a combination of the previous two
+                # or some tasks had been locked by other workers (for assign or submit annotation) so this worker skipped over them
+                return []
 
-def lock_task_of_job_for_worker(cursor, task_id: int, obj_job: job_components.Job, worker_id: int):
-    """Lock task"""
-    job_prefix_table_name = get_job_prefix_table_name(obj_job=obj_job)
-    # create j_tasks table
-    table_tasks = job_prefix_table_name + "tasks"
-    cursor.execute(
-        "SELECT _id, total_assigned, abandoned, pending_annotations, done, date_creation FROM " +
-        table_tasks +
-        " WHERE _id = %s AND done = %s " +
-        "FOR UPDATE" +
-        " SKIP LOCKED",
-        [task_id, False]
-    )
-    task = cursor.fetchone()
-    return task
+            task_ids = [task[0] for task in tasks]
 
+            # assign t to w, for every leased t
+            add_assignments_for_tasks_in_assign(cursor=cursor, task_ids=task_ids, obj_job=obj_job, worker_id=worker_id, annotation_time_limit=task_annotation_time_limit)
 
-def add_assignment_for_task_in_assign(
-        cursor,
-        task_id: int,
-        obj_job: job_components.Job,
-        worker_id: int,
-        annotation_time_limit: int
-):
-    """Store the worker-task assignment in db"""
-    job_prefix_table_name = get_job_prefix_table_name(obj_job=obj_job)
-    table_assignments = job_prefix_table_name + "assignments"
-    # add entry to table_assignments
-    cursor.execute(
-        "INSERT into " + table_assignments +
-        " (_id, worker_id, timeout_threshold_at, status) VALUES (%s, %s, %s, %s)",
-        [
-            task_id,
-            worker_id,
-            datetime.utcnow().replace(tzinfo=pytz.UTC) + timedelta(seconds=annotation_time_limit),
-            settings.ASSIGNMENT_STATUS[0]   # 'PENDING_ANNOTATION'
-        ]
-    )
-    return
+            # t.total_assigned++, t.pending_annotation++ and t.done if k are now in progress, for every leased t
+            # (this will unlock the tasks as well)
+            table_tasks = get_job_table_name(cursor, obj_job, "tasks")
+            job_rows, job_key_parameters = get_job_key_condition(cursor, obj_job)
+            cursor.execute(
+                "UPDATE " + table_tasks +
+                " SET total_assigned = total_assigned + 1, pending_annotations = pending_annotations + 1," +
+                " done = (total_assigned + 1 - abandoned >= %s) WHERE " + job_rows + " AND _id = ANY(%s) RETURNING _id, done",
+                [job_k] + job_key_parameters + [task_ids]
+            )
+            for task_id, task_done in cursor.fetchall():
+                if not task_done:
+                    # task still needs more workers, offer it to the next worker first
+                    requeue_task(obj_job=obj_job, task_id=task_id)
 
+            return task_ids
 
-def get_qualifying_annotation_for_task(cursor, task_id: int, obj_job: job_components.Job, worker_type: UserType, threshold: int):
-    """Get qualifying annotation for a task filtered by worker type (steward or regular)"""
+    except ValueError as err:
+        print('Data access exception in lease_3a_kn')
+        print(err.args)
+        raise
+
+    finally:
+        cursor.close()
+
+
+def lease_3a_lm(worker_id: int, obj_job: job_components.Job, job_l: int, job_m: int, task_annotation_time_limit: int, lease_size: int, assignment_priority: str = settings.ASSIGNMENT_PRIORITIES[0]):
+    """Assign up to lease_size tasks to steward at once, all expiring together"""
+    cursor = connection.cursor()
+    try:
+        with progress_atomic(cursor):
+            tasks = get_and_lock_tasks_of_job_for_worker(
+                cursor=cursor,
+                worker_id=worker_id,
+                obj_job=obj_job,
+                count_tasks=lease_size,
+                assignment_priority=assignment_priority
+            )
+            if not tasks:
+                return []
+
+            task_ids = [task[0] for task in tasks]
+
+            # assign t to w, for every leased t
+            add_assignments_for_tasks_in_assign(cursor=cursor, task_ids=task_ids, obj_job=obj_job, worker_id=worker_id, annotation_time_limit=task_annotation_time_limit)
+
+            # Since it is a steward, only done changes, based on the number of active assignments by stewards
+            # (the ones just added included), for every leased task in one statement
+            table_tasks, table_assignments = get_job_table_names(cursor, obj_job, "tasks", "assignments")
+            tasks_of_job, job_key_parameters = get_job_key_condition(cursor, obj_job, alias="T")
+            steward_assignments_of_job = get_job_key_condition(cursor, obj_job, alias="S")[0]
+            cursor.execute(
+                "UPDATE " + table_tasks + " T SET done = ((SELECT count(*) FROM " + table_assignments + " S" +
+                " WHERE " + steward_assignments_of_job + " AND S._id = T._id AND S.worker_class = %s AND S.status IN (%s, %s)) >= %s)" +
+                " WHERE " + tasks_of_job + " AND T._id = ANY(%s) RETURNING T._id, T.done",
+                job_key_parameters + [
+                    UserType.STEWARD.value,
+                    settings.ASSIGNMENT_STATUS[0],  # 'PENDING_ANNOTATION'
+                    settings.ASSIGNMENT_STATUS[1],  # 'COMPLETED'
+                    job_l
+                ] + job_key_parameters + [task_ids]
+            )
+            for task_id, task_done in sorted(cursor.fetchall()):
+                if not task_done:
+                    requeue_task(obj_job=obj_job, task_id=task_id)
+
+            return task_ids
+
+    except ValueError as err:
+        print('Data access exception in lease_3a_lm')
+        print(err.args)
+        raise
+
+    finally:
+        cursor.close()
+
+
+def submit_batch_3a_kn(obj_job: job_components.Job, worker_id: int, job_k: int, job_n: int, answers: dict, worker_type: UserType = None):
+    """Record and aggregate the votes of a worker on the leased tasks (task id -> answer), in one transaction.
+    worker_type is set for 3a_knlm jobs, where only the votes of regular workers count towards k of n.
+    Returns the task ids whose votes got recorded, i.e. whose assignment had not been abandoned meanwhile."""
+    cursor = connection.cursor()
+    try:
+        with progress_atomic(cursor):
+            recorded_task_ids = []
+            # always lock tasks in the same order, so that concurrent batches cannot deadlock
+            for task_id in sorted(answers.keys()):
+                already_abandoned = complete_assignment_in_aggregate(cursor=cursor, obj_job=obj_job, task_id=task_id, worker_id=worker_id)
+                if already_abandoned:
+                    continue
+                if worker_type == UserType.REGULAR:
+                    record_vote_and_aggregate_for_regular_workers(cursor=cursor, obj_job=obj_job, task_id=task_id, worker_id=worker_id, job_k=job_k, job_n=job_n, answer=answers[task_id])
+                else:
+                    record_vote_and_aggregate_3a_kn(cursor=cursor, obj_job=obj_job, task_id=task_id, worker_id=worker_id, job_k=job_k, job_n=job_n, answer=answers[task_id])
+                recorded_task_ids.append(task_id)
+            return recorded_task_ids
+
+    except ValueError as err:
+        print('Data access exception in submit_batch_3a_kn')
+        print(err.args)
+        raise
+
+    finally:
+        cursor.close()
+
+
+def submit_batch_3a_lm(obj_job: job_components.Job, worker_id: int, job_l: int, job_m: int, answers: dict):
+    """Record and aggregate the votes of a steward on the leased tasks (task id -> answer), in one transaction.
+    Returns the task ids whose votes got recorded, i.e. whose assignment had not been abandoned meanwhile."""
+    cursor = connection.cursor()
+    try:
+        with progress_atomic(cursor):
+            recorded_task_ids = []
+            # always lock tasks in the same order, so that concurrent batches cannot deadlock
+            for task_id in sorted(answers.keys()):
+                already_abandoned = complete_assignment_in_aggregate(cursor=cursor, obj_job=obj_job, task_id=task_id, worker_id=worker_id)
+                if already_abandoned:
+                    continue
+                record_vote_and_aggregate_for_steward_workers(cursor=cursor, obj_job=obj_job, task_id=task_id, worker_id=worker_id, job_l=job_l, job_m=job_m, answer=answers[task_id])
+                recorded_task_ids.append(task_id)
+            return recorded_task_ids
+
+    except ValueError as err:
+        print('Data access exception in submit_batch_3a_lm')
+        print(err.args)
+        raise
+
+    finally:
+        cursor.close()
+
+
+def submit_and_assign_3a_kn(
+        obj_job: job_components.Job,
+        worker_id: int,
+        task_id: int,
+        job_k: int,
+        job_n: int,
+        answer: str,
+        task_annotation_time_limit: int,
+        assignment_priority: str = settings.ASSIGNMENT_PRIORITIES[0],
+        worker_type: UserType = None
+):
+    """Record and aggregate the vote of a worker, then assign the next task and fetch its tuple, in one transaction,
+    which updates the progress counters last, once it holds the locks of both halves.
+    worker_type is set for 3a_knlm jobs, where only the votes of regular workers count towards k of n.
+    Returns (next task id, tuple row of the next task): (-1, None) once all tasks have final labels,
+    (0, None) if no task is available for this worker at the moment."""
+    cursor = connection.cursor()
+    try:
+        with progress_atomic(cursor):
+            already_abandoned = complete_assignment_in_aggregate(cursor=cursor, obj_job=obj_job, task_id=task_id, worker_id=worker_id)
+            if not already_abandoned:
+                if worker_type == UserType.REGULAR:
+                    record_vote_and_aggregate_for_regular_workers(cursor=cursor, obj_job=obj_job, task_id=task_id, worker_id=worker_id, job_k=job_k, job_n=job_n, answer=answer)
+                else:
+                    record_vote_and_aggregate_3a_kn(cursor=cursor, obj_job=obj_job, task_id=task_id, worker_id=worker_id, job_k=job_k, job_n=job_n, answer=answer)
+            if all_tasks_have_final_labels(cursor=cursor, obj_job=obj_job):
+                # job is no more collecting annotations for any tasks
+                return -1, None
+            # the tuple of the next task comes back with its assignment
+            return assign_task_3a_kn(cursor=cursor, worker_id=worker_id, obj_job=obj_job, job_k=job_k, task_annotation_time_limit=task_annotation_time_limit, assignment_priority=assignment_priority)
+
+    except ValueError as err:
+        print('Data access exception in submit_and_assign_3a_kn')
+        print(err.args)
+        raise
+
+    finally:
+        cursor.close()
+
+
+def submit_and_assign_3a_lm(
+        obj_job: job_components.Job,
+        worker_id: int,
+        task_id: int,
+        job_l: int,
+        job_m: int,
+        answer: str,
+        task_annotation_time_limit: int,
+        assignment_priority: str = settings.ASSIGNMENT_PRIORITIES[0]
+):
+    """Record and aggregate the vote of a steward, then assign the next task and fetch its tuple, in one transaction,
+    which updates the progress counters last, once it holds the locks of both halves.
+    Returns (next task id, tuple row of the next task): (-1, None) once all tasks have final labels,
+    (0, None) if no task is available for this steward at the moment."""
+    cursor = connection.cursor()
+    try:
+        with progress_atomic(cursor):
+            already_abandoned = complete_assignment_in_aggregate(cursor=cursor, obj_job=obj_job, task_id=task_id, worker_id=worker_id)
+            if not already_abandoned:
+                record_vote_and_aggregate_for_steward_workers(cursor=cursor, obj_job=obj_job, task_id=task_id, worker_id=worker_id, job_l=job_l, job_m=job_m, answer=answer)
+            if all_tasks_have_final_labels(cursor=cursor, obj_job=obj_job):
+                # job is no more collecting annotations for any tasks
+                return -1, None
+            # the tuple of the next task comes back with its assignment
+            return assign_task_3a_lm(cursor=cursor, worker_id=worker_id, obj_job=obj_job, job_l=job_l, task_annotation_time_limit=task_annotation_time_limit, assignment_priority=assignment_priority)
+
+    except ValueError as err:
+        print('Data access exception in submit_and_assign_3a_lm')
+        print(err.args)
+        raise
+
+    finally:
+        cursor.close()
+
+
+# Order in which open tasks are offered to workers, per assignment priority policy
+ASSIGNMENT_PRIORITY_ORDER_BY = {
+    # oldest task first
+    settings.ASSIGNMENT_PRIORITIES[0]: "T._id",     # 'fifo'
+    # tasks with the most votes in progress or submitted first, so that they get their final labels early
+    # (the enabled version of select_candidate), backed by the _in_progress index of the tasks table
+    settings.ASSIGNMENT_PRIORITIES[1]: "(T.total_assigned - T.abandoned) DESC, T._id",    # 'nearly_done'
+}
+
+# Worker class under which the votes of 3a_kn jobs are tallied, as k-of-n does not tell regular workers and stewards apart
+VOTE_TALLY_ALL_WORKERS = 'all'
+
+
+def get_and_lock_task_of_job_for_worker(
+        cursor,
+        worker_id: int,
+        obj_job: job_components.Job,
+        assignment_priority: str = settings.ASSIGNMENT_PRIORITIES[0]
+):
+    """Get task (the first one as per the assignment priority policy) and lock it"""
+    tasks = get_and_lock_tasks_of_job_for_worker(
+        cursor=cursor,
+        worker_id=worker_id,
+        obj_job=obj_job,
+        count_tasks=1,
+        assignment_priority=assignment_priority
+    )
+    task = tasks[0] if tasks else None
+
+    return task
+
+
+def get_and_lock_tasks_of_job_for_worker(
+        cursor,
+        worker_id: int,
+        obj_job: job_components.Job,
+        count_tasks: int,
+        assignment_priority: str = settings.ASSIGNMENT_PRIORITIES[0]
+):
+    """Get up to count_tasks tasks (the first ones as per the assignment priority policy) and lock them"""
+    order_by = ASSIGNMENT_PRIORITY_ORDER_BY.get(assignment_priority)
+    if order_by is None:
+        raise ValueError('Unknown assignment priority', assignment_priority)
+
+    # create j_tasks table
+    table_tasks, table_outputs = get_job_table_names(cursor, obj_job, "tasks", "outputs")
+    tasks_of_job, job_key_parameters = get_job_key_condition(cursor, obj_job, alias="T")
+    outputs_of_job = get_job_key_condition(cursor, obj_job, alias="O")[0]
+
+    # print('worker ', worker_id, ' querying tasks not annotated by him which are not done yet')
+    # NOT EXISTS is planned as an anti-join probing the (worker_id, _id) index on outputs per candidate task,
+    # whereas NOT IN (subquery) materializes all outputs of the worker and falls back to a full scan of tasks.
+    cursor.execute(
+        "SELECT T._id, T.total_assigned, T.abandoned, T.pending_annotations, T.done, T.date_creation FROM " +
+        table_tasks + " T" +
+        " WHERE " + tasks_of_job + " AND T.done = %s AND NOT EXISTS " +
+        "(SELECT 1 FROM " +
+        table_outputs + " O" +
+        # " WHERE O.worker_id = %s AND O._id = T._id) LIMIT %s FOR UPDATE OF T",    # fastest possible serial execution of workers picking up tasks
+        " WHERE " + outputs_of_job + " AND O.worker_id = %s AND O._id = T._id)" +
+        " ORDER BY " + order_by +
+        " LIMIT %s FOR UPDATE OF T SKIP LOCKED",    # truly parallel execution of workers picking up tasks parallely
+        job_key_parameters + [False] + job_key_parameters + [worker_id, count_tasks]
+    )
+    tasks = cursor.fetchall()
+
+    return tasks
+
+
+def get_candidate_tasks_of_job_for_worker(
+        cursor,
+        worker_id: int,
+        obj_job: job_components.Job     # ,
+        # tasks_already_annotated_by_worker: list
+):
+    """Get candidate tasks"""
+
+    # create j_tasks table
+    table_tasks, table_outputs = get_job_table_names(cursor, obj_job, "tasks", "outputs")
+    tasks_of_job, job_key_parameters = get_job_key_condition(cursor, obj_job, alias="T")
+    outputs_of_job = get_job_key_condition(cursor, obj_job, alias="O")[0]
+
+    # tasks_already_annotated_by_worker_string: str = ""
+    # if len(tasks_already_annotated_by_worker) > 0:
+    #     for x in tasks_already_annotated_by_worker:
+    #         tasks_already_annotated_by_worker_string = tasks_already_annotated_by_worker_string + str(x) + ", "
+    #     tasks_already_annotated_by_worker_string = tasks_already_annotated_by_worker_string[:-2]
+    # else:
+    #     # since the NOT IN () brackets cannot be left empty by syntax, put in an impossible value here
+    #     # -1 is impossible for _id column
+    #     tasks_already_annotated_by_worker_string = "-1"
+    # # print(tasks_already_annotated_by_worker_string)
+
+    # print('worker ', worker_id, ' querying tasks not annotated by him which are not done yet')
+    cursor.execute(
+        "SELECT T._id, T.total_assigned, T.abandoned, T.pending_annotations, T.done, T.date_creation FROM " +
+        table_tasks + " T" +
+        " WHERE " + tasks_of_job + " AND T.done = %s AND NOT EXISTS " +
+        "(SELECT 1 FROM " +
+        table_outputs + " O" +
+        " WHERE " + outputs_of_job + " AND O.worker_id = %s AND O._id = T._id) LIMIT 1",   # FOR SHARE SKIP LOCKED",
+        job_key_parameters + [False] + job_key_parameters + [worker_id]
+        #
+        # " WHERE done = %s AND _id NOT IN " +
+        # "(" +
+        # tasks_already_annotated_by_worker_string +
+        # ") ",
+        # [False]
+    )
+    candidate_tasks_for_this_worker = cursor.fetchall()
+    # print(candidate_tasks_for_this_worker)
+
+    return candidate_tasks_for_this_worker
+
+
+def lock_task_of_job_for_worker(cursor, task_id: int, obj_job: job_components.Job, worker_id: int):
+    """Lock task, if it is not done and not yet annotated by this worker"""
+    # create j_tasks table
+    table_tasks, table_outputs = get_job_table_names(cursor, obj_job, "tasks", "outputs")
+    tasks_of_job, job_key_parameters = get_job_key_condition(cursor, obj_job, alias="T")
+    outputs_of_job = get_job_key_condition(cursor, obj_job, alias="O")[0]
+    cursor.execute(
+        "SELECT T._id, T.total_assigned, T.abandoned, T.pending_annotations, T.done, T.date_creation FROM " +
+        table_tasks + " T" +
+        " WHERE " + tasks_of_job + " AND T._id = %s AND T.done = %s AND NOT EXISTS " +
+        "(SELECT 1 FROM " +
+        table_outputs + " O" +
+        " WHERE " + outputs_of_job + " AND O.worker_id = %s AND O._id = T._id) " +
+        "FOR UPDATE OF T" +
+        " SKIP LOCKED",
+        job_key_parameters + [task_id, False] + job_key_parameters + [worker_id]
+    )
+    task = cursor.fetchone()
+    return task
+
+
+# Process local ready queues of the running jobs, keyed by job prefix table name.
+# The tasks table stays the source of truth, so a queue can always be rebuilt from it (e.g. after a restart).
+ready_queues = {}
+ready_queues_lock = threading.Lock()
+
+
+def get_ready_queue(obj_job: job_components.Job):
+    """Get the ready queue of this job, creating an empty one on first use"""
     job_prefix_table_name = get_job_prefix_table_name(obj_job=obj_job)
-    table_outputs = job_prefix_table_name + "outputs"
-    
-    worker_type_name = worker_type.value
-    
-    cursor.execute(f"""
-        SELECT VOTES_PER_ANNOTATION.annotation 
-        FROM ( 
-            SELECT TASK_ANNOTATIONS.annotation, count(*) AS n_votes 
-            FROM ( 
-                SELECT O._id, O.worker_id, O.annotation 
-                FROM {table_outputs} O
-                INNER JOIN auth_user_groups AUG ON O.worker_id = AUG.user_id
-                INNER JOIN auth_group AG ON AUG.group_id = AG.id
-                WHERE O._id = %s 
-                AND AG.name = %s
-            ) AS TASK_ANNOTATIONS 
-            GROUP BY TASK_ANNOTATIONS.annotation 
-        ) AS VOTES_PER_ANNOTATION 
-        WHERE VOTES_PER_ANNOTATION.n_votes >= %s
-        """,
-        [task_id, worker_type_name, threshold]
+    ready_queue = ready_queues.get(job_prefix_table_name)
+    if ready_queue is None:
+        with ready_queues_lock:
+            ready_queue = ready_queues.setdefault(job_prefix_table_name, job_components.ReadyQueue())
+    return ready_queue
+
+
+def discard_ready_queue(obj_job: job_components.Job):
+    """Forget the ready queue of this job, e.g. once the job is completed"""
+    job_prefix_table_name = get_job_prefix_table_name(obj_job=obj_job)
+    with ready_queues_lock:
+        ready_queues.pop(job_prefix_table_name, None)
+
+
+def refill_ready_queue(cursor, obj_job: job_components.Job, ready_queue: job_components.ReadyQueue):
+    """Rebuild the ready queue of this job from the next batch of open tasks in the tasks table"""
+    # only one thread refills, the others go on with whatever is in the queue (or fall back to scanning)
+    if not ready_queue.lock.acquire(blocking=False):
+        return
+    try:
+        if ready_queue.date_refill is None or time.monotonic() - ready_queue.date_refill > settings.READY_QUEUE_REFRESH_INTERVAL:
+            # start over from the beginning of the job, to pick up tasks that got reopened meanwhile
+            ready_queue.last_task_id = 0
+        table_tasks = get_job_table_name(cursor, obj_job, "tasks")
+        job_rows, job_key_parameters = get_job_key_condition(cursor, obj_job)
+        cursor.execute(
+            "SELECT _id FROM " +
+            table_tasks +
+            " WHERE " + job_rows + " AND done = %s AND _id > %s ORDER BY _id LIMIT %s",
+            job_key_parameters + [False, ready_queue.last_task_id, settings.READY_QUEUE_REFILL_SIZE]
+        )
+        task_ids = [row[0] for row in cursor.fetchall()]
+        if len(task_ids) < settings.READY_QUEUE_REFILL_SIZE:
+            ready_queue.last_task_id = 0    # reached the end of the job, wrap around on the next refill
+        else:
+            ready_queue.last_task_id = task_ids[-1]
+        ready_queue.task_ids.clear()
+        ready_queue.push_back(task_ids)
+        ready_queue.date_refill = time.monotonic()
+    finally:
+        ready_queue.lock.release()
+    return
+
+
+def get_and_lock_task_from_ready_queue(cursor, worker_id: int, obj_job: job_components.Job, lock_task=None):
+    """
+    Get task from the ready queue of this job and lock it. None if no candidate in the queue could be locked.
+    lock_task(task_id) tries a candidate (e.g. locks and assigns it), returning None if it did not work out;
+    lock_task_of_job_for_worker by default
+    """
+    if lock_task is None:
+        lock_task = lambda task_id: lock_task_of_job_for_worker(cursor=cursor, task_id=task_id, obj_job=obj_job, worker_id=worker_id)
+    ready_queue = get_ready_queue(obj_job=obj_job)
+    if ready_queue.is_stale(refresh_interval=settings.READY_QUEUE_REFRESH_INTERVAL):
+        refill_ready_queue(cursor=cursor, obj_job=obj_job, ready_queue=ready_queue)
+
+    task = None
+    skipped_task_ids = []
+    for attempt in range(settings.READY_QUEUE_MAX_ATTEMPTS):
+        task_id = ready_queue.pop()
+        if task_id is None:
+            break
+        task = lock_task(task_id)
+        if task:
+            break
+        # the candidate is done, locked by another worker or already annotated by this worker.
+        # keep it for the other workers, the next refill drops it if it is done.
+        skipped_task_ids.append(task_id)
+    ready_queue.push_front(skipped_task_ids)
+    return task
+
+
+def requeue_task(obj_job: job_components.Job, task_id: int):
+    """Put task at the front of this job's ready queue since it is (again) open for assignment"""
+    # processes not assigning tasks of this job (e.g. the task monitor) have no queue to put it in
+    ready_queue = ready_queues.get(get_job_prefix_table_name(obj_job=obj_job))
+    if ready_queue is not None:
+        ready_queue.push_front([task_id])
+    return
+
+
+# Process local versions of task availability of the running jobs, keyed by job prefix table name.
+# A listener thread bumps the version of a job on every notification of the tasks available channel,
+# and wakes the work requests parked in wait_for_available_tasks.
+task_availability = threading.Condition()
+task_availability_versions = {}
+job_notification_listener = None
+
+
+def notify_tasks_available(cursor, obj_job: job_components.Job):
+    """Announce that a task of this job is open for assignment again, once the caller's transaction commits"""
+    job_prefix_table_name = get_job_prefix_table_name(obj_job=obj_job)
+    cursor.execute(
+        "SELECT pg_notify(%s, %s)",
+        [settings.TASKS_AVAILABLE_CHANNEL, job_prefix_table_name]
     )
-    return cursor.fetchone()
+    return
 
-def get_total_annotations_for_task(cursor, task_id: int, obj_job: job_components.Job, worker_type: UserType):
-    """Get total annotations for a task filtered by worker type (steward or regular)"""
+
+def get_task_availability_version(obj_job: job_components.Job):
+    """Version of task availability of this job, to be taken before trying to assign so that no notification is missed"""
+    start_job_notification_listener()
     job_prefix_table_name = get_job_prefix_table_name(obj_job=obj_job)
-    table_outputs = job_prefix_table_name + "outputs"
-    
-    worker_type_name = worker_type.value
-    
-    cursor.execute(f"""
-        SELECT COUNT(*) AS total_annotations
-        FROM {table_outputs} O
-        INNER JOIN auth_user_groups AUG ON O.worker_id = AUG.user_id
-        INNER JOIN auth_group AG ON AUG.group_id = AG.id
-        WHERE O._id = %s 
-        AND AG.name = %s
-        """,
-        [task_id, worker_type_name]
+    with task_availability:
+        return task_availability_versions.get(job_prefix_table_name, 0)
+
+
+def wait_for_available_tasks(obj_job: job_components.Job, version: int, timeout: float):
+    """Wait until a task of this job becomes available after the given version, or the timeout. Returns False on timeout"""
+    job_prefix_table_name = get_job_prefix_table_name(obj_job=obj_job)
+    with task_availability:
+        return task_availability.wait_for(
+            lambda: task_availability_versions.get(job_prefix_table_name, 0) != version,
+            timeout=timeout
+        )
+
+
+# Process local contexts of the jobs this process serves annotations for, keyed by composite id of the job.
+# A context is dropped whenever the status of its job changes, in this process right away
+# and in every process through the job status channel (see listen_for_job_notifications).
+job_contexts = {}
+job_contexts_lock = threading.Lock()
+job_contexts_generation = 0     # bumped on every drop, so that a context loaded meanwhile is not cached
+
+
+def get_job_context(job_id: int, run_id: int, workflow_id: int, project_id: int, user_id: int):
+    """Return the context of the specified job, loading it from the db only if this process has no fresh one cached"""
+    start_job_notification_listener()
+    key = job_helper_functions.get_job_key(user_id=user_id, project_id=project_id, workflow_id=workflow_id, run_id=run_id, job_id=job_id)
+    job_context = job_contexts.get(key)
+    if job_context is not None and not job_context.is_stale(time_to_live=settings.JOB_CONTEXT_CACHE_TTL):
+        return job_context
+    generation = job_contexts_generation
+    obj_job: job_components.Job = find_job(
+        job_id=job_id,
+        run_id=run_id,
+        workflow_id=workflow_id,
+        project_id=project_id,
+        user_id=user_id
+    )
+    if obj_job is None:
+        return None
+    add_worker_class_columns(obj_job=obj_job)
+    add_progress_table(obj_job=obj_job)
+    add_vote_tally_table(obj_job=obj_job)
+    job_context = job_components.JobContext(
+        job=obj_job,
+        instructions=get_instructions(
+            requester_id=user_id, project_id=project_id, workflow_id=workflow_id, run_id=run_id, job_id=job_id
+        ),
+        layout=get_layout(
+            requester_id=user_id, project_id=project_id, workflow_id=workflow_id, run_id=run_id, job_id=job_id
+        ),
+        configuration=get_configuration(
+            requester_id=user_id, project_id=project_id, workflow_id=workflow_id, run_id=run_id, job_id=job_id
+        ),
+        count_tasks=get_count_tasks(obj_job=obj_job)
+    )
+    with job_contexts_lock:
+        if generation == job_contexts_generation:
+            job_contexts[key] = job_context
+    return job_context
+
+
+def forget_job_context(key: str):
+    """Drop the cached context of the job with this composite id, e.g. since its status changed"""
+    global job_contexts_generation
+    with job_contexts_lock:
+        job_contexts_generation += 1
+        job_contexts.pop(key, None)
+
+
+def notify_job_status_changed(cursor, obj_job: job_components.Job):
+    """Drop the cached context of this job, and announce the status change to the other processes once the caller's transaction commits"""
+    key = job_helper_functions.get_job_key(
+        user_id=obj_job.user_id, project_id=obj_job.project_id, workflow_id=obj_job.workflow_id, run_id=obj_job.run_id, job_id=obj_job.id
     )
-    return cursor.fetchone()
+    forget_job_context(key=key)
+    cursor.execute("SELECT pg_notify(%s, %s)", [settings.JOB_STATUS_CHANNEL, key])
+    return
+
 
-def get_active_assignments_by_stewards(cursor, task_id: int, obj_job: job_components.Job):
-    """Get active assignments (pending or completed) for this task, by stewards"""
-    
+def start_job_notification_listener():
+    """Start the listener thread of this process, on first use"""
+    global job_notification_listener
+    with task_availability:
+        if job_notification_listener is None:
+            job_notification_listener = threading.Thread(target=listen_for_job_notifications, daemon=True)
+            job_notification_listener.start()
+
+
+def listen_for_job_notifications():
+    """
+    LISTEN on the tasks available and job status channels on a connection of its own,
+    to wake the waiting work requests and drop the cached contexts of jobs whose status changed
+    """
+    global job_contexts_generation
+    while True:
+        try:
+            cursor = connection.cursor()
+            cursor.execute("LISTEN " + settings.TASKS_AVAILABLE_CHANNEL)
+            cursor.execute("LISTEN " + settings.JOB_STATUS_CHANNEL)
+            cursor.close()
+            # notifications sent while this thread was not listening are lost, so start over with no cached context
+            with job_contexts_lock:
+                job_contexts_generation += 1
+                job_contexts.clear()
+            pg_connection = connection.connection
+            while True:
+                if select.select([pg_connection], [], [], 60) == ([], [], []):
+                    continue
+                pg_connection.poll()
+                job_prefix_table_names = set()
+                while pg_connection.notifies:
+                    notify = pg_connection.notifies.pop(0)
+                    if notify.channel == settings.JOB_STATUS_CHANNEL:
+                        forget_job_context(key=notify.payload)
+                    else:
+                        job_prefix_table_names.add(notify.payload)
+                if not job_prefix_table_names:
+                    continue
+                with task_availability:
+                    for job_prefix_table_name in job_prefix_table_names:
+                        task_availability_versions[job_prefix_table_name] = task_availability_versions.get(job_prefix_table_name, 0) + 1
+                    task_availability.notify_all()
+        except Exception as err:
+            print('Data access exception in listen for job notifications')
+            print(err.args)
+            connection.close()
+            time.sleep(1)
+
+
+# Moves of the progress counters in the current progress_atomic transaction of this thread, by job prefix table name.
+# They are applied as the last statements of the transaction, after every task and assignment row it locks, so that no
+# transaction waits for a task or assignment lock while holding the single progress row of a job (which would deadlock
+# with one locking them the other way round), and the progress row is held only from the end of a transaction to its commit.
+pending_progress = threading.local()
+
+
+@contextmanager
+def progress_atomic(cursor):
+    """transaction.atomic(), updating the progress counters moved in it (by update_progress) last"""
+    if getattr(pending_progress, 'deltas', None) is not None:
+        # nested in another one, which updates them
+        with transaction.atomic():
+            yield
+        return
+    with transaction.atomic():
+        pending_progress.deltas = {}
+        try:
+            yield
+            # in the order of the jobs, should a transaction ever move the counters of several jobs
+            for job_prefix_table_name, (done_tasks_delta, in_progress_delta) in sorted(pending_progress.deltas.items()):
+                execute_update_progress(cursor, job_prefix_table_name, done_tasks_delta, in_progress_delta)
+        finally:
+            pending_progress.deltas = None
+
+
+def update_progress(cursor, obj_job: job_components.Job, done_tasks_delta: int = 0, in_progress_delta: int = 0):
+    """Move the progress counters of the job, at the end of the caller's progress_atomic transaction (or right away
+    outside of one)"""
     job_prefix_table_name = get_job_prefix_table_name(obj_job=obj_job)
-    table_assignments = job_prefix_table_name + "assignments"
-    
-    steward_group_name = UserType.STEWARD.value
-    
-    cursor.execute(f"""
-        SELECT COUNT(*) AS active_assignments
-        FROM {table_assignments} A
-        INNER JOIN auth_user_groups AUG ON A.worker_id = AUG.user_id
-        INNER JOIN auth_group AG ON AUG.group_id = AG.id
-        WHERE A._id = %s 
-        AND AG.name = %s
-        AND (A.status = %s OR A.status = %s)
-        """,
-        [task_id, steward_group_name, settings.ASSIGNMENT_STATUS[0], settings.ASSIGNMENT_STATUS[1]]
+    deltas = getattr(pending_progress, 'deltas', None)
+    if deltas is None:
+        execute_update_progress(cursor, job_prefix_table_name, done_tasks_delta, in_progress_delta)
+        return
+    pending_done_tasks_delta, pending_in_progress_delta = deltas.get(job_prefix_table_name, (0, 0))
+    deltas[job_prefix_table_name] = (pending_done_tasks_delta + done_tasks_delta, pending_in_progress_delta + in_progress_delta)
+    return
+
+
+def get_pending_progress(obj_job: job_components.Job):
+    """Moves (done_tasks_delta, in_progress_delta) of the progress counters of the job not yet applied in this transaction"""
+    deltas = getattr(pending_progress, 'deltas', None) or {}
+    return deltas.get(get_job_prefix_table_name(obj_job=obj_job), (0, 0))
+
+
+def execute_update_progress(cursor, job_prefix_table_name: str, done_tasks_delta: int, in_progress_delta: int):
+    if done_tasks_delta == 0 and in_progress_delta == 0:
+        return
+    table_progress = job_prefix_table_name + "progress"
+    cursor.execute(
+        "UPDATE " + table_progress +
+        " SET done_tasks = done_tasks + %s, in_progress = in_progress + %s",
+        [done_tasks_delta, in_progress_delta]
+    )
+
+
+def add_assignments_for_tasks_in_assign(
+        cursor,
+        task_ids: list,
+        obj_job: job_components.Job,
+        worker_id: int,
+        annotation_time_limit: int
+):
+    """Store the worker-task assignments of a lease in db, all with the same timeout"""
+    table_assignments = get_job_table_name(cursor, obj_job, "assignments")
+    job_key_column, job_key_value, job_key_parameters = get_job_key_column(cursor, obj_job)
+    # add entries to table_assignments, in one statement
+    cursor.execute(
+        "INSERT into " + table_assignments +
+        " (" + job_key_column + "_id, worker_id, timeout_threshold_at, status, worker_class)" +
+        " SELECT " + job_key_value + "unnest(%s::integer[]), %s, %s, %s, %s",
+        job_key_parameters + [
+            task_ids,
+            worker_id,
+            datetime.utcnow().replace(tzinfo=pytz.UTC) + timedelta(seconds=annotation_time_limit),
+            settings.ASSIGNMENT_STATUS[0],  # 'PENDING_ANNOTATION'
+            get_worker_class(worker_id=worker_id)
+        ]
     )
-    active_assignments_by_stewards = cursor.fetchone()[0]
-    return active_assignments_by_stewards
+    update_progress(cursor=cursor, obj_job=obj_job, in_progress_delta=len(task_ids))
+    return
 
 
-def update_tasks_for_task_in_assign(cursor, obj_job: job_components.Job, task_id: int, task_total_assigned: int, task_pending_annotations:int, task_done: bool):
-    """Update tasks table"""
+def tally_vote(cursor, obj_job: job_components.Job, task_id: int, annotation: str, worker_class: str):
+    """Count one more vote for the (task, label, worker class), as part of the caller's transaction"""
     job_prefix_table_name = get_job_prefix_table_name(obj_job=obj_job)
-    table_tasks = job_prefix_table_name + "tasks"
-    # update table_tasks with these new values
+    table_vote_tally = job_prefix_table_name + "vote_tally"
     cursor.execute(
-        "UPDATE " + table_tasks +
-        " SET total_assigned = %s , pending_annotations = %s, done = %s WHERE _id = %s",
-        [task_total_assigned, task_pending_annotations, task_done, task_id]
+        "INSERT INTO " + table_vote_tally +
+        " AS V (_id, annotation, worker_class, n_votes) VALUES (%s, %s, %s, 1)" +
+        " ON CONFLICT (_id, worker_class, annotation) DO UPDATE SET n_votes = V.n_votes + 1",
+        [task_id, annotation, worker_class]
     )
     return
 
 
+def get_leading_annotation_for_task(cursor, task_id: int, obj_job: job_components.Job, worker_class: str = None):
+    """
+    Get the label with the most votes for a task, its number of votes and the total number of votes on the task,
+    from the vote tally. Counts the votes of the given worker class only, or of every worker class if none is given.
+    """
+    job_prefix_table_name = get_job_prefix_table_name(obj_job=obj_job)
+    table_vote_tally = job_prefix_table_name + "vote_tally"
+    worker_class_condition = ""
+    parameters = [task_id]
+    if worker_class is not None:
+        worker_class_condition = " AND worker_class = %s"
+        parameters.append(worker_class)
+    cursor.execute(
+        "SELECT annotation, sum(n_votes) AS n_votes, sum(sum(n_votes)) OVER () AS n_task_annotations FROM " +
+        table_vote_tally +
+        " WHERE _id = %s" + worker_class_condition +
+        " GROUP BY annotation ORDER BY n_votes DESC, annotation LIMIT 1",
+        parameters
+    )
+    leading_annotation_row = cursor.fetchone()
+    if not leading_annotation_row:
+        return None, 0, 0
+    return leading_annotation_row[0], int(leading_annotation_row[1]), int(leading_annotation_row[2])
+
+
+def get_worker_class(worker_id: int):
+    """Worker class (steward or regular) of this worker, from the process wide role cache"""
+    return UserType.from_user_id(worker_id).value
+
+
+# Jobs whose assignments and outputs tables are known (in this process) to have the worker_class column,
+# keyed by job prefix table name. Jobs started before the column existed get it on first use, see add_worker_class_columns.
+jobs_with_worker_class = set()
+jobs_with_worker_class_lock = threading.Lock()
+
+
+def add_worker_class_columns(obj_job: job_components.Job):
+    """
+    Add the worker_class column to the assignments and outputs tables of a job started before the column existed,
+    filled in from the auth tables for the rows already there. Checked once per job and process, against the catalog
+    only, so that the tables are altered (and locked) only when the column is missing.
+    """
+    job_prefix_table_name = get_job_prefix_table_name(obj_job=obj_job)
+    if job_prefix_table_name in jobs_with_worker_class:
+        return
+    cursor = connection.cursor()
+    try:
+        with transaction.atomic():
+            table_assignments, table_outputs = get_job_table_names(cursor, obj_job, "assignments", "outputs")
+            for table in [table_assignments, table_outputs]:
+                cursor.execute(
+                    "SELECT EXISTS (SELECT 1 FROM pg_attribute" +
+                    " WHERE attrelid = to_regclass(%s) AND attname = 'worker_class' AND NOT attisdropped)",
+                    [table]
+                )
+                if cursor.fetchone()[0]:
+                    continue
+                print('Adding worker_class to ' + table + ' of a job started before it existed')
+                cursor.execute("ALTER TABLE " + table + " ADD COLUMN IF NOT EXISTS worker_class varchar(16)", [])
+                cursor.execute(
+                    "UPDATE " + table + " T SET worker_class = CASE WHEN EXISTS (" +
+                    " SELECT 1 FROM auth_user_groups INNER JOIN auth_group ON auth_user_groups.group_id = auth_group.id" +
+                    " WHERE auth_user_groups.user_id = T.worker_id AND auth_group.name = %s) THEN %s ELSE %s END",
+                    [UserType.STEWARD.value, UserType.STEWARD.value, UserType.REGULAR.value]
+                )
+        with jobs_with_worker_class_lock:
+            jobs_with_worker_class.add(job_prefix_table_name)
+    except ValueError as err:
+        print('Data access exception in add worker class columns')
+        print(err.args)
+        raise
+
+    finally:
+        cursor.close()
+
+
+# Jobs known (in this process) to have their progress table, keyed by job prefix table name. Jobs started before the
+# progress counters existed get the table on first use, see add_progress_table.
+jobs_with_progress = set()
+jobs_with_progress_lock = threading.Lock()
+
+
+def add_progress_table(obj_job: job_components.Job):
+    """
+    Create the progress table of a job started before the progress counters existed, filled in from the tasks, final
+    labels and pending assignments of the job. Checked once per job and process, against the catalog only.
+    """
+    job_prefix_table_name = get_job_prefix_table_name(obj_job=obj_job)
+    if job_prefix_table_name in jobs_with_progress:
+        return
+    cursor = connection.cursor()
+    try:
+        with transaction.atomic():
+            table_progress = job_prefix_table_name + "progress"
+            cursor.execute("SELECT to_regclass(%s) IS NULL", [table_progress])
+            missing = cursor.fetchone()[0]
+            if missing:
+                # one process at a time, the others find the table once the first one commits
+                cursor.execute("SELECT pg_advisory_xact_lock(hashtext(%s))", [table_progress])
+                cursor.execute("SELECT to_regclass(%s) IS NULL", [table_progress])
+                missing = cursor.fetchone()[0]
+            if missing:
+                print('Adding ' + table_progress + ' to a job started before it existed')
+                table_tasks, table_assignments, table_final_labels = get_job_table_names(
+                    cursor, obj_job, "tasks", "assignments", "final_labels"
+                )
+                job_rows, job_key_parameters = get_job_key_condition(cursor, obj_job)
+                cursor.execute(
+                    "CREATE TABLE " + table_progress +
+                    " (total_tasks integer NOT NULL, done_tasks integer NOT NULL DEFAULT 0, in_progress integer NOT NULL DEFAULT 0)",
+                    []
+                )
+                cursor.execute(
+                    "INSERT INTO " + table_progress + " (total_tasks, done_tasks, in_progress) SELECT" +
+                    " (SELECT count(*) FROM " + table_tasks + " WHERE " + job_rows + ")," +
+                    " (SELECT count(*) FROM " + table_final_labels + " WHERE " + job_rows + ")," +
+                    " (SELECT count(*) FROM " + table_assignments + " WHERE " + job_rows + " AND status = %s)",
+                    job_key_parameters + job_key_parameters + job_key_parameters + [
+                        settings.ASSIGNMENT_STATUS[0]      # 'PENDING_ANNOTATION'
+                    ]
+                )
+        with jobs_with_progress_lock:
+            jobs_with_progress.add(job_prefix_table_name)
+    except ValueError as err:
+        print('Data access exception in add progress table')
+        print(err.args)
+        raise
+
+    finally:
+        cursor.close()
+
+
+# Jobs known (in this process) to have their vote tally, keyed by job prefix table name. Jobs started before the vote
+# tally existed get it on first use, see add_vote_tally_table.
+jobs_with_vote_tally = set()
+jobs_with_vote_tally_lock = threading.Lock()
+
+
+def add_vote_tally_table(obj_job: job_components.Job):
+    """
+    Create the vote tally of a job started before the vote tally existed, filled in from the votes already in its
+    outputs, so that aggregation counts them too. Checked once per job and process, against the catalog only.
+    """
+    job_prefix_table_name = get_job_prefix_table_name(obj_job=obj_job)
+    if job_prefix_table_name in jobs_with_vote_tally:
+        return
+    # the votes of 3a_knlm jobs are tallied by the worker class stored with them
+    add_worker_class_columns(obj_job=obj_job)
+    cursor = connection.cursor()
+    try:
+        with transaction.atomic():
+            table_vote_tally = job_prefix_table_name + "vote_tally"
+            cursor.execute("SELECT to_regclass(%s) IS NULL", [table_vote_tally])
+            missing = cursor.fetchone()[0]
+            if missing:
+                # one process at a time, the others find the table once the first one commits
+                cursor.execute("SELECT pg_advisory_xact_lock(hashtext(%s))", [table_vote_tally])
+                cursor.execute("SELECT to_regclass(%s) IS NULL", [table_vote_tally])
+                missing = cursor.fetchone()[0]
+            if missing:
+                print('Adding ' + table_vote_tally + ' to a job started before it existed')
+                table_outputs = get_job_table_name(cursor, obj_job, "outputs")
+                job_rows, job_key_parameters = get_job_key_condition(cursor, obj_job)
+                cursor.execute(
+                    "CREATE TABLE " + table_vote_tally +
+                    " (_id integer NOT NULL, annotation text NOT NULL, worker_class varchar(16) NOT NULL, n_votes integer NOT NULL DEFAULT 0," +
+                    " PRIMARY KEY (_id, worker_class, annotation))",
+                    []
+                )
+                if obj_job.name == settings.HUMAN_OPERATORS[0]:    # '3a_kn'
+                    worker_class_parameters = [VOTE_TALLY_ALL_WORKERS]
+                else:
+                    worker_class_parameters = [None]
+                cursor.execute(
+                    "INSERT INTO " + table_vote_tally + " (_id, annotation, worker_class, n_votes)" +
+                    " SELECT _id, annotation, coalesce(%s, worker_class) AS tally_worker_class, count(*) FROM " + table_outputs +
+                    " WHERE " + job_rows + " AND annotation IS NOT NULL" +
+                    " GROUP BY _id, annotation, tally_worker_class",
+                    worker_class_parameters + job_key_parameters
+                )
+        with jobs_with_vote_tally_lock:
+            jobs_with_vote_tally.add(job_prefix_table_name)
+    except ValueError as err:
+        print('Data access exception in add vote tally table')
+        print(err.args)
+        raise
+
+    finally:
+        cursor.close()
+
+
+def get_vote_tally_worker_class(obj_job: job_components.Job, worker_id: int):
+    """Worker class under which the votes of this worker are tallied in this job"""
+    if obj_job.name == settings.HUMAN_OPERATORS[0]:    # '3a_kn'
+        return VOTE_TALLY_ALL_WORKERS
+    return get_worker_class(worker_id=worker_id)
+
+
 def get_data_headers_for_job(obj_job: job_components.Job):
     """Get all headers (except _id and date_creation) for this 3a_kn job"""
     cursor = connection.cursor()
@@ -1082,24 +2544,163 @@ def get_data_headers_for_job(obj_job: job_components.Job):
 def get_data_row_for_job(obj_job: job_components.Job, tuple_id: int):
     """Get a particular data row for this 3a_kn job"""
     cursor = connection.cursor()
+    try:
+        return fetch_data_row_for_job(cursor=cursor, obj_job=obj_job, tuple_id=tuple_id)
+    except ValueError as err:
+        print('Data access exception in get data row for job')
+        print(err.args)
+    finally:
+        cursor.close()
+
+
+def fetch_data_row_for_job(cursor, obj_job: job_components.Job, tuple_id: int):
+    """Get a particular data row for this 3a_kn job, with the given cursor"""
+    job_prefix_table_name = get_job_prefix_table_name(obj_job=obj_job)
+    table_tuples = job_prefix_table_name + "tuples"
+    cursor.execute(
+        "SELECT * FROM " +
+        table_tuples +
+        " WHERE _id = %s",
+        [tuple_id]
+    )
+    tuple_row = dict_fetchone(cursor)
+    return tuple_row
+
+
+def get_data_row_with_representation_for_job(obj_job: job_components.Job, tuple_id: int):
+    """
+    Get a particular data row for this 3a_kn job, along with its pre-rendered question (_question)
+    and representation (_representation), in one indexed read
+    """
+    cursor = connection.cursor()
     try:
         job_prefix_table_name = get_job_prefix_table_name(obj_job=obj_job)
         table_tuples = job_prefix_table_name + "tuples"
+        table_representations = job_prefix_table_name + "representations"
         cursor.execute(
-            "SELECT * FROM " +
-            table_tuples +
-            " WHERE _id = %s",
+            "SELECT T.*, R.question AS _question, R.representation AS _representation FROM " +
+            table_tuples + " AS T JOIN " + table_representations + " AS R ON R._id = T._id" +
+            " WHERE T._id = %s",
             [tuple_id]
         )
         tuple_row = dict_fetchone(cursor)
         return tuple_row
     except ValueError as err:
-        print('Data access exception in get data row for job')
+        print('Data access exception in get data row with representation for job')
+        print(err.args)
+    finally:
+        cursor.close()
+
+
+def prerender_representations(
+        obj_job: job_components.Job,
+        compiled_layout: job_components.CompiledLayout,
+        table_tuples_suffix: str = "tuples",
+        table_representations_suffix: str = "representations"
+):
+    """
+    Create the representations table of this job, and fill it with the question and layout rendered for each tuple,
+    one batch of tuples at a time. Returns the count of tuples rendered
+    """
+    cursor = connection.cursor()
+    count_rendered: int = 0
+    try:
+        with transaction.atomic():
+            job_prefix_table_name = get_job_prefix_table_name(obj_job=obj_job)
+            table_tuples = job_prefix_table_name + table_tuples_suffix
+            table_representations = job_prefix_table_name + table_representations_suffix
+            cursor.execute(
+                "CREATE TABLE " + table_representations +
+                " AS SELECT _id, NULL::text AS question, NULL::text AS representation FROM " + table_tuples +
+                " WITH NO DATA",
+                []
+            )
+            cursor.execute("ALTER TABLE " + table_representations + " ADD PRIMARY KEY (_id)", [])
+            last_tuple_id = None
+            while True:
+                # keyset pagination over the tuples, so that only one batch is held in memory
+                if last_tuple_id is None:
+                    cursor.execute(
+                        "SELECT * FROM " + table_tuples + " ORDER BY _id LIMIT %s",
+                        [settings.PRERENDER_BATCH_SIZE]
+                    )
+                else:
+                    cursor.execute(
+                        "SELECT * FROM " + table_tuples + " WHERE _id > %s ORDER BY _id LIMIT %s",
+                        [last_tuple_id, settings.PRERENDER_BATCH_SIZE]
+                    )
+                tuple_rows = dict_fetchall(cursor)
+                if not tuple_rows:
+                    break
+                values = []
+                for tuple_row in tuple_rows:
+                    header_value_dict = compiled_layout.get_header_value_dict(tuple_row=tuple_row)
+                    values.extend([
+                        tuple_row['_id'],
+                        compiled_layout.render_question(header_value_dict=header_value_dict),
+                        compiled_layout.render_representation(header_value_dict=header_value_dict)
+                    ])
+                cursor.execute(
+                    "INSERT INTO " + table_representations + " (_id, question, representation) VALUES " +
+                    ", ".join(["(%s, %s, %s)"] * len(tuple_rows)),
+                    values
+                )
+                count_rendered = count_rendered + len(tuple_rows)
+                last_tuple_id = tuple_rows[-1]['_id']
+        return count_rendered
+    except ValueError as err:
+        print('Data access exception in prerender representations')
         print(err.args)
+        raise
     finally:
         cursor.close()
 
 
+def has_representations(obj_job: job_components.Job, table_representations_suffix: str = "representations"):
+    """Whether the representations of this job were pre-rendered"""
+    cursor = connection.cursor()
+    try:
+        job_prefix_table_name = get_job_prefix_table_name(obj_job=obj_job)
+        cursor.execute("SELECT to_regclass(%s) IS NOT NULL", [job_prefix_table_name + table_representations_suffix])
+        return cursor.fetchone()[0]
+    except ValueError as err:
+        print('Data access exception in has representations')
+        print(err.args)
+    finally:
+        cursor.close()
+
+
+def get_representations_for_job_in_batches(obj_job: job_components.Job, batch_size: int, table_representations_suffix: str = "representations"):
+    """Yield the pre-rendered representations of this job in batches of (at most) batch_size rows, in order of _id"""
+    job_prefix_table_name = get_job_prefix_table_name(obj_job=obj_job)
+    table_representations = job_prefix_table_name + table_representations_suffix
+    last_tuple_id = None
+    while True:
+        cursor = connection.cursor()
+        try:
+            if last_tuple_id is None:
+                cursor.execute(
+                    "SELECT _id, question, representation FROM " + table_representations + " ORDER BY _id LIMIT %s",
+                    [batch_size]
+                )
+            else:
+                cursor.execute(
+                    "SELECT _id, question, representation FROM " + table_representations + " WHERE _id > %s ORDER BY _id LIMIT %s",
+                    [last_tuple_id, batch_size]
+                )
+            representation_rows = dict_fetchall(cursor)
+        except ValueError as err:
+            print('Data access exception in get representations for job in batches')
+            print(err.args)
+            raise
+        finally:
+            cursor.close()
+        if not representation_rows:
+            return
+        last_tuple_id = representation_rows[-1]['_id']
+        yield representation_rows
+
+
 def get_data_rows_for_job(obj_job: job_components.Job):
     """Get all rows of data for this 3a_kn job"""
     cursor = connection.cursor()
@@ -1124,38 +2725,8 @@ def update_assignment_for_task_in_aggregate(obj_job: job_components.Job, task_id
     """Update assignments table"""
     cursor = connection.cursor()
     try:
-        with transaction.atomic():
-            job_prefix_table_name = get_job_prefix_table_name(obj_job=obj_job)
-            table_assignments = job_prefix_table_name + "assignments"
-            cursor.execute(
-                "UPDATE " +
-                table_assignments +
-                " SET status = %s, completed_at = %s "
-                "WHERE _id = %s AND worker_id = %s AND status = %s "
-                "RETURNING status;",
-                [
-                    settings.ASSIGNMENT_STATUS[1],   # 'COMPLETED'
-                    datetime.utcnow().replace(tzinfo=pytz.UTC),
-                    task_id,
-                    worker_id,
-                    settings.ASSIGNMENT_STATUS[0]   # 'PENDING_ANNOTATION'
-                ]
-            )
-            if cursor.rowcount == 0:
-                # this means: must be already abandoned
-                # it cannot have been completed or unassigned, since in those cases, this function call would not have been possible.
-                # TODO: notify w that vote didn't' get recorded and we are assigning you something else
-                return True
-            elif cursor.rowcount > 1:
-                # <_id, worker_id> had multiple rows in assignments table that had status "pending_annotation"
-                raise ValueError(
-                    'Illegal updates happened. <_id, worker_id> had multiple rows in assignments table that had status "pending_annotation"',
-                    (task_id, worker_id)
-                )
-            elif cursor.rowcount == 1:
-                # the update was successful on the one (task_id, worker_id, status) row that was pending
-                pass
-            return False
+        with progress_atomic(cursor):
+            return complete_assignment_in_aggregate(cursor=cursor, obj_job=obj_job, task_id=task_id, worker_id=worker_id)
     except ValueError as err:
         print('Data access exception in update assignment for task in aggregate')
         print(err.args)
@@ -1164,155 +2735,48 @@ def update_assignment_for_task_in_aggregate(obj_job: job_components.Job, task_id
         cursor.close()
 
 
+def complete_assignment_in_aggregate(cursor, obj_job: job_components.Job, task_id: int, worker_id: int):
+    """Mark the pending assignment as completed. Returns True if it had been abandoned already"""
+    table_assignments = get_job_table_name(cursor, obj_job, "assignments")
+    job_rows, job_key_parameters = get_job_key_condition(cursor, obj_job)
+    cursor.execute(
+        "UPDATE " +
+        table_assignments +
+        " SET status = %s, completed_at = %s "
+        "WHERE " + job_rows + " AND _id = %s AND worker_id = %s AND status = %s "
+        "RETURNING status;",
+        [
+            settings.ASSIGNMENT_STATUS[1],   # 'COMPLETED'
+            datetime.utcnow().replace(tzinfo=pytz.UTC)
+        ] + job_key_parameters + [
+            task_id,
+            worker_id,
+            settings.ASSIGNMENT_STATUS[0]   # 'PENDING_ANNOTATION'
+        ]
+    )
+    if cursor.rowcount == 0:
+        # this means: must be already abandoned
+        # it cannot have been completed or unassigned, since in those cases, this function call would not have been possible.
+        # TODO: notify w that vote didn't' get recorded and we are assigning you something else
+        return True
+    elif cursor.rowcount > 1:
+        # <_id, worker_id> had multiple rows in assignments table that had status "pending_annotation"
+        raise ValueError(
+            'Illegal updates happened. <_id, worker_id> had multiple rows in assignments table that had status "pending_annotation"',
+            (task_id, worker_id)
+        )
+    elif cursor.rowcount == 1:
+        # the update was successful on the one (task_id, worker_id, status) row that was pending
+        update_progress(cursor=cursor, obj_job=obj_job, in_progress_delta=-1)
+    return False
+
+
 def bookkeeping_and_aggregate_3a_kn(obj_job: job_components.Job, task_id: int, worker_id: int, job_k: int, job_n: int, answer: str):
     """Aggregate task's annotations"""
     cursor = connection.cursor()
     try:
-        with transaction.atomic():
-
-            job_prefix_table_name = get_job_prefix_table_name(obj_job=obj_job)
-            table_tasks = job_prefix_table_name + "tasks"
-            table_outputs = job_prefix_table_name + "outputs"
-
-            # print('worker ', worker_id, ' fetching task', task_id, ' in lock from tasks table')
-            cursor.execute(
-                "SELECT _id, total_assigned, abandoned, pending_annotations, done FROM " +
-                table_tasks +
-                " WHERE _id = %s FOR UPDATE",
-                [task_id]
-            )
-            task = cursor.fetchone()
-
-            # print('worker ', worker_id, ' inserting to outputs within task ', task_id, ' lock')
-            # Push annotation to p1_w1_task_outputs (O)
-            cursor.execute(
-                "INSERT into " +
-                table_outputs +
-                " (_id, annotation, worker_id) VALUES (%s, %s, %s)",
-                [task_id, answer, worker_id]
-            )
-
-            # aggregate start
-            task_id = task[0]
-            task_done = task[4]
-
-            flag_k_votes_agree = False  # if k votes agree out of n
-            final_annotation = settings.DEFAULT_AGGREGATION_LABEL  # 'undecided'
-            cursor.execute(
-                "SELECT VOTES_PER_ANNOTATION.annotation " +
-                "FROM ( " +
-                "   SELECT TASK_ANNOTATIONS.annotation, count(*) AS n_votes " +
-                "   FROM ( " +
-                "       SELECT _id, worker_id, annotation " +
-                "       FROM " + table_outputs + " " +
-                "       WHERE _id = %s " +
-                "   ) AS TASK_ANNOTATIONS " +
-                "   GROUP BY TASK_ANNOTATIONS.annotation " +
-                ") AS VOTES_PER_ANNOTATION " +
-                "WHERE VOTES_PER_ANNOTATION.n_votes >= %s",
-                [task_id, job_k]
-            )
-            final_annotation_row = cursor.fetchone()
-            if not final_annotation_row:
-                pass    # flag_k_votes_agree remains False
-            else:
-                flag_k_votes_agree = True
-                final_annotation = final_annotation_row[0]
-
-            cursor.execute(
-                "SELECT count(*) AS n_task_annotations " +
-                "FROM " + table_outputs + " " +
-                "WHERE _id = %s ",
-                [task_id]
-            )
-            n_task_annotations_row = cursor.fetchone()
-            n_task_annotations = int(n_task_annotations_row[0])
-
-            # main logic
-            if n_task_annotations > job_n:
-                print('ERROR: Should never have reached here')
-            elif n_task_annotations == job_n:
-                if flag_k_votes_agree:
-                    aggregate(cursor, task_id, final_annotation, obj_job)
-                else:
-                    # final_annotation is still 'undecided'.
-                    aggregate(cursor, task_id, final_annotation, obj_job)
-            elif n_task_annotations >= job_k:  # votes >=k and < n
-                if flag_k_votes_agree:
-                    aggregate(cursor, task_id, final_annotation, obj_job)
-                else:
-                    # votes >= k but k don't agree out of them.
-                    # so wait for votes to become n but signal to assign that it should open this task for assignment again
-                    if task_done:
-                        # print('task was done. changing it back.')
-                        task_done = False
-            # else: votes < k, so just wait for enough votes.
-
-            # # pushed_to_final_labels = False
-            #
-            # # fetch votes of task_id in task_outputs
-            # cursor.execute(
-            #     "SELECT _id, annotation, worker_id FROM " +
-            #     table_outputs +
-            #     " WHERE _id = %s",
-            #     [task_id]
-            # )
-            # task_annotations_rows = cursor.fetchall()
-            #
-            # # number of votes per vote type
-            # task_annotations_dict = {}
-            # task_annotations_list = []
-            # for task_annotation_row in task_annotations_rows:
-            #     annotation = task_annotation_row[1]
-            #     task_annotations_list.append(annotation)
-            #     if task_annotations_dict.get(annotation):
-            #         val = task_annotations_dict.get(annotation)
-            #         task_annotations_dict[annotation] = val + 1
-            #     else:
-            #         task_annotations_dict[annotation] = 1
-            # flag_k_votes_agree = False  # if k votes agree out of n
-            # final_annotation = settings.DEFAULT_AGGREGATION_LABEL   # 'undecided'
-            # for key in task_annotations_dict.keys():
-            #     if task_annotations_dict.get(key) >= job_k:
-            #         flag_k_votes_agree = True
-            #         final_annotation = key
-
-            # # main logic
-            # if len(task_annotations_list) > job_n:
-            #     print('ERROR: Should never have reached here')
-            # elif len(task_annotations_list) == job_n:
-            #     if flag_k_votes_agree:
-            #         aggregate(cursor, task_id, final_annotation, obj_job)
-            #         # pushed_to_final_labels = True
-            #     else:
-            #         # final_annotation is still 'undecided'.
-            #         aggregate(cursor, task_id, final_annotation, obj_job)
-            #         # pushed_to_final_labels = True
-            # elif len(task_annotations_list) >= job_k:  # votes >=k
-            #     if flag_k_votes_agree:
-            #         aggregate(cursor, task_id, final_annotation, obj_job)
-            #         # pushed_to_final_labels = True
-            #     else:
-            #         # votes >= k but k don't agree out of them.
-            #         # so wait for votes to become n but signal to assign that it should open this task for assignment again
-            #         if task_done:
-            #             # print('task was done. changing it back.')
-            #             task_done = False
-            # # else: votes < k, so just wait for enough votes.
-
-            task_done = task_done
-
-            # aggregate ends
-            # print('worker ', worker_id, ' updating task ', task_id, ' in tasks table and releasing lock')
-            cursor.execute(
-                "UPDATE " +
-                table_tasks +
-                " SET pending_annotations = %s, done = %s  WHERE _id = %s",
-                [task[3] - 1, task_done, task_id]
-            )
-
-            return
-
+        with progress_atomic(cursor):
+            return record_vote_and_aggregate_3a_kn(cursor=cursor, obj_job=obj_job, task_id=task_id, worker_id=worker_id, job_k=job_k, job_n=job_n, answer=answer)
     except ValueError as err:
         print('Data access exception in bookkeeping and aggregate')
         print(err.args)
@@ -1322,95 +2786,139 @@ def bookkeeping_and_aggregate_3a_kn(obj_job: job_components.Job, task_id: int, w
         cursor.close()
         # break
 
-def bookkeeping_and_aggregate_for_regular_workers(obj_job: job_components.Job, task_id: int, worker_id: int, job_k: int, job_n: int, answer: str):
-    """Aggregate task's annotations for regular workers"""
-    cursor = connection.cursor()
-    try:
-        with transaction.atomic():
-
-            job_prefix_table_name = get_job_prefix_table_name(obj_job=obj_job)
-            table_tasks = job_prefix_table_name + "tasks"
-            table_outputs = job_prefix_table_name + "outputs"
-            table_final_labels = job_prefix_table_name + "final_labels"
 
-            # print('worker ', worker_id, ' fetching task', task_id, ' in lock from tasks table')
-            cursor.execute(
-                "SELECT _id, total_assigned, abandoned, pending_annotations, done FROM " +
-                table_tasks +
-                " WHERE _id = %s FOR UPDATE",
-                [task_id]
-            )
-            task = cursor.fetchone()
+def record_vote_and_aggregate_3a_kn(cursor, obj_job: job_components.Job, task_id: int, worker_id: int, job_k: int, job_n: int, answer: str):
+    """Store the vote and aggregate task's annotations, under the lock of the task"""
+    table_tasks, table_outputs = get_job_table_names(cursor, obj_job, "tasks", "outputs")
+    job_rows, job_key_parameters = get_job_key_condition(cursor, obj_job)
+    job_key_column, job_key_value = get_job_key_column(cursor, obj_job)[:2]
 
-            # print('worker ', worker_id, ' inserting to outputs within task ', task_id, ' lock')
-            # Push annotation to p1_w1_task_outputs (O)
-            cursor.execute(
-                "INSERT into " +
-                table_outputs +
-                " (_id, annotation, worker_id) VALUES (%s, %s, %s)",
-                [task_id, answer, worker_id]
-            )
+    # print('worker ', worker_id, ' fetching task', task_id, ' in lock from tasks table')
+    cursor.execute(
+        "SELECT _id, total_assigned, abandoned, pending_annotations, done FROM " +
+        table_tasks +
+        " WHERE " + job_rows + " AND _id = %s FOR UPDATE",
+        job_key_parameters + [task_id]
+    )
+    task = cursor.fetchone()
 
-            # If the task_id is already in the final_labels table, skip it.
-            cursor.execute(
-                "SELECT _id FROM " + table_final_labels +
-                " WHERE _id = %s",
-                [task_id]
-            )
-            existing_final_label = cursor.fetchone()
-            if existing_final_label:
-                return
+    # print('worker ', worker_id, ' inserting to outputs within task ', task_id, ' lock')
+    # Push annotation to p1_w1_task_outputs (O)
+    cursor.execute(
+        "INSERT into " +
+        table_outputs +
+        " (" + job_key_column + "_id, annotation, worker_id, worker_class) VALUES (" + job_key_value + "%s, %s, %s, %s)",
+        job_key_parameters + [task_id, answer, worker_id, get_worker_class(worker_id=worker_id)]
+    )
+    tally_vote(cursor, obj_job, task_id, answer, VOTE_TALLY_ALL_WORKERS)
 
-            # aggregate start
-            task_id = task[0]
-            task_done = task[4]
+    # aggregate start
+    task_id = task[0]
+    task_done = task[4]
 
-            flag_k_votes_agree = False  # if k votes agree out of n
-            final_annotation = settings.DEFAULT_AGGREGATION_LABEL  # 'undecided'
-            final_annotation_row = get_qualifying_annotation_for_task(cursor, task_id, obj_job, UserType.REGULAR, job_k)
-            if not final_annotation_row:
-                pass    # flag_k_votes_agree remains False
-            else:
-                flag_k_votes_agree = True
-                final_annotation = final_annotation_row[0]
+    flag_k_votes_agree = False  # if k votes agree out of n
+    final_annotation = settings.DEFAULT_AGGREGATION_LABEL  # 'undecided'
+    leading_annotation, n_leading_votes, n_task_annotations = get_leading_annotation_for_task(cursor, task_id, obj_job)
+    if n_leading_votes < job_k:
+        pass    # flag_k_votes_agree remains False
+    else:
+        flag_k_votes_agree = True
+        final_annotation = leading_annotation
+
+    # main logic
+    if n_task_annotations > job_n:
+        print('ERROR: Should never have reached here')
+    elif n_task_annotations == job_n:
+        if flag_k_votes_agree:
+            aggregate(cursor, task_id, final_annotation, obj_job)
+        else:
+            # final_annotation is still 'undecided'.
+            aggregate(cursor, task_id, final_annotation, obj_job)
+    elif n_task_annotations >= job_k:  # votes >=k and < n
+        if flag_k_votes_agree:
+            aggregate(cursor, task_id, final_annotation, obj_job)
+        else:
+            # votes >= k but k don't agree out of them.
+            # so wait for votes to become n but signal to assign that it should open this task for assignment again
+            if task_done:
+                # print('task was done. changing it back.')
+                task_done = False
+                requeue_task(obj_job=obj_job, task_id=task_id)
+                notify_tasks_available(cursor=cursor, obj_job=obj_job)
+    # else: votes < k, so just wait for enough votes.
+
+    # # pushed_to_final_labels = False
+    #
+    # # fetch votes of task_id in task_outputs
+    # cursor.execute(
+    #     "SELECT _id, annotation, worker_id FROM " +
+    #     table_outputs +
+    #     " WHERE _id = %s",
+    #     [task_id]
+    # )
+    # task_annotations_rows = cursor.fetchall()
+    #
+    # # number of votes per vote type
+    # task_annotations_dict = {}
+    # task_annotations_list = []
+    # for task_annotation_row in task_annotations_rows:
+    #     annotation = task_annotation_row[1]
+    #     task_annotations_list.append(annotation)
+    #     if task_annotations_dict.get(annotation):
+    #         val = task_annotations_dict.get(annotation)
+    #         task_annotations_dict[annotation] = val + 1
+    #     else:
+    #         task_annotations_dict[annotation] = 1
+    # flag_k_votes_agree = False  # if k votes agree out of n
+    # final_annotation = settings.DEFAULT_AGGREGATION_LABEL   # 'undecided'
+    # for key in task_annotations_dict.keys():
+    #     if task_annotations_dict.get(key) >= job_k:
+    #         flag_k_votes_agree = True
+    #         final_annotation = key
+
+    # # main logic
+    # if len(task_annotations_list) > job_n:
+    #     print('ERROR: Should never have reached here')
+    # elif len(task_annotations_list) == job_n:
+    #     if flag_k_votes_agree:
+    #         aggregate(cursor, task_id, final_annotation, obj_job)
+    #         # pushed_to_final_labels = True
+    #     else:
+    #         # final_annotation is still 'undecided'.
+    #         aggregate(cursor, task_id, final_annotation, obj_job)
+    #         # pushed_to_final_labels = True
+    # elif len(task_annotations_list) >= job_k:  # votes >=k
+    #     if flag_k_votes_agree:
+    #         aggregate(cursor, task_id, final_annotation, obj_job)
+    #         # pushed_to_final_labels = True
+    #     else:
+    #         # votes >= k but k don't agree out of them.
+    #         # so wait for votes to become n but signal to assign that it should open this task for assignment again
+    #         if task_done:
+    #             # print('task was done. changing it back.')
+    #             task_done = False
+    # # else: votes < k, so just wait for enough votes.
 
-            n_task_annotations_row = get_total_annotations_for_task(cursor, task_id, obj_job, UserType.REGULAR)
-            n_task_annotations = int(n_task_annotations_row[0])
+    task_done = task_done
 
-            # main logic
-            if n_task_annotations > job_n:
-                print('ERROR: Should never have reached here')
-            elif n_task_annotations == job_n:
-                if flag_k_votes_agree:
-                    aggregate(cursor, task_id, final_annotation, obj_job)
-                    task_done = True
-                else:
-                    # final_annotation is still 'undecided'.
-                    aggregate(cursor, task_id, final_annotation, obj_job)
-                    task_done = True
-            elif n_task_annotations >= job_k:  # votes >=k and < n
-                if flag_k_votes_agree:
-                    aggregate(cursor, task_id, final_annotation, obj_job)
-                    task_done = True
-                else:
-                    # votes >= k but k don't agree out of them.
-                    # so wait for votes to become n but signal to assign that it should open this task for assignment again
-                    if task_done:
-                        # print('task was done. changing it back.')
-                        task_done = False
-            # else: votes < k, so just wait for enough votes.
+    # aggregate ends
+    # print('worker ', worker_id, ' updating task ', task_id, ' in tasks table and releasing lock')
+    cursor.execute(
+        "UPDATE " +
+        table_tasks +
+        " SET pending_annotations = %s, done = %s  WHERE " + job_rows + " AND _id = %s",
+        [task[3] - 1, task_done] + job_key_parameters + [task_id]
+    )
 
-            # aggregate ends
-            # print('worker ', worker_id, ' updating task ', task_id, ' in tasks table and releasing lock')
-            cursor.execute(
-                "UPDATE " +
-                table_tasks +
-                " SET pending_annotations = %s, done = %s  WHERE _id = %s",
-                [task[3] - 1, task_done, task_id]
-            )
+    return
 
-            return
 
+def bookkeeping_and_aggregate_for_regular_workers(obj_job: job_components.Job, task_id: int, worker_id: int, job_k: int, job_n: int, answer: str):
+    """Aggregate task's annotations for regular workers"""
+    cursor = connection.cursor()
+    try:
+        with progress_atomic(cursor):
+            return record_vote_and_aggregate_for_regular_workers(cursor=cursor, obj_job=obj_job, task_id=task_id, worker_id=worker_id, job_k=job_k, job_n=job_n, answer=answer)
     except ValueError as err:
         print('Data access exception in bookkeeping and aggregate')
         print(err.args)
@@ -1420,97 +2928,98 @@ def bookkeeping_and_aggregate_for_regular_workers(obj_job: job_components.Job, t
         cursor.close()
         # break
 
-def bookkeeping_and_aggregate_for_steward_workers(obj_job: job_components.Job, task_id: int, worker_id: int, job_l: int, job_m: int, answer: str):
-    """Aggregate task's annotations for steward workers"""
-    cursor = connection.cursor()
-    try:
-        with transaction.atomic():
-
-            job_prefix_table_name = get_job_prefix_table_name(obj_job=obj_job)
-            table_tasks = job_prefix_table_name + "tasks"
-            table_outputs = job_prefix_table_name + "outputs"
-            table_final_labels = job_prefix_table_name + "final_labels"
-
-            # print('worker ', worker_id, ' fetching task', task_id, ' in lock from tasks table')
-            # Steward case only cares about _id and done in the tasks table, other fields are solely for regular workers.
-            cursor.execute(
-                "SELECT _id, done FROM " +
-                table_tasks +
-                " WHERE _id = %s FOR UPDATE",
-                [task_id]
-            )
-            task = cursor.fetchone()
 
-            # print('worker ', worker_id, ' inserting to outputs within task ', task_id, ' lock')
-            # Push annotation to p1_w1_task_outputs (O)
-            cursor.execute(
-                "INSERT into " +
-                table_outputs +
-                " (_id, annotation, worker_id) VALUES (%s, %s, %s)",
-                [task_id, answer, worker_id]
-            )
+def record_vote_and_aggregate_for_regular_workers(cursor, obj_job: job_components.Job, task_id: int, worker_id: int, job_k: int, job_n: int, answer: str):
+    """Store the vote and aggregate task's annotations for regular workers, under the lock of the task"""
+    table_tasks, table_outputs, table_final_labels = get_job_table_names(cursor, obj_job, "tasks", "outputs", "final_labels")
+    job_rows, job_key_parameters = get_job_key_condition(cursor, obj_job)
+    job_key_column, job_key_value = get_job_key_column(cursor, obj_job)[:2]
 
-            # If the task_id is already in the final_labels table, skip it.
-            cursor.execute(
-                "SELECT _id FROM " + table_final_labels +
-                " WHERE _id = %s",
-                [task_id]
-            )
-            existing_final_label = cursor.fetchone()
-            if existing_final_label:
-                return
+    # print('worker ', worker_id, ' fetching task', task_id, ' in lock from tasks table')
+    cursor.execute(
+        "SELECT _id, total_assigned, abandoned, pending_annotations, done FROM " +
+        table_tasks +
+        " WHERE " + job_rows + " AND _id = %s FOR UPDATE",
+        job_key_parameters + [task_id]
+    )
+    task = cursor.fetchone()
 
-            # aggregate start
-            task_id = task[0]
-            task_done = task[1]
+    # print('worker ', worker_id, ' inserting to outputs within task ', task_id, ' lock')
+    # Push annotation to p1_w1_task_outputs (O)
+    cursor.execute(
+        "INSERT into " +
+        table_outputs +
+        " (" + job_key_column + "_id, annotation, worker_id, worker_class) VALUES (" + job_key_value + "%s, %s, %s, %s)",
+        job_key_parameters + [task_id, answer, worker_id, get_worker_class(worker_id=worker_id)]
+    )
+    tally_vote(cursor, obj_job, task_id, answer, UserType.REGULAR.value)
 
-            flag_l_votes_agree = False  # if l votes agree out of m
-            final_annotation = settings.DEFAULT_AGGREGATION_LABEL  # 'undecided'
-            final_annotation_row = get_qualifying_annotation_for_task(cursor, task_id, obj_job, UserType.STEWARD, job_l)
-            if not final_annotation_row:
-                pass    # flag_l_votes_agree remains False
-            else:
-                flag_l_votes_agree = True
-                final_annotation = final_annotation_row[0]
+    # If the task_id is already in the final_labels table, skip it.
+    cursor.execute(
+        "SELECT _id FROM " + table_final_labels +
+        " WHERE " + job_rows + " AND _id = %s",
+        job_key_parameters + [task_id]
+    )
+    existing_final_label = cursor.fetchone()
+    if existing_final_label:
+        return
 
-            n_task_annotations_row = get_total_annotations_for_task(cursor, task_id, obj_job, UserType.STEWARD)
-            n_task_annotations = int(n_task_annotations_row[0])
+    # aggregate start
+    task_id = task[0]
+    task_done = task[4]
 
-            # main logic
-            if n_task_annotations > job_m:
-                print('ERROR: Should never have reached here')
-            elif n_task_annotations == job_m:
-                if flag_l_votes_agree:
-                    aggregate(cursor, task_id, final_annotation, obj_job)
-                    task_done = True
-                else:
-                    # final_annotation is still 'undecided'.
-                    aggregate(cursor, task_id, final_annotation, obj_job)
-                    task_done = True
-            elif n_task_annotations >= job_l:  # votes >=l and < m
-                if flag_l_votes_agree:
-                    aggregate(cursor, task_id, final_annotation, obj_job)
-                    task_done = True
-                else:
-                    # votes >= l but l don't agree out of them.
-                    # so wait for votes to become m but signal to assign that it should open this task for assignment again
-                    if task_done:
-                        # print('task was done. changing it back.')
-                        task_done = False
-            # else: votes < l, so just wait for enough votes.
+    flag_k_votes_agree = False  # if k votes agree out of n
+    final_annotation = settings.DEFAULT_AGGREGATION_LABEL  # 'undecided'
+    leading_annotation, n_leading_votes, n_task_annotations = get_leading_annotation_for_task(cursor, task_id, obj_job, UserType.REGULAR.value)
+    if n_leading_votes < job_k:
+        pass    # flag_k_votes_agree remains False
+    else:
+        flag_k_votes_agree = True
+        final_annotation = leading_annotation
+
+    # main logic
+    if n_task_annotations > job_n:
+        print('ERROR: Should never have reached here')
+    elif n_task_annotations == job_n:
+        if flag_k_votes_agree:
+            aggregate(cursor, task_id, final_annotation, obj_job)
+            task_done = True
+        else:
+            # final_annotation is still 'undecided'.
+            aggregate(cursor, task_id, final_annotation, obj_job)
+            task_done = True
+    elif n_task_annotations >= job_k:  # votes >=k and < n
+        if flag_k_votes_agree:
+            aggregate(cursor, task_id, final_annotation, obj_job)
+            task_done = True
+        else:
+            # votes >= k but k don't agree out of them.
+            # so wait for votes to become n but signal to assign that it should open this task for assignment again
+            if task_done:
+                # print('task was done. changing it back.')
+                task_done = False
+                requeue_task(obj_job=obj_job, task_id=task_id)
+                notify_tasks_available(cursor=cursor, obj_job=obj_job)
+    # else: votes < k, so just wait for enough votes.
+
+    # aggregate ends
+    # print('worker ', worker_id, ' updating task ', task_id, ' in tasks table and releasing lock')
+    cursor.execute(
+        "UPDATE " +
+        table_tasks +
+        " SET pending_annotations = %s, done = %s  WHERE " + job_rows + " AND _id = %s",
+        [task[3] - 1, task_done] + job_key_parameters + [task_id]
+    )
 
-            # aggregate ends
-            # print('worker ', worker_id, ' updating task ', task_id, ' in tasks table and releasing lock')
-            cursor.execute(
-                "UPDATE " +
-                table_tasks +
-                " SET done = %s  WHERE _id = %s",
-                [task_done, task_id]
-            )
-            # we dont need to update pending_annotations because steward case only cares about id and done in the tasks table, other fields are solely for regular workers.
+    return
 
-            return
 
+def bookkeeping_and_aggregate_for_steward_workers(obj_job: job_components.Job, task_id: int, worker_id: int, job_l: int, job_m: int, answer: str):
+    """Aggregate task's annotations for steward workers"""
+    cursor = connection.cursor()
+    try:
+        with progress_atomic(cursor):
+            return record_vote_and_aggregate_for_steward_workers(cursor=cursor, obj_job=obj_job, task_id=task_id, worker_id=worker_id, job_l=job_l, job_m=job_m, answer=answer)
     except ValueError as err:
         print('Data access exception in bookkeeping and aggregate')
         print(err.args)
@@ -1520,20 +3029,108 @@ def bookkeeping_and_aggregate_for_steward_workers(obj_job: job_components.Job, t
         cursor.close()
         # break
 
+
+def record_vote_and_aggregate_for_steward_workers(cursor, obj_job: job_components.Job, task_id: int, worker_id: int, job_l: int, job_m: int, answer: str):
+    """Store the vote and aggregate task's annotations for steward workers, under the lock of the task"""
+    table_tasks, table_outputs, table_final_labels = get_job_table_names(cursor, obj_job, "tasks", "outputs", "final_labels")
+    job_rows, job_key_parameters = get_job_key_condition(cursor, obj_job)
+    job_key_column, job_key_value = get_job_key_column(cursor, obj_job)[:2]
+
+    # print('worker ', worker_id, ' fetching task', task_id, ' in lock from tasks table')
+    # Steward case only cares about _id and done in the tasks table, other fields are solely for regular workers.
+    cursor.execute(
+        "SELECT _id, done FROM " +
+        table_tasks +
+        " WHERE " + job_rows + " AND _id = %s FOR UPDATE",
+        job_key_parameters + [task_id]
+    )
+    task = cursor.fetchone()
+
+    # print('worker ', worker_id, ' inserting to outputs within task ', task_id, ' lock')
+    # Push annotation to p1_w1_task_outputs (O)
+    cursor.execute(
+        "INSERT into " +
+        table_outputs +
+        " (" + job_key_column + "_id, annotation, worker_id, worker_class) VALUES (" + job_key_value + "%s, %s, %s, %s)",
+        job_key_parameters + [task_id, answer, worker_id, get_worker_class(worker_id=worker_id)]
+    )
+    tally_vote(cursor, obj_job, task_id, answer, UserType.STEWARD.value)
+
+    # If the task_id is already in the final_labels table, skip it.
+    cursor.execute(
+        "SELECT _id FROM " + table_final_labels +
+        " WHERE " + job_rows + " AND _id = %s",
+        job_key_parameters + [task_id]
+    )
+    existing_final_label = cursor.fetchone()
+    if existing_final_label:
+        return
+
+    # aggregate start
+    task_id = task[0]
+    task_done = task[1]
+
+    flag_l_votes_agree = False  # if l votes agree out of m
+    final_annotation = settings.DEFAULT_AGGREGATION_LABEL  # 'undecided'
+    leading_annotation, n_leading_votes, n_task_annotations = get_leading_annotation_for_task(cursor, task_id, obj_job, UserType.STEWARD.value)
+    if n_leading_votes < job_l:
+        pass    # flag_l_votes_agree remains False
+    else:
+        flag_l_votes_agree = True
+        final_annotation = leading_annotation
+
+    # main logic
+    if n_task_annotations > job_m:
+        print('ERROR: Should never have reached here')
+    elif n_task_annotations == job_m:
+        if flag_l_votes_agree:
+            aggregate(cursor, task_id, final_annotation, obj_job)
+            task_done = True
+        else:
+            # final_annotation is still 'undecided'.
+            aggregate(cursor, task_id, final_annotation, obj_job)
+            task_done = True
+    elif n_task_annotations >= job_l:  # votes >=l and < m
+        if flag_l_votes_agree:
+            aggregate(cursor, task_id, final_annotation, obj_job)
+            task_done = True
+        else:
+            # votes >= l but l don't agree out of them.
+            # so wait for votes to become m but signal to assign that it should open this task for assignment again
+            if task_done:
+                # print('task was done. changing it back.')
+                task_done = False
+                requeue_task(obj_job=obj_job, task_id=task_id)
+                notify_tasks_available(cursor=cursor, obj_job=obj_job)
+    # else: votes < l, so just wait for enough votes.
+
+    # aggregate ends
+    # print('worker ', worker_id, ' updating task ', task_id, ' in tasks table and releasing lock')
+    cursor.execute(
+        "UPDATE " +
+        table_tasks +
+        " SET done = %s  WHERE " + job_rows + " AND _id = %s",
+        [task_done] + job_key_parameters + [task_id]
+    )
+    # we dont need to update pending_annotations because steward case only cares about id and done in the tasks table, other fields are solely for regular workers.
+
+    return
+
+
 def aggregate(cursor, task_id, final_annotation, obj_job):
     """Store the aggregated label against the task in final_labels table"""
-    job_prefix_table_name = get_job_prefix_table_name(obj_job=obj_job)
     # aggregate
-    table_tasks = job_prefix_table_name + "tasks"
-    table_final_labels = job_prefix_table_name + "final_labels"
+    table_tasks, table_final_labels = get_job_table_names(cursor, obj_job, "tasks", "final_labels")
+    job_key_column, job_key_value, job_key_parameters = get_job_key_column(cursor, obj_job)
     # push t, label to F (final_labels)
     # print('inserting to final labels within task ', task_id, ' lock')
     cursor.execute(
         "INSERT into " +
         table_final_labels +
-        " (_id, label) VALUES (%s, %s)",
-        [task_id, final_annotation]
+        " (" + job_key_column + "_id, label) VALUES (" + job_key_value + "%s, %s)",
+        job_key_parameters + [task_id, final_annotation]
     )
+    update_progress(cursor=cursor, obj_job=obj_job, done_tasks_delta=1)
     return
 
 
@@ -1542,19 +3139,7 @@ def check_all_tasks_have_aggregated_labels(obj_job: job_components.Job, count_ta
     cursor = connection.cursor()
     all_tasks_have_aggregated_labels = False
     try:
-        job_prefix_table_name = get_job_prefix_table_name(obj_job=obj_job)
-        table_final_labels = job_prefix_table_name + "final_labels"
-        count_tasks_in_job = int(count_tasks)
-        cursor.execute(
-            "SELECT count(*) FROM " + table_final_labels,
-            []
-        )
-        count_final_labels_row = cursor.fetchone()
-        count_final_labels_in_job = int(count_final_labels_row[0])
-        # print('Number of rows in tasks: ', count_tasks_in_job, ' : ', type(count_tasks_in_job))
-        # print('Number of rows in final labels: ', count_final_labels_in_job, ' : ', type(count_final_labels_in_job))
-        if count_tasks_in_job == count_final_labels_in_job:
-            all_tasks_have_aggregated_labels = True
+        all_tasks_have_aggregated_labels = all_tasks_have_final_labels(cursor=cursor, obj_job=obj_job)
         # print('All tasks have aggregated labels? = ', all_tasks_have_aggregated_labels)
         return all_tasks_have_aggregated_labels
     except ValueError as err:
@@ -1564,40 +3149,80 @@ def check_all_tasks_have_aggregated_labels(obj_job: job_components.Job, count_ta
         cursor.close()
 
 
-def skip_3a_kn(obj_job: job_components.Job, task_id: int, worker_id: int):
-    """The worker (annotator) wants to quit annotating"""
+def all_tasks_have_final_labels(cursor, obj_job: job_components.Job):
+    """Check the progress counters of the job, with the given cursor"""
+    add_progress_table(obj_job=obj_job)
+    # one row read, instead of counting the final labels
+    job_prefix_table_name = get_job_prefix_table_name(obj_job=obj_job)
+    table_progress = job_prefix_table_name + "progress"
+    cursor.execute(
+        "SELECT total_tasks, done_tasks FROM " + table_progress,
+        []
+    )
+    progress_row = cursor.fetchone()
+    count_tasks_in_job = int(progress_row[0])
+    # including the tasks aggregated earlier in the caller's transaction, whose counts are only applied at its end
+    count_final_labels_in_job = int(progress_row[1]) + get_pending_progress(obj_job=obj_job)[0]
+    # print('Number of rows in tasks: ', count_tasks_in_job, ' : ', type(count_tasks_in_job))
+    # print('Number of rows in final labels: ', count_final_labels_in_job, ' : ', type(count_final_labels_in_job))
+    return count_tasks_in_job == count_final_labels_in_job
+
+
+def get_progress(obj_job: job_components.Job):
+    """Get the progress counters (total_tasks, done_tasks, in_progress) of this job"""
+    add_progress_table(obj_job=obj_job)
     cursor = connection.cursor()
     try:
         job_prefix_table_name = get_job_prefix_table_name(obj_job=obj_job)
-        table_assignments = job_prefix_table_name + "assignments"
+        table_progress = job_prefix_table_name + "progress"
         cursor.execute(
-            "SELECT _id, worker_id, status FROM " +
-            table_assignments +
-            " WHERE _id = %s and worker_id = %s and status = %s FOR UPDATE",
-            [
-                task_id,
-                worker_id,
-                settings.ASSIGNMENT_STATUS[0]       # 'PENDING_ANNOTATION'
-            ]
+            "SELECT total_tasks, done_tasks, in_progress FROM " + table_progress,
+            []
         )
-        task_assignments = cursor.fetchall()
-        if not task_assignments or not task_assignments[0]:
-            # <_id, worker_id> not in pending status
-            # cannot be completed or unassigned since otherwise, this function call would not have been possible
-            # therefore, must be abandoned already
-            pass
-        elif len(task_assignments) > 1:
-            # <_id, worker_id> had multiple rows in assignments table that had status "pending_annotation"
-            raise ValueError(
-                '<_id, worker_id> had multiple rows in assignments table that had status "pending_annotation"',
-                (task_id, worker_id)
+        progress = dict_fetchone(cursor)
+        return progress
+    except ValueError as err:
+        print('Data access exception in get progress')
+        print(err.args)
+    finally:
+        cursor.close()
+
+
+def skip_3a_kn(obj_job: job_components.Job, task_id: int, worker_id: int):
+    """The worker (annotator) wants to quit annotating"""
+    cursor = connection.cursor()
+    try:
+        with progress_atomic(cursor):
+            table_assignments = get_job_table_name(cursor, obj_job, "assignments")
+            job_rows, job_key_parameters = get_job_key_condition(cursor, obj_job)
+            cursor.execute(
+                "SELECT _id, worker_id, status FROM " +
+                table_assignments +
+                " WHERE " + job_rows + " AND _id = %s and worker_id = %s and status = %s FOR UPDATE",
+                job_key_parameters + [
+                    task_id,
+                    worker_id,
+                    settings.ASSIGNMENT_STATUS[0]       # 'PENDING_ANNOTATION'
+                ]
             )
-        elif len(task_assignments) == 1:
-            # <_id, w_id> is in pending status
-            print('Voluntarily abandoning task ', task_id, ' for worker ', worker_id)
-            abandon(cursor, obj_job, task_id, worker_id)
+            task_assignments = cursor.fetchall()
+            if not task_assignments or not task_assignments[0]:
+                # <_id, worker_id> not in pending status
+                # cannot be completed or unassigned since otherwise, this function call would not have been possible
+                # therefore, must be abandoned already
+                pass
+            elif len(task_assignments) > 1:
+                # <_id, worker_id> had multiple rows in assignments table that had status "pending_annotation"
+                raise ValueError(
+                    '<_id, worker_id> had multiple rows in assignments table that had status "pending_annotation"',
+                    (task_id, worker_id)
+                )
+            elif len(task_assignments) == 1:
+                # <_id, w_id> is in pending status
+                print('Voluntarily abandoning task ', task_id, ' for worker ', worker_id)
+                abandon(cursor, obj_job, task_id, worker_id)
 
-        return
+            return
     # try:
     #     with transaction.atomic():
     #
@@ -1658,36 +3283,37 @@ def skip_3a_lm(obj_job: job_components.Job, task_id: int, worker_id: int):
     """The worker (annotator) wants to quit annotating"""
     cursor = connection.cursor()
     try:
-        job_prefix_table_name = get_job_prefix_table_name(obj_job=obj_job)
-        table_assignments = job_prefix_table_name + "assignments"
-        cursor.execute(
-            "SELECT _id, worker_id, status FROM " +
-            table_assignments +
-            " WHERE _id = %s and worker_id = %s and status = %s FOR UPDATE",
-            [
-                task_id,
-                worker_id,
-                settings.ASSIGNMENT_STATUS[0]       # 'PENDING_ANNOTATION'
-            ]
-        )
-        task_assignments = cursor.fetchall()
-        if not task_assignments or not task_assignments[0]:
-            # <_id, worker_id> not in pending status
-            # cannot be completed or unassigned since otherwise, this function call would not have been possible
-            # therefore, must be abandoned already
-            pass
-        elif len(task_assignments) > 1:
-            # <_id, worker_id> had multiple rows in assignments table that had status "pending_annotation"
-            raise ValueError(
-                '<_id, worker_id> had multiple rows in assignments table that had status "pending_annotation"',
-                (task_id, worker_id)
+        with progress_atomic(cursor):
+            table_assignments = get_job_table_name(cursor, obj_job, "assignments")
+            job_rows, job_key_parameters = get_job_key_condition(cursor, obj_job)
+            cursor.execute(
+                "SELECT _id, worker_id, status FROM " +
+                table_assignments +
+                " WHERE " + job_rows + " AND _id = %s and worker_id = %s and status = %s FOR UPDATE",
+                job_key_parameters + [
+                    task_id,
+                    worker_id,
+                    settings.ASSIGNMENT_STATUS[0]       # 'PENDING_ANNOTATION'
+                ]
             )
-        elif len(task_assignments) == 1:
-            # <_id, w_id> is in pending status
-            print('Voluntarily abandoning task ', task_id, ' for worker ', worker_id)
-            abandon_lm(cursor, obj_job, task_id, worker_id)
+            task_assignments = cursor.fetchall()
+            if not task_assignments or not task_assignments[0]:
+                # <_id, worker_id> not in pending status
+                # cannot be completed or unassigned since otherwise, this function call would not have been possible
+                # therefore, must be abandoned already
+                pass
+            elif len(task_assignments) > 1:
+                # <_id, worker_id> had multiple rows in assignments table that had status "pending_annotation"
+                raise ValueError(
+                    '<_id, worker_id> had multiple rows in assignments table that had status "pending_annotation"',
+                    (task_id, worker_id)
+                )
+            elif len(task_assignments) == 1:
+                # <_id, w_id> is in pending status
+                print('Voluntarily abandoning task ', task_id, ' for worker ', worker_id)
+                abandon_lm(cursor, obj_job, task_id, worker_id)
 
-        return
+            return
     except ValueError as err:
         print('Data access exception in skip_3a_lm')
         print(err.args)
@@ -1698,36 +3324,13 @@ def skip_3a_lm(obj_job: job_components.Job, task_id: int, worker_id: int):
 
 
 def abandon_tasks_3a_kn(obj_job: job_components.Job):
-    """Find tasks to abandon, and then abandon them"""
+    """Find tasks to abandon, and then abandon them. Returns the counts of abandoned assignments and reopened tasks"""
+    add_worker_class_columns(obj_job=obj_job)
+    add_progress_table(obj_job=obj_job)
     cursor = connection.cursor()
     try:
-        job_prefix_table_name = get_job_prefix_table_name(obj_job=obj_job)
-        table_tasks = job_prefix_table_name + "tasks"
-        table_assignments = job_prefix_table_name + "assignments"
-
-        # TODO: atomic maybe not needed since I am already doing A before T
-
-        # 1. select from p1_w1_A where status = pending and timeout_threshold_at < now() for update
-        cursor.execute(
-            "SELECT _id, worker_id FROM " +
-            table_assignments +
-            " WHERE status = %s AND timeout_threshold_at < %s " +
-            "FOR UPDATE",
-            [
-                settings.ASSIGNMENT_STATUS[0],  # 'PENDING_ANNOTATION'
-                datetime.utcnow().replace(tzinfo=pytz.UTC)
-            ]
-        )
-        task_assignments = cursor.fetchall()
-
-        # 2. for each entry in result set:
-        for task_assignment in task_assignments:
-            task_id = task_assignment[0]
-            worker_id = task_assignment[1]
-            print('Abandoning task ', task_id, ' for worker ', worker_id)
-            abandon(cursor, obj_job, task_id, worker_id)
-
-        return
+        with progress_atomic(cursor):
+            return abandon_expired_assignments(cursor=cursor, obj_job=obj_job)
 
     except ValueError as err:
         print('Data access exception in abandon_tasks')
@@ -1737,45 +3340,14 @@ def abandon_tasks_3a_kn(obj_job: job_components.Job):
         cursor.close()
 
 def abandon_tasks_3a_knlm(obj_job: job_components.Job):
-    """Find tasks to abandon, and then abandon them, for 3a_knlm jobs"""
+    """Find tasks to abandon, and then abandon them, for 3a_knlm jobs. Returns the counts of abandoned assignments and reopened tasks"""
+    add_worker_class_columns(obj_job=obj_job)
+    add_progress_table(obj_job=obj_job)
     cursor = connection.cursor()
     try:
-        job_prefix_table_name = get_job_prefix_table_name(obj_job=obj_job)
-        table_tasks = job_prefix_table_name + "tasks"
-        table_assignments = job_prefix_table_name + "assignments"
-
-        # TODO: atomic maybe not needed since I am already doing A before T
-
-        # 1. select from p1_w1_A where status = pending and timeout_threshold_at < now() for update
-        cursor.execute(f"""
-            SELECT A._id, A.worker_id, AG.name as worker_type
-            FROM {table_assignments} A
-            INNER JOIN auth_user_groups AUG ON A.worker_id = AUG.user_id
-            INNER JOIN auth_group AG ON AUG.group_id = AG.id
-            WHERE A.status = %s AND A.timeout_threshold_at < %s 
-            FOR UPDATE
-            """,
-            [
-                settings.ASSIGNMENT_STATUS[0],  # 'PENDING_ANNOTATION'
-                datetime.utcnow().replace(tzinfo=pytz.UTC)
-            ]
-        )
-        task_assignments = cursor.fetchall()
-
-        # 2. for each entry in result set:
-        for task_assignment in task_assignments:
-            task_id = task_assignment[0]
-            worker_id = task_assignment[1]
-            worker_type = task_assignment[2]
-            print(f'Abandoning task {task_id} for worker {worker_id} (type: {worker_type})')
-            
-            # Use appropriate abandon function based on worker type
-            if worker_type == UserType.STEWARD.value:
-                abandon_lm(cursor, obj_job, task_id, worker_id)
-            elif worker_type == UserType.REGULAR.value:
-                abandon(cursor, obj_job, task_id, worker_id)
-
-        return
+        with progress_atomic(cursor):
+            # assignments of stewards are abandoned as in abandon_lm, the rest as in abandon
+            return abandon_expired_assignments(cursor=cursor, obj_job=obj_job, steward_class=UserType.STEWARD.value)
 
     except ValueError as err:
         print('Data access exception in abandon_tasks_3a_knlm')
@@ -1785,30 +3357,126 @@ def abandon_tasks_3a_knlm(obj_job: job_components.Job):
         cursor.close()
 
 
+def get_earliest_assignment_timeout(obj_job: job_components.Job):
+    """Get the time at which the earliest pending assignment of the job times out, None if nothing is pending"""
+    cursor = connection.cursor()
+    try:
+        table_assignments = get_job_table_name(cursor, obj_job, "assignments")
+        job_rows, job_key_parameters = get_job_key_condition(cursor, obj_job)
+        # served by the (status, timeout_threshold_at) index
+        cursor.execute(
+            "SELECT min(timeout_threshold_at) FROM " + table_assignments + " WHERE " + job_rows + " AND status = %s",
+            job_key_parameters + [settings.ASSIGNMENT_STATUS[0]]     # 'PENDING_ANNOTATION'
+        )
+        return cursor.fetchone()[0]
+    except ValueError as err:
+        print('Data access exception in get earliest assignment timeout')
+        print(err.args)
+    finally:
+        cursor.close()
+
+
+def abandon_expired_assignments(cursor, obj_job: job_components.Job, steward_class: str = None):
+    """
+    Abandon every pending assignment past its timeout in one statement, as part of the caller's transaction.
+    The statement does per task what abandon does per assignment: increment abandoned, decrement pending annotations
+    and open the task again. Assignments of steward_class (if given) only open the task again, as in abandon_lm.
+    Expired assignments and then their tasks are locked in the order of their ids, as everywhere else, and the progress
+    row is updated last (by progress_atomic), so that the sweep cannot deadlock with submitters. Assignments locked by a
+    submitter or skipper at the moment are left to them, or to the next sweep.
+    """
+    table_tasks, table_assignments = get_job_table_names(cursor, obj_job, "tasks", "assignments")
+    job_rows, job_key_parameters = get_job_key_condition(cursor, obj_job)
+    job_rows_a, _ = get_job_key_condition(cursor, obj_job, alias="A")
+    job_rows_t, _ = get_job_key_condition(cursor, obj_job, alias="T")
+    cursor.execute(f"""
+        WITH CANDIDATES AS (
+            SELECT _id, worker_id
+            FROM {table_assignments}
+            WHERE {job_rows} AND status = %s AND timeout_threshold_at < %s
+            ORDER BY _id, worker_id
+            FOR UPDATE SKIP LOCKED
+        ), EXPIRED AS (
+            UPDATE {table_assignments} A
+            SET status = %s, abandoned_at = %s
+            FROM CANDIDATES C
+            WHERE {job_rows_a} AND A._id = C._id AND A.worker_id = C.worker_id AND A.status = %s
+            RETURNING A._id, A.worker_class
+        ), PER_TASK AS (
+            SELECT _id, count(*) FILTER (WHERE %s IS NULL OR worker_class IS DISTINCT FROM %s) AS n_abandoned
+            FROM EXPIRED
+            GROUP BY _id
+        ), LOCKED AS (
+            SELECT T._id, T.done
+            FROM {table_tasks} T
+            WHERE {job_rows_t} AND T._id IN (SELECT _id FROM PER_TASK)
+            ORDER BY T._id
+            FOR UPDATE OF T
+        ), REOPENED AS (
+            UPDATE {table_tasks} T
+            SET abandoned = T.abandoned + P.n_abandoned,
+                pending_annotations = T.pending_annotations - P.n_abandoned,
+                done = False
+            FROM PER_TASK P INNER JOIN LOCKED L USING (_id)
+            WHERE {job_rows_t} AND T._id = P._id
+            RETURNING T._id, L.done AS was_done
+        )
+        SELECT
+            (SELECT count(*) FROM EXPIRED),
+            (SELECT count(*) FROM REOPENED),
+            ARRAY(SELECT _id FROM REOPENED WHERE was_done ORDER BY _id)
+        """,
+        job_key_parameters + [
+            settings.ASSIGNMENT_STATUS[0],      # 'PENDING_ANNOTATION'
+            datetime.utcnow().replace(tzinfo=pytz.UTC),
+            settings.ASSIGNMENT_STATUS[2],      # 'ABANDONED'
+            datetime.utcnow().replace(tzinfo=pytz.UTC),
+        ] + job_key_parameters + [
+            settings.ASSIGNMENT_STATUS[0],      # 'PENDING_ANNOTATION'
+            steward_class,
+            steward_class
+        ] + job_key_parameters + job_key_parameters
+    )
+    count_abandoned_assignments, count_reopened_tasks, reopened_task_ids = cursor.fetchone()
+    if count_abandoned_assignments > 0:
+        update_progress(cursor=cursor, obj_job=obj_job, in_progress_delta=-count_abandoned_assignments)
+    for task_id in reopened_task_ids:
+        # task is open for assignment again
+        requeue_task(obj_job=obj_job, task_id=task_id)
+    if count_abandoned_assignments > 0:
+        notify_tasks_available(cursor=cursor, obj_job=obj_job)
+    return {
+        'abandoned_assignments': count_abandoned_assignments,
+        'reopened_tasks': count_reopened_tasks
+    }
+
+
 def abandon(cursor, obj_job: job_components.Job, task_id: int, worker_id: int):
     # 1. create table_tasks variable, and table_task_assignments variable.
-    job_prefix_table_name = get_job_prefix_table_name(obj_job=obj_job)
-    table_tasks = job_prefix_table_name + "tasks"
-    table_assignments = job_prefix_table_name + "assignments"
+    table_tasks, table_assignments = get_job_table_names(cursor, obj_job, "tasks", "assignments")
 
     # 2. select from p1_w1_A where task = task and worker = worker and job_id = job_id for update
+    job_rows, job_key_parameters = get_job_key_condition(cursor, obj_job)
     cursor.execute("UPDATE " +
                    table_assignments +
-                   " SET status = %s, abandoned_at = %s WHERE _id = %s AND worker_id = %s AND status = %s",
+                   " SET status = %s, abandoned_at = %s WHERE " + job_rows +
+                   " AND _id = %s AND worker_id = %s AND status = %s",
                    [
                        settings.ASSIGNMENT_STATUS[2],      # 'ABANDONED',
                        datetime.utcnow().replace(tzinfo=pytz.UTC),
+                   ] + job_key_parameters + [
                        task_id,
                        worker_id,
                        settings.ASSIGNMENT_STATUS[0]       # 'PENDING_ANNOTATION'
                    ]
     )
+    count_abandoned_assignments = cursor.rowcount
     # 3. select from p1_w1_T where task = task and job = job for update
     cursor.execute(
         "SELECT _id, total_assigned, abandoned, pending_annotations, done FROM " +
         table_tasks +
-        " WHERE _id = %s FOR UPDATE",
-        [task_id]
+        " WHERE " + job_rows + " AND _id = %s FOR UPDATE",
+        job_key_parameters + [task_id]
     )
     task = cursor.fetchone()
 
@@ -1824,37 +3492,46 @@ def abandon(cursor, obj_job: job_components.Job, task_id: int, worker_id: int):
     cursor.execute(
         "UPDATE " +
         table_tasks +
-        " SET abandoned = %s, pending_annotations = %s, done = %s  WHERE _id = %s",
-        [task_abandoned, task_pending_annotations, task_done, task_id]
+        " SET abandoned = %s, pending_annotations = %s, done = %s  WHERE " + job_rows + " AND _id = %s",
+        [task_abandoned, task_pending_annotations, task_done] + job_key_parameters + [task_id]
     )
+    if task[4]:
+        # task is open for assignment again
+        requeue_task(obj_job=obj_job, task_id=task_id)
+    if count_abandoned_assignments > 0:
+        # once the task is open again, so that the workers woken up (at commit) find it
+        update_progress(cursor=cursor, obj_job=obj_job, in_progress_delta=-count_abandoned_assignments)
+        notify_tasks_available(cursor=cursor, obj_job=obj_job)
 
     return
 
 def abandon_lm(cursor, obj_job: job_components.Job, task_id: int, worker_id: int):
     # 1. create table_tasks variable, and table_task_assignments variable.
-    job_prefix_table_name = get_job_prefix_table_name(obj_job=obj_job)
-    table_tasks = job_prefix_table_name + "tasks"
-    table_assignments = job_prefix_table_name + "assignments"
+    table_tasks, table_assignments = get_job_table_names(cursor, obj_job, "tasks", "assignments")
 
     # 2. select from p1_w1_A where task = task and worker = worker and job_id = job_id for update
+    job_rows, job_key_parameters = get_job_key_condition(cursor, obj_job)
     cursor.execute("UPDATE " +
                    table_assignments +
-                   " SET status = %s, abandoned_at = %s WHERE _id = %s AND worker_id = %s AND status = %s",
+                   " SET status = %s, abandoned_at = %s WHERE " + job_rows +
+                   " AND _id = %s AND worker_id = %s AND status = %s",
                    [
                        settings.ASSIGNMENT_STATUS[2],      # 'ABANDONED',
                        datetime.utcnow().replace(tzinfo=pytz.UTC),
+                   ] + job_key_parameters + [
                        task_id,
                        worker_id,
                        settings.ASSIGNMENT_STATUS[0]       # 'PENDING_ANNOTATION'
                    ]
     )
+    count_abandoned_assignments = cursor.rowcount
     # 3. select from p1_w1_T where task = task and job = job for update
     # Steward case only cares about _id and done in the tasks table, other fields are solely for regular workers.
     cursor.execute(
         "SELECT _id, done FROM " +
         table_tasks +
-        " WHERE _id = %s FOR UPDATE",
-        [task_id]
+        " WHERE " + job_rows + " AND _id = %s FOR UPDATE",
+        job_key_parameters + [task_id]
     )
     task = cursor.fetchone()
 
@@ -1877,9 +3554,16 @@ def abandon_lm(cursor, obj_job: job_components.Job, task_id: int, worker_id: int
     cursor.execute(
         "UPDATE " +
         table_tasks +
-        " SET done = %s  WHERE _id = %s",
-        [task_done, task_id]
+        " SET done = %s  WHERE " + job_rows + " AND _id = %s",
+        [task_done] + job_key_parameters + [task_id]
     )
+    if task[1]:
+        # task is open for assignment again
+        requeue_task(obj_job=obj_job, task_id=task_id)
+    if count_abandoned_assignments > 0:
+        # once the task is open again, so that the workers woken up (at commit) find it
+        update_progress(cursor=cursor, obj_job=obj_job, in_progress_delta=-count_abandoned_assignments)
+        notify_tasks_available(cursor=cursor, obj_job=obj_job)
 
     return
 
@@ -1925,12 +3609,22 @@ def do_bookkeeping_3a_kn_part_2(
 
             # 2. copy tables from job level to run level
             # create the annotations per tuple per worker table
-            table_outputs = job_prefix_table_name + "outputs"
+            table_outputs, table_final_labels, table_tasks, table_assignments = get_job_table_names(
+                cursor, obj_job, "outputs", "final_labels", "tasks", "assignments"
+            )
+            # (only the rows of the job, without the job key, if it is in the global tables)
+            job_rows, job_key_parameters = get_job_key_condition(cursor, obj_job)
             cursor.execute(
                 "CREATE TABLE " +
                 annotations_per_tuple_per_worker_table_name +
-                " AS TABLE " +
-                table_outputs, []
+                " AS SELECT " + get_job_table_columns(cursor, obj_job, "outputs") + " FROM " +
+                table_outputs + " WHERE " + job_rows,
+                job_key_parameters
+            )
+            # the worker class is bookkeeping of the job, not part of the annotations handed to the rest of the workflow
+            cursor.execute(
+                "ALTER TABLE " + annotations_per_tuple_per_worker_table_name + " DROP COLUMN IF EXISTS worker_class",
+                []
             )
             # # 1. query for tuples
             # table_tuples = job_prefix_table_name + "tuples"
@@ -2003,12 +3697,12 @@ def do_bookkeeping_3a_kn_part_2(
 
             # create the aggregated annotations table
 
-            table_final_labels = job_prefix_table_name + "final_labels"
             cursor.execute(
                 "CREATE TABLE " +
                 aggregated_annotations_table_name +
-                " AS TABLE " +
-                table_final_labels, []
+                " AS SELECT " + get_job_table_columns(cursor, obj_job, "final_labels") + " FROM " +
+                table_final_labels + " WHERE " + job_rows,
+                job_key_parameters
             )
             # # 1. query for tuples
             # table_tuples = job_prefix_table_name + "tuples"
@@ -2077,12 +3771,18 @@ def do_bookkeeping_3a_kn_part_2(
             #     []
             # )
 
-            table_tasks = job_prefix_table_name + "tasks"
-            table_assignments = job_prefix_table_name + "assignments"
-            # delete indexes from job level tasks table and outputs table
-            cursor.execute("DROP INDEX IF EXISTS " + table_tasks + "_id_done")
-            cursor.execute("DROP INDEX IF EXISTS " + table_assignments + "_worker_id")
-            cursor.execute("DROP INDEX IF EXISTS " + table_outputs + "_worker_id")
+            # delete indexes from job level tasks table and outputs table (the global tables keep theirs)
+            if table_tasks == job_prefix_table_name + "tasks":
+                cursor.execute("DROP INDEX IF EXISTS " + table_tasks + "_id_done")
+                cursor.execute("DROP INDEX IF EXISTS " + table_tasks + "_open")
+                cursor.execute("DROP INDEX IF EXISTS " + table_tasks + "_in_progress")
+                cursor.execute("DROP INDEX IF EXISTS " + table_assignments + "_worker_id")
+                cursor.execute("DROP INDEX IF EXISTS " + table_assignments + "_status_timeout")
+                cursor.execute("DROP INDEX IF EXISTS " + table_outputs + "_worker_id")
+                cursor.execute("DROP INDEX IF EXISTS " + table_outputs + "_worker_id_id")
+            # the pre-rendered representations (if any) are derived from the tuples, no need to keep them
+            cursor.execute("DROP TABLE IF EXISTS " + job_prefix_table_name + "representations")
+            discard_ready_queue(obj_job=obj_job)
 
             # 3. update job in all_jobs (and release lock)
             obj_job.status = settings.JOB_STATUS[2]     # "COMPLETED"
@@ -2101,6 +3801,7 @@ def do_bookkeeping_3a_kn_part_2(
                     obj_job.id,
                 ]
             )
+            notify_job_status_changed(cursor=cursor, obj_job=obj_job)
 
             processed_3a_kn_part_2 = True
             return processed_3a_kn_part_2
@@ -2175,71 +3876,53 @@ def do_bookkeeping_3a_amt(
         annotations_per_tuple_per_worker_table_name: str,
         aggregated_annotations_table_name: str
 ):
-    """Do bookkeeping operations for 3a_amt job"""
+    """Do bookkeeping operations for 3a_amt job, in one transaction and a constant number of round trips"""
     cursor = connection.cursor()
     try:
         job_prefix_table_name = get_job_prefix_table_name(obj_job=obj_job)
+        statements = []
 
         # create and populate the parsed instructions in j_instructions table
         table_instructions = job_prefix_table_name + "amt_worker_instructions"
-        cursor.callproc('create_table_instructions', [table_instructions])
-        for key in instructions.keys():
-            value = instructions.get(key)
-            cursor.execute(
-                "INSERT into " + table_instructions +
-                " (type, content) VALUES (%s, %s)",
-                [key, value]
-            )
+        statements.append(("SELECT create_table_instructions(%s)", [table_instructions]))
+        statements.append(get_multi_row_insert(
+            table_name=table_instructions, columns=["type", "content"], rows=list(instructions.items())
+        ))
 
         table_layout = job_prefix_table_name + "layout"
-        cursor.callproc('create_table_layout', [table_layout])
-        for key in layout.keys():
-            value = layout.get(key)
-            cursor.execute(
-                "INSERT into " + table_layout +
-                " (type, content) VALUES (%s, %s)",
-                [key, value]
-            )
+        statements.append(("SELECT create_table_layout(%s)", [table_layout]))
+        statements.append(get_multi_row_insert(
+            table_name=table_layout, columns=["type", "content"], rows=list(layout.items())
+        ))
 
         # create and populate the config in j_config table
         table_configuration = job_prefix_table_name + "amt_config_parameters"
-        cursor.callproc('create_table_configuration', [table_configuration])
-        for key in configuration.keys():
-            value = configuration.get(key)
-            cursor.execute(
-                "INSERT into " + table_configuration +
-                " (key, value, value_data_type) VALUES (%s, %s, %s)",
-                [key, value, str(type(value))]
-            )
+        statements.append(("SELECT create_table_configuration(%s)", [table_configuration]))
+        statements.append(get_multi_row_insert(
+            table_name=table_configuration,
+            columns=["key", "value", "value_data_type"],
+            rows=[[key, value, str(type(value))] for key, value in configuration.items()]
+        ))
 
-        # TODO: date_creation also getting copied here. replace with updated timestamp of copying
         table_tuples = job_prefix_table_name + "amt_tuples"
-        cursor.execute(
-            "CREATE TABLE " +
-            table_tuples +
-            " AS TABLE " +
-            data_table_name,
-            []
-        )
-        cursor.execute(
-            "ALTER TABLE " +
-            table_tuples +
-            " ADD PRIMARY KEY (_id)",
-            []
-        )
+        statements.append(("CREATE VIEW " + table_tuples + " AS TABLE " + data_table_name, []))
 
         # create table related to storing tracking information about amt annotations
         table_tasks = job_prefix_table_name + "amt_tasks"
-        cursor.callproc('create_table_amt_tasks', [table_tasks])
+        statements.append(("SELECT create_table_amt_tasks(%s)", [table_tasks]))
 
         # create table related to storing amt annotations of data
         table_outputs = job_prefix_table_name + "amt_outputs"
-        cursor.callproc('create_table_amt_outputs', [table_outputs])
+        statements.append(("SELECT create_table_amt_outputs(%s)", [table_outputs]))
 
         # create table related to storing aggregated amt annotations of data
         table_final_labels = job_prefix_table_name + "amt_final_labels"
-        cursor.callproc('create_table_amt_final_labels', [table_final_labels])
+        statements.append(("SELECT create_table_amt_final_labels(%s)", [table_final_labels]))
 
+        with transaction.atomic():
+            execute_statements(cursor, statements=statements)
+            # the tuples are a view of the input, looked up by the input's index on _id
+            create_id_index(cursor, table_name=data_table_name)
         return
 
     except ValueError as err:
@@ -2584,6 +4267,9 @@ def do_bookkeeping_3a_amt_part_2(
                 table_final_labels, []
             )
 
+            # the pre-rendered representations (if any) are derived from the tuples, no need to keep them
+            cursor.execute("DROP TABLE IF EXISTS " + job_prefix_table_name + "amt_representations")
+
             # 3. update job in all_jobs (and release lock)
             obj_job.status = settings.JOB_STATUS[2]     # "COMPLETED"
             cursor.execute(
@@ -2601,6 +4287,7 @@ def do_bookkeeping_3a_amt_part_2(
                     obj_job.id,
                 ]
             )
+            notify_job_status_changed(cursor=cursor, obj_job=obj_job)
 
             processed_3a_amt_part_2 = True
             return processed_3a_amt_part_2
@@ -2649,12 +4336,13 @@ def get_layout(requester_id: int, project_id: int, workflow_id: int, run_id: int
 
 def get_count_tasks(obj_job: job_components.Job):
     """Get count of the tasks in the tasks table for this job"""
+    add_progress_table(obj_job=obj_job)
     cursor = connection.cursor()
     count_tasks_in_job: int = -1
     try:
         job_prefix_table_name = get_job_prefix_table_name(obj_job=obj_job)
-        table_tasks = job_prefix_table_name + "tasks"
-        cursor.execute("SELECT count(*) FROM " + table_tasks, [])
+        table_progress = job_prefix_table_name + "progress"
+        cursor.execute("SELECT total_tasks FROM " + table_progress, [])
         count_tasks_row = cursor.fetchone()
         count_tasks_in_job = int(count_tasks_row[0])
         # print("Count of tasks: ", count_tasks_in_job)
@@ -2668,19 +4356,23 @@ def get_count_tasks(obj_job: job_components.Job):
 
 def add_drive_by_votes_to_outputs(obj_job: job_components.Job, curations: list):
     """Add drive-by votes to the outputs table"""
+    add_vote_tally_table(obj_job=obj_job)
     cursor = connection.cursor()
     try:
-        job_prefix_table_name = get_job_prefix_table_name(obj_job=obj_job)
-        table_outputs = job_prefix_table_name + "outputs"
+        table_outputs = get_job_table_name(cursor, obj_job, "outputs")
+        job_key_column, job_key_placeholder, job_key_parameters = get_job_key_column(cursor, obj_job)
         for curation in curations:
             task_id = curation[0]
             worker_id = curation[1]
             annotation = curation[2]
-            cursor.execute(
-                "INSERT INTO " + table_outputs +
-                " (_id, worker_id, annotation) VALUES (%s, %s, %s)",
-                [task_id, worker_id, annotation]
-            )
+            with transaction.atomic():
+                cursor.execute(
+                    "INSERT INTO " + table_outputs +
+                    " (" + job_key_column + "_id, worker_id, annotation, worker_class) VALUES (" + job_key_placeholder +
+                    "%s, %s, %s, %s)",
+                    job_key_parameters + [task_id, worker_id, annotation, get_worker_class(worker_id=worker_id)]
+                )
+                tally_vote(cursor, obj_job, task_id, annotation, get_vote_tally_worker_class(obj_job=obj_job, worker_id=worker_id))
     except ValueError as err:
         print('Data access exception in add drive-by votes to outputs')
         print(err.args)
@@ -2689,12 +4381,12 @@ def add_drive_by_votes_to_outputs(obj_job: job_components.Job, curations: list):
 
 def aggregate_while_drive_by_curating(obj_job: job_components.Job, curations: list):
     """Aggregate while drive-by-curating"""
+    add_vote_tally_table(obj_job=obj_job)
     cursor = connection.cursor()
     try:
         job_prefix_table_name = get_job_prefix_table_name(obj_job=obj_job)
-        table_final_labels = job_prefix_table_name + "final_labels"
-        table_outputs = job_prefix_table_name + "outputs"
-        table_tasks = job_prefix_table_name + "tasks"
+        table_final_labels, table_outputs, table_tasks = get_job_table_names(cursor, obj_job, "final_labels", "outputs", "tasks")
+        job_rows, job_key_parameters = get_job_key_condition(cursor, obj_job)
         
         # check the config parameters table for this job to figure out the job_k, job_n, job_l, job_m if they exist
         table_config_parameters = job_prefix_table_name + "config_parameters"
@@ -2718,8 +4410,8 @@ def aggregate_while_drive_by_curating(obj_job: job_components.Job, curations: li
             # 1. If the task_id is already in the final_labels table, skip it.
             cursor.execute(
                 "SELECT _id FROM " + table_final_labels +
-                " WHERE _id = %s",
-                [task_id]
+                " WHERE " + job_rows + " AND _id = %s",
+                job_key_parameters + [task_id]
             )
             existing_final_label = cursor.fetchone()
             if existing_final_label:
@@ -2729,44 +4421,21 @@ def aggregate_while_drive_by_curating(obj_job: job_components.Job, curations: li
             cursor.execute(
                 "SELECT _id, total_assigned, abandoned, pending_annotations, done FROM " +
                 table_tasks +
-                " WHERE _id = %s FOR UPDATE",
-                [task_id]
+                " WHERE " + job_rows + " AND _id = %s FOR UPDATE",
+                job_key_parameters + [task_id]
             )
             task = cursor.fetchone()
             task_done = task[4]
 
-            # 2. Check if the votes for this task id converge in the outputs table.
+            # 2. Check if the votes for this task id converge in the vote tally.
             flag_k_votes_agree = False  # if k votes agree out of n
             final_annotation = settings.DEFAULT_AGGREGATION_LABEL  # 'undecided'
-            cursor.execute(
-                "SELECT VOTES_PER_ANNOTATION.annotation " +
-                "FROM ( " +
-                "   SELECT TASK_ANNOTATIONS.annotation, count(*) AS n_votes " +
-                "   FROM ( " +
-                "       SELECT _id, worker_id, annotation " +
-                "       FROM " + table_outputs + " " +
-                "       WHERE _id = %s " +
-                "   ) AS TASK_ANNOTATIONS " +
-                "   GROUP BY TASK_ANNOTATIONS.annotation " +
-                ") AS VOTES_PER_ANNOTATION " +
-                "WHERE VOTES_PER_ANNOTATION.n_votes >= %s",
-                [task_id, job_k]
-            )
-            final_annotation_row = cursor.fetchone()
-            if not final_annotation_row:
+            leading_annotation, n_leading_votes, n_task_annotations = get_leading_annotation_for_task(cursor, task_id, obj_job)
+            if n_leading_votes < job_k:
                 pass    # flag_k_votes_agree remains False
             else:
                 flag_k_votes_agree = True
-                final_annotation = final_annotation_row[0]
-
-            cursor.execute(
-                "SELECT count(*) AS n_task_annotations " +
-                "FROM " + table_outputs + " " +
-                "WHERE _id = %s ",
-                [task_id]
-            )
-            n_task_annotations_row = cursor.fetchone()
-            n_task_annotations = int(n_task_annotations_row[0])
+                final_annotation = leading_annotation
 
             # main logic
             # 3. If they converge, aggregate the task, and set done to True in the tasks table.
@@ -2798,8 +4467,8 @@ def aggregate_while_drive_by_curating(obj_job: job_components.Job, curations: li
             cursor.execute(
                 "UPDATE " +
                 table_tasks +
-                " SET done = %s  WHERE _id = %s",
-                [task_done, task_id]
+                " SET done = %s  WHERE " + job_rows + " AND _id = %s",
+                [task_done] + job_key_parameters + [task_id]
             )
             
         return
@@ -6,10 +6,14 @@ import controller.logic.job.helper_functions as job_helper_functions
 import controller.logic.run.components as run_components
 import controller.logic.run.data_access_operations as run_dao
 import controller.logic.run.helper_functions as run_helper_functions
+import controller.logic.workflow.components as workflow_components
+import controller.logic.workflow.data_access_operations as workflow_dao
 from controller.logic.common_logic_operations import multiple_replace, parse_string_to_list_of_strings
 from controller.logic.common_logic_operations import get_run_dir_path, get_job_prefix_table_name
+from controller.logic.common_logic_operations import get_workflow_dir_path, get_dataset_table_name, get_data_file_format
+from controller.logic.common_logic_operations import is_ingested_in_parallel
 
-import xmltodict, copy, collections, boto3, re, time
+import xmltodict, copy, collections, boto3, re, time, threading
 from pathlib import Path
 from distutils.util import strtobool
 
@@ -42,9 +46,8 @@ def process_3a_kn(
         id_field_name=id_field_name
     )
     # check if data is present
-    tuple_header = job_dao.get_data_headers_for_job(obj_job=obj_job)
-    tuple_rows = job_dao.get_data_rows_for_job(obj_job=obj_job)
-    if not tuple_rows:
+    count_tasks: int = job_dao.get_count_tasks(obj_job=obj_job)
+    if not count_tasks:
         """
         there is no data, so no submitting to cymphony jobs dashboard, 
             so no workers submitting annotations to cymphony, so no aggregations by cymphony
@@ -60,17 +63,37 @@ def process_3a_kn(
         submitted = False
         return submitted
 
-    # 2. mark this node's corresponding job to "running" (this will make the job appear on jobs dashboard)
+    # 2. if asked to, render the representation of each task up front, so that serving a task only reads it
+    if is_prerendering_representations(configuration=configuration):
+        task_question = str(configuration.get('question', ''))
+        if task_question.startswith('"') and task_question.endswith('"'):
+            task_question = task_question[1:-1]
+        compiled_layout = job_components.CompiledLayout(
+            tuple_header=job_dao.get_data_headers_for_job(obj_job=obj_job),
+            question=task_question.strip(),
+            design_layout=dict_layout['design_layout']
+        )
+        job_dao.prerender_representations(obj_job=obj_job, compiled_layout=compiled_layout)
+
+    # 3. mark this node's corresponding job to "running" (this will make the job appear on jobs dashboard)
     obj_job.status = settings.JOB_STATUS[1]     # "RUNNING"
     job_dao.edit_job(obj_job=obj_job)
     submitted = True
     return submitted
 
 
+def is_prerendering_representations(configuration: dict):
+    """Whether the representations of the job's tasks are to be pre-rendered, as configured for the job (or by default)"""
+    prerender = str(configuration.get('prerender_representations', settings.PRERENDER_REPRESENTATIONS)).strip('"')
+    return bool(strtobool(prerender))
+
+
 def process_read_table(
         input_file_name: str,
         obj_job: job_components.Job,
-        output_data_table_name: str
+        output_data_table_name: str,
+        column_types: dict = None,
+        infer_types: bool = settings.INFER_COLUMN_TYPES
 ):
     """Process the read_table job"""
     """
@@ -99,13 +122,98 @@ def process_read_table(
         if file_path.is_file():
             if file_path.name == input_file_name:
                 input_file_path = file_path
-    job_dao.create_table_from_file(source_file_path=input_file_path, target_table_name=output_data_table_name)
+    content_hash = None
+    if settings.DATASET_CACHE:
+        content_hash = get_uploaded_content_hash(obj_job=obj_job, input_file_path=input_file_path)
+    if content_hash is None:
+        count_rows, content_hash = create_table_from_input_file(
+            input_file_path=input_file_path,
+            target_table_name=output_data_table_name,
+            column_types=column_types,
+            infer_types=infer_types
+        )
+        print('read_table loaded ' + str(count_rows) + ' rows of ' + input_file_name + ' (sha256 ' + content_hash + ')')
+    else:
+        # ingest the file into the dataset table of its contents, unless an earlier run did already,
+        # and make the output table a view of it
+        dataset_table_name = get_dataset_table_name(
+            content_hash=content_hash,
+            infer_types=infer_types,
+            column_types=column_types
+        )
+        if not job_dao.create_view_of_dataset(
+                dataset_table_name=dataset_table_name,
+                target_table_name=output_data_table_name
+        ):
+            count_rows, content_hash = create_table_from_input_file(
+                input_file_path=input_file_path,
+                target_table_name=dataset_table_name,
+                column_types=column_types,
+                infer_types=infer_types,
+                content_hash=content_hash
+            )
+            print('read_table loaded ' + str(count_rows) + ' rows of ' + input_file_name + ' into ' + dataset_table_name)
+            job_dao.create_view_of_dataset(
+                dataset_table_name=dataset_table_name,
+                target_table_name=output_data_table_name
+            )
+        else:
+            print('read_table reused ' + dataset_table_name + ' for ' + input_file_name + ' (sha256 ' + content_hash + ')')
     # mark this node's corresponding job to "completed"
     obj_job.status = settings.JOB_STATUS[2]     # "COMPLETED"
     job_dao.edit_job(obj_job=obj_job)
     return
 
 
+def create_table_from_input_file(
+        input_file_path: Path,
+        target_table_name: str,
+        column_types: dict,
+        infer_types: bool,
+        content_hash: str = None
+):
+    """Ingest the input file of read_table into the table: a columnar file with its native types, a csv file by a
+    pool of processes if it is large enough.
+    Returns the count of rows loaded, and the content hash of the file"""
+    if get_data_file_format(input_file_path.name) in settings.COLUMNAR_FILE_EXTENSIONS:
+        # columns are of their native types, there is nothing to infer
+        return job_dao.create_table_from_columnar_file(
+            source_file_path=input_file_path,
+            target_table_name=target_table_name,
+            column_types=column_types,
+            content_hash=content_hash
+        )
+    if is_ingested_in_parallel(input_file_path):
+        return job_dao.create_table_from_file_in_parallel(
+            source_file_path=input_file_path,
+            target_table_name=target_table_name,
+            column_types=column_types,
+            infer_types=infer_types,
+            content_hash=content_hash
+        )
+    return job_dao.create_table_from_file(
+        source_file_path=input_file_path,
+        target_table_name=target_table_name,
+        column_types=column_types,
+        infer_types=infer_types,
+        content_hash=content_hash
+    )
+
+
+def get_uploaded_content_hash(obj_job: job_components.Job, input_file_path: Path):
+    """Content hash taken at upload of the workflow file the run's input file was copied from,
+    or None if it was not hashed or the workflow file is gone"""
+    obj_workflow: workflow_components.Workflow = workflow_dao.find_workflow(
+        workflow_id=obj_job.workflow_id,
+        project_id=obj_job.project_id,
+        user_id=obj_job.user_id
+    )
+    workflow_file_path = get_workflow_dir_path(obj_workflow=obj_workflow).joinpath(input_file_path.name)
+    if not workflow_file_path.is_file() or workflow_file_path.stat().st_size != input_file_path.stat().st_size:
+        return None
+    return workflow_dao.find_content_hash(file_path_str=str(workflow_file_path))
+
+
 def process_sample_random(
         input_table_name: str, sample_size: int,
         obj_job: job_components.Job,
@@ -141,6 +249,11 @@ def process_write_table(
     job_dao.edit_job(obj_job=obj_job)
 
 
+def get_job_key(user_id: int, project_id: int, workflow_id: int, run_id: int, job_id: int):
+    """Composite id of the job (user_id.project_id.workflow_id.run_id.job_id), as published on the notification channels"""
+    return '.'.join(str(part) for part in [user_id, project_id, workflow_id, run_id, job_id])
+
+
 def parse_instruction_file(instruction_file_path: Path):
     """Parse the instruction file supplied as part of 3a_kn or 3a_amt job"""
     # instruction_loc file contains 1. Short instructions, 2. Long instructions
@@ -157,28 +270,73 @@ def parse_instruction_file(instruction_file_path: Path):
     return instructions_intermediate_representation
 
 
-def assign_3a_kn(worker_id: int, obj_job: job_components.Job, job_k: int, job_n: int, task_annotation_time_limit: int, count_tasks: int):
-    """Assign task to worker"""
+def assign_3a_kn(worker_id: int, obj_job: job_components.Job, job_k: int, job_n: int, task_annotation_time_limit: int, count_tasks: int, assignment_priority: str = settings.ASSIGNMENT_PRIORITIES[0]):
+    """Assign task to worker. Returns (task id, tuple row of the task): (0, None) if no task, (-1, None) if the job is complete"""
     all_tasks_have_aggregated_labels: bool = job_dao.check_all_tasks_have_aggregated_labels(obj_job, count_tasks)
     if not all_tasks_have_aggregated_labels:
         # possibility of task being assigned to worker
-        return job_dao.assign_3a_kn(worker_id, obj_job, job_k, job_n, task_annotation_time_limit)
+        return job_dao.assign_3a_kn(worker_id, obj_job, job_k, job_n, task_annotation_time_limit, assignment_priority)
     else:
         # job is no more collecting annotations for any tasks
-        return -1
+        return -1, None
 
 
-def assign_3a_lm(worker_id: int, obj_job: job_components.Job, job_l: int, job_m: int, task_annotation_time_limit: int, count_tasks: int):
-    """Assign task to worker"""
+def assign_3a_lm(worker_id: int, obj_job: job_components.Job, job_l: int, job_m: int, task_annotation_time_limit: int, count_tasks: int, assignment_priority: str = settings.ASSIGNMENT_PRIORITIES[0]):
+    """Assign task to steward. Returns (task id, tuple row of the task): (0, None) if no task, (-1, None) if the job is complete"""
     all_tasks_have_aggregated_labels: bool = job_dao.check_all_tasks_have_aggregated_labels(obj_job, count_tasks)
     if not all_tasks_have_aggregated_labels:
         # possibility of task being assigned to worker
-        return job_dao.assign_3a_lm(worker_id, obj_job, job_l, job_m, task_annotation_time_limit)
+        return job_dao.assign_3a_lm(worker_id, obj_job, job_l, job_m, task_annotation_time_limit, assignment_priority)
+    else:
+        # job is no more collecting annotations for any tasks
+        return -1, None
+
+
+def lease_3a_kn(worker_id: int, obj_job: job_components.Job, job_k: int, job_n: int, task_annotation_time_limit: int, count_tasks: int, lease_size: int, assignment_priority: str = settings.ASSIGNMENT_PRIORITIES[0]):
+    """Lease up to lease_size tasks to worker"""
+    all_tasks_have_aggregated_labels: bool = job_dao.check_all_tasks_have_aggregated_labels(obj_job, count_tasks)
+    if not all_tasks_have_aggregated_labels:
+        # possibility of tasks being leased to worker
+        return job_dao.lease_3a_kn(worker_id, obj_job, job_k, job_n, task_annotation_time_limit, lease_size, assignment_priority)
+    else:
+        # job is no more collecting annotations for any tasks
+        return -1
+
+
+def lease_3a_lm(worker_id: int, obj_job: job_components.Job, job_l: int, job_m: int, task_annotation_time_limit: int, count_tasks: int, lease_size: int, assignment_priority: str = settings.ASSIGNMENT_PRIORITIES[0]):
+    """Lease up to lease_size tasks to steward"""
+    all_tasks_have_aggregated_labels: bool = job_dao.check_all_tasks_have_aggregated_labels(obj_job, count_tasks)
+    if not all_tasks_have_aggregated_labels:
+        # possibility of tasks being leased to steward
+        return job_dao.lease_3a_lm(worker_id, obj_job, job_l, job_m, task_annotation_time_limit, lease_size, assignment_priority)
     else:
         # job is no more collecting annotations for any tasks
         return -1
 
 
+# Process local compiled layouts of the jobs this process serves annotations for, keyed by job prefix table name.
+compiled_layouts = {}
+compiled_layouts_lock = threading.Lock()
+
+
+def get_compiled_layout(obj_job: job_components.Job, task_question: str, task_design_layout: str):
+    """Get the question and layout of this job compiled against its headers, compiling them on first use"""
+    job_prefix_table_name = get_job_prefix_table_name(obj_job=obj_job)
+    compiled_layout = compiled_layouts.get(job_prefix_table_name)
+    if compiled_layout is None or not compiled_layout.compiled_from(question=task_question, design_layout=task_design_layout):
+        # find the header
+        tuple_header = job_dao.get_data_headers_for_job(obj_job=obj_job)
+        compiled_layout = job_components.CompiledLayout(
+            tuple_header=tuple_header,
+            question=task_question,
+            design_layout=task_design_layout
+        )
+        compiled_layout.prerendered = job_dao.has_representations(obj_job=obj_job)
+        with compiled_layouts_lock:
+            compiled_layouts[job_prefix_table_name] = compiled_layout
+    return compiled_layout
+
+
 def get_annotation_page_3a_kn(
         obj_job: job_components.Job,
         task_id: int,
@@ -187,36 +345,31 @@ def get_annotation_page_3a_kn(
         task_option_list,
         task_short_instructions: str,
         task_long_instructions: str,
-        task_design_layout: str
+        task_design_layout: str,
+        tuple_row: dict = None
 ):
-    """Prepare annotation page of task for worker"""
-    # find the header
-    tuple_header = job_dao.get_data_headers_for_job(obj_job=obj_job)
-    tuple_id = task_id
-    tuple_row = job_dao.get_data_row_for_job(obj_job=obj_job, tuple_id=tuple_id)
-    header_value_dict = collections.OrderedDict()
-    for header in tuple_header:
-        header_value_dict[header] = tuple_row.get(header)
-    # prepare question
-    task_question = task_question.strip()
-    for key, value in header_value_dict.items():
-        variable_to_replace = '${' + key + '}'
-        task_question = task_question.replace(variable_to_replace, value)
-    # prepare tabular representation of the row (excluding id)
-    if task_design_layout == settings.DEFAULT_LAYOUT:
-        task_representation: str = "<table border=\"1px black\">"
-        for key, value in header_value_dict.items():
-            task_representation = task_representation + "<th>" + key + "</th>"
-        task_representation = task_representation + "<tr>"
-        for key, value in header_value_dict.items():
-            task_representation = task_representation + "<td>" + value + "</td>"
-        task_representation = task_representation + "</tr>"
-        task_representation = task_representation + "</table>"
+    """Prepare annotation page of task for worker. tuple_row is passed when it was fetched along with the assignment"""
+    compiled_layout: job_components.CompiledLayout = get_compiled_layout(
+        obj_job=obj_job,
+        task_question=task_question.strip(),
+        task_design_layout=task_design_layout
+    )
+    if tuple_row is None and compiled_layout.prerendered:
+        # read the row along with its question and representation, as rendered when the job started
+        tuple_id = task_id
+        tuple_row = job_dao.get_data_row_with_representation_for_job(obj_job=obj_job, tuple_id=tuple_id)
+        task_question = tuple_row.pop('_question')
+        task_representation: str = tuple_row.pop('_representation')
+        header_value_dict = compiled_layout.get_header_value_dict(tuple_row=tuple_row)
     else:
-        task_representation: str = task_design_layout
-        for key, value in header_value_dict.items():
-            variable_to_replace = '${' + key + '}'
-            task_representation = task_representation.replace(variable_to_replace, value)
+        if tuple_row is None:
+            tuple_id = task_id
+            tuple_row = job_dao.get_data_row_for_job(obj_job=obj_job, tuple_id=tuple_id)
+        header_value_dict = compiled_layout.get_header_value_dict(tuple_row=tuple_row)
+        # prepare question
+        task_question = compiled_layout.render_question(header_value_dict=header_value_dict)
+        # prepare tabular (or designed) representation of the row (excluding id)
+        task_representation: str = compiled_layout.render_representation(header_value_dict=header_value_dict)
     # materialized task representation
     task_option_list = task_option_list
     page_contents = {
@@ -365,8 +518,24 @@ def process_3a_amt(
     )
     # check if data is present
     tuple_header = job_dao.get_data_headers_for_3a_amt_job(obj_job=obj_job)
-    tuple_rows = job_dao.get_data_rows_for_3a_amt_job(obj_job=obj_job)
-    if not tuple_rows:
+    if is_prerendering_representations(configuration=configuration):
+        # render the representation of each task up front, the hits are then published by streaming them back in batches
+        compiled_layout = job_components.CompiledLayout(
+            tuple_header=[header for header in tuple_header if header != '_id'],
+            question=convert_specification_from_cymphony_to_amt(configuration=configuration)['Header'],
+            design_layout=dict_layout['design_layout']
+        )
+        count_tuples: int = job_dao.prerender_representations(
+            obj_job=obj_job,
+            compiled_layout=compiled_layout,
+            table_tuples_suffix="amt_tuples",
+            table_representations_suffix="amt_representations"
+        )
+        tuple_rows = None
+    else:
+        tuple_rows = job_dao.get_data_rows_for_3a_amt_job(obj_job=obj_job)
+        count_tuples: int = len(tuple_rows) if tuple_rows else 0
+    if not count_tuples:
         """
         there is no data, so no submitting to amt, or retrieval from amt
         instead, process second part of 3a_amt (copy job tables to run level tables and mark job as completed)
@@ -417,15 +586,57 @@ def process_3a_amt(
     # 4.2 put in tasks in the scaffolding and publish each hit
     categories = configuration_amt_specification['Categories']
     question_header = configuration_amt_specification['Header']
-    dict_task_id_vs_question = prepare_question_representations(question_header, tuple_header, tuple_rows)
-    dict_task_id_vs_representation = prepare_task_representations(design_layout, tuple_header, tuple_rows)
     tasks_per_hit: int = configuration_amt_specification['TasksPerHit'] # number of tasks clubbed together for one hit
     mapping_task_id_vs_hit_info = {}
-    batch_task_ids: list = []
-    counter_for_divisibility = 1
-    for task_id in dict_task_id_vs_representation.keys():
-        batch_task_ids.append(task_id)
-        if counter_for_divisibility % tasks_per_hit == 0:   # just hit the tasks limit for this hit
+    if tuple_rows is None:
+        # stream the pre-rendered representations, one hit worth of tasks at a time
+        for representation_rows in job_dao.get_representations_for_job_in_batches(
+                obj_job=obj_job,
+                batch_size=tasks_per_hit,
+                table_representations_suffix="amt_representations"
+        ):
+            batch_task_ids: list = [representation_row['_id'] for representation_row in representation_rows]
+            hit_info: dict = prepare_and_push_hit(
+                batch_task_ids=batch_task_ids,
+                dict_task_id_vs_representation={row['_id']: row['representation'] for row in representation_rows},
+                dict_task_id_vs_question={row['_id']: row['question'] for row in representation_rows},
+                categories=categories,
+                html_question_scaffolding=html_question_scaffolding,
+                mturk_client=mturk,
+                configuration_amt_specification=configuration_amt_specification
+            )
+            add_to_mapping_task_id_vs_hit_info(
+                mapping_task_id_vs_hit_info=mapping_task_id_vs_hit_info,
+                batch_task_ids=batch_task_ids,
+                hit_info=hit_info
+            )
+    else:
+        dict_task_id_vs_question = prepare_question_representations(question_header, tuple_header, tuple_rows)
+        dict_task_id_vs_representation = prepare_task_representations(design_layout, tuple_header, tuple_rows)
+        batch_task_ids: list = []
+        counter_for_divisibility = 1
+        for task_id in dict_task_id_vs_representation.keys():
+            batch_task_ids.append(task_id)
+            if counter_for_divisibility % tasks_per_hit == 0:   # just hit the tasks limit for this hit
+                hit_info: dict = prepare_and_push_hit(
+                    batch_task_ids=batch_task_ids,
+                    dict_task_id_vs_representation=dict_task_id_vs_representation,
+                    dict_task_id_vs_question=dict_task_id_vs_question,
+                    categories=categories,
+                    html_question_scaffolding=html_question_scaffolding,
+                    mturk_client=mturk,
+                    configuration_amt_specification=configuration_amt_specification
+                )
+                add_to_mapping_task_id_vs_hit_info(
+                    mapping_task_id_vs_hit_info=mapping_task_id_vs_hit_info,
+                    batch_task_ids=batch_task_ids,
+                    hit_info=hit_info
+                )
+                batch_task_ids = [] # empty batch since it has been pushed as a hit
+            counter_for_divisibility = counter_for_divisibility + 1
+        # if there are still some tasks in the batch_task_ids list, it means that they haven't been pushed yet.
+        if len(batch_task_ids) > 0:     # will also be less than tasks_per_hit
+            # prepare hit for this remaining batch of tasks
             hit_info: dict = prepare_and_push_hit(
                 batch_task_ids=batch_task_ids,
                 dict_task_id_vs_representation=dict_task_id_vs_representation,
@@ -440,26 +651,7 @@ def process_3a_amt(
                 batch_task_ids=batch_task_ids,
                 hit_info=hit_info
             )
-            batch_task_ids = [] # empty batch since it has been pushed as a hit
-        counter_for_divisibility = counter_for_divisibility + 1
-    # if there are still some tasks in the batch_task_ids list, it means that they haven't been pushed yet.
-    if len(batch_task_ids) > 0:     # will also be less than tasks_per_hit
-        # prepare hit for this remaining batch of tasks
-        hit_info: dict = prepare_and_push_hit(
-            batch_task_ids=batch_task_ids,
-            dict_task_id_vs_representation=dict_task_id_vs_representation,
-            dict_task_id_vs_question=dict_task_id_vs_question,
-            categories=categories,
-            html_question_scaffolding=html_question_scaffolding,
-            mturk_client=mturk,
-            configuration_amt_specification=configuration_amt_specification
-        )
-        add_to_mapping_task_id_vs_hit_info(
-            mapping_task_id_vs_hit_info=mapping_task_id_vs_hit_info,
-            batch_task_ids=batch_task_ids,
-            hit_info=hit_info
-        )
-        batch_task_ids = []  # empty batch since it has been pushed as a hit
+            batch_task_ids = []  # empty batch since it has been pushed as a hit
 
     # 5. initialize tasks table
     job_dao.populate_tasks_table_for_amt_job(
@@ -636,23 +828,19 @@ def prepare_question_representations(question, tuple_header, tuple_rows):
     """Prepare task id vs it's corresponding question representation"""
     # task id vs question's representation in string format
     dict_task_id_vs_question_representation: dict = {}
+    # compile the question once, for the columns of the rows (excluding _id)
+    compiled_layout = job_components.CompiledLayout(
+        tuple_header=[header for header in tuple_header if header != '_id'],
+        question=question,
+        design_layout=settings.DEFAULT_LAYOUT
+    )
     # for each row
     for tuple_row in tuple_rows:
-        # column name vs value, for the row
-        header_value_dict = collections.OrderedDict()
-        for header in tuple_header:
-            header_value_dict[header] = tuple_row.get(header)
         # retrieve the task id of this row
-        task_id_key = '_id'
-        task_id = -1
-        if task_id_key in header_value_dict:
-            # remove the id key, value from the dict and store the id
-            task_id = header_value_dict.pop(task_id_key)
+        task_id = tuple_row.get('_id', -1)
         # prepare question representation of the row (excluding _id)
-        question_representation: str = question
-        for key, value in header_value_dict.items():
-            variable_to_replace = '${' + key + '}'
-            question_representation = question_representation.replace(variable_to_replace, value)
+        header_value_dict = compiled_layout.get_header_value_dict(tuple_row=tuple_row)
+        question_representation: str = compiled_layout.render_question(header_value_dict=header_value_dict)
         # materialized question representation
         dict_task_id_vs_question_representation[task_id] = question_representation
     return dict_task_id_vs_question_representation
@@ -662,49 +850,21 @@ def prepare_task_representations(design_layout, tuple_header, tuple_rows):
     """Prepare task id vs how the task data is represented in tabular format"""
     # task id vs task's tabular representation in string format
     dict_task_id_vs_representation: dict = {}
-    if design_layout == settings.DEFAULT_LAYOUT:
-        # for each row
-        for tuple_row in tuple_rows:
-            # column name vs value, for the row
-            header_value_dict = collections.OrderedDict()
-            for header in tuple_header:
-                header_value_dict[header] = tuple_row.get(header)
-            # retrieve the task id of this row
-            task_id_key = '_id'
-            task_id = -1
-            if task_id_key in header_value_dict:
-                # remove the id key, value from the dict and store the id
-                task_id = header_value_dict.pop(task_id_key)
-            # prepare tabular representation of the row (excluding _id)
-            task_representation: str = "<table border=\"1px black\">"
-            for key, value in header_value_dict.items():
-                task_representation = task_representation + "<th>" + key + "</th>"
-            task_representation = task_representation + "<tr>"
-            for key, value in header_value_dict.items():
-                task_representation = task_representation + "<td>" + value + "</td>"
-            task_representation = task_representation + "</tr>"
-            task_representation = task_representation + "</table>"
-            dict_task_id_vs_representation[task_id] = task_representation
-    else:
-        # for each row
-        for tuple_row in tuple_rows:
-            # column name vs value, for the row
-            header_value_dict = collections.OrderedDict()
-            for header in tuple_header:
-                header_value_dict[header] = tuple_row.get(header)
-            # retrieve the task id of this row
-            task_id_key = '_id'
-            task_id = -1
-            if task_id_key in header_value_dict:
-                # remove the id key, value from the dict and store the id
-                task_id = header_value_dict.pop(task_id_key)
-            # prepare tabular representation of the row (excluding _id)
-            task_representation: str = design_layout
-            for key, value in header_value_dict.items():
-                variable_to_replace = '${' + key + '}'
-                task_representation = task_representation.replace(variable_to_replace, value)
-            # materialized task representation
-            dict_task_id_vs_representation[task_id] = task_representation
+    # compile the layout once, for the columns of the rows (excluding _id)
+    compiled_layout = job_components.CompiledLayout(
+        tuple_header=[header for header in tuple_header if header != '_id'],
+        question='',
+        design_layout=design_layout
+    )
+    # for each row
+    for tuple_row in tuple_rows:
+        # retrieve the task id of this row
+        task_id = tuple_row.get('_id', -1)
+        # prepare tabular (or designed) representation of the row (excluding _id)
+        header_value_dict = compiled_layout.get_header_value_dict(tuple_row=tuple_row)
+        task_representation: str = compiled_layout.render_representation(header_value_dict=header_value_dict)
+        # materialized task representation
+        dict_task_id_vs_representation[task_id] = task_representation
     return dict_task_id_vs_representation
 
 
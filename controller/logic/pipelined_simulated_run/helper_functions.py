@@ -529,7 +529,9 @@ def progress_dag(
             job_helper_functions.process_read_table(
                 input_file_name=information.get('input_file_name'),
                 obj_job=obj_job,
-                output_data_table_name=information.get('output_table_name')
+                output_data_table_name=information.get('output_table_name'),
+                column_types=information.get('column_types'),
+                infer_types=information.get('infer_types')
             )
             explore_dag = True
 
@@ -620,22 +622,24 @@ def process_tangential_pipeline(
     # and then marks the dag run as complete.
 
     # create output table once
-    job_prefix_table_name = get_job_prefix_table_name(obj_job=this_job)
-    table_tasks = job_prefix_table_name + "tasks"
-    table_outputs = job_prefix_table_name + "outputs"
-    table_final_labels = job_prefix_table_name + "final_labels"
     cursor = connection.cursor()
+    table_tasks, table_outputs, table_final_labels = job_dao.get_job_table_names(
+        cursor, this_job, "tasks", "outputs", "final_labels"
+    )
+    job_rows, job_key_parameters = job_dao.get_job_key_condition(cursor, this_job)
     cursor.execute(
         "CREATE TABLE " +
         annotations_per_tuple_per_worker_table_name +
-        " AS TABLE " +
-        table_outputs, []
+        " AS SELECT " + job_dao.get_job_table_columns(cursor, this_job, "outputs") + " FROM " +
+        table_outputs + " WHERE " + job_rows,
+        job_key_parameters
     )
     cursor.execute(
         "CREATE TABLE " +
         aggregated_annotations_table_name +
-        " AS TABLE " +
-        table_final_labels, []
+        " AS SELECT " + job_dao.get_job_table_columns(cursor, this_job, "final_labels") + " FROM " +
+        table_final_labels + " WHERE " + job_rows,
+        job_key_parameters
     )
     cursor.execute("ALTER TABLE " + annotations_per_tuple_per_worker_table_name + " ADD CONSTRAINT " +
                    annotations_per_tuple_per_worker_table_name + "_id_worker_annotation_uniq UNIQUE (_id, worker_id, annotation);")
@@ -652,10 +656,10 @@ def process_tangential_pipeline(
         # pull results from final_labels and put to output table that are new
         cursor.execute(
             "INSERT INTO " + annotations_per_tuple_per_worker_table_name + "(_id, worker_id, annotation) " +
-            "SELECT _id, worker_id, annotation FROM " + table_outputs +
+            "SELECT _id, worker_id, annotation FROM " + table_outputs + " WHERE " + job_rows +
             " ON CONFLICT (_id, worker_id, annotation) DO NOTHING" +
             " RETURNING _id, worker_id, annotation;",
-            []
+            job_key_parameters
         )
         task_output_rows = dict_fetchall(cursor)
         print(task_output_rows)
@@ -665,10 +669,10 @@ def process_tangential_pipeline(
         # pull results from final_labels and put to output table that are new
         cursor.execute(
             "INSERT INTO " + aggregated_annotations_table_name + "(_id, label) " +
-            "SELECT _id, label FROM " + table_final_labels +
+            "SELECT _id, label FROM " + table_final_labels + " WHERE " + job_rows +
             " ON CONFLICT (_id, label) DO NOTHING" +
             " RETURNING _id, label;",
-            []
+            job_key_parameters
         )
         task_final_label_rows = dict_fetchall(cursor)
         print(task_final_label_rows)
@@ -898,14 +902,14 @@ def process_tangential_pipeline(
             # did the burst I just processed the last one for the 3a_kn and did that burst go all the way through
             # if yes, then dag processing is complete, mark the run as complete, and exit the thread.
             cursor.execute("SELECT count(*) FROM " +
-                           table_tasks,
-                           [])
+                           table_tasks + " WHERE " + job_rows,
+                           job_key_parameters)
             count_tasks_row = cursor.fetchone()
             count_tasks_in_job = int(count_tasks_row[0])
 
             cursor.execute("SELECT count(*) FROM " +
-                           table_final_labels,
-                           [])
+                           table_final_labels + " WHERE " + job_rows,
+                           job_key_parameters)
             count_final_labels_row = cursor.fetchone()
             count_final_labels_in_job = int(count_final_labels_row[0])
             # print('Number of rows in tasks: ', count_tasks_in_job, ' : ', type(count_tasks_in_job))
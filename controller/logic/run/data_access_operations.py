@@ -3,10 +3,12 @@ from django.utils import timezone
 from django.conf import settings
 
 import controller.logic.run.components as run_components
-from controller.logic.common_data_access_operations import dict_fetchall, dict_fetchone
-from controller.logic.common_logic_operations import get_run_prefix_table_name
+from controller.logic.common_data_access_operations import dict_fetchall, dict_fetchone, read_columnar_file, open_data_file
+from controller.logic.common_data_access_operations import count_records_up_to
+from controller.logic.common_logic_operations import get_run_prefix_table_name, parse_column_types, get_data_file_format
+from controller.logic.common_logic_operations import get_input_max_records
 
-import csv, re, shutil
+import csv, re, shutil, os, locale
 from collections import OrderedDict
 from pathlib import Path
 
@@ -155,8 +157,15 @@ def copy_source_contents_to_target_dir(source_dir: Path, target_dir: Path):
         if source_dir.is_dir():
             for source_file_path in source_dir.iterdir():
                 if source_file_path.is_file():
-                    # if a file with this name already exists in the target dir, it will be overwritten
-                    shutil.copy(src=str(source_file_path), dst=str(target_dir))
+                    # uploaded files are never modified in place, so a hard link is as good as a copy,
+                    # without copying the (possibly large) data files. copy where the fs cannot link.
+                    target_file_path = target_dir.joinpath(source_file_path.name)
+                    # if a file with this name already exists in the target dir, it will be replaced
+                    target_file_path.unlink(missing_ok=True)
+                    try:
+                        os.link(src=str(source_file_path), dst=str(target_file_path))
+                    except OSError:
+                        shutil.copy(src=str(source_file_path), dst=str(target_dir))
         return
     except ValueError as err:
         print(err.args)
@@ -409,27 +418,54 @@ def check_semantics_operators(intermediate_program_representation: OrderedDict,
                 if m is None:
                     raise ValueError("Output variable of read_table does not follow naming conventions")
                 # arguments
-                # check if only one argument
-                if len(arguments) > 1:
-                    raise ValueError("Only one argument allowed for read_table")
-                input_argument = str(arguments[0])
+                # one input file argument, optionally with the key-value pairs infer_types=true and
+                # types=["column:type", ...] like read_table("xyz.csv", infer_types=true, types=["age:integer"])
+                input_arguments = []
+                column_types = dict()
+                for argument in arguments:
+                    argument = str(argument).strip()
+                    if '=' in argument and not argument.startswith('"'):
+                        key_value = argument.split("=", 1)
+                        key_value = [x.strip() for x in key_value]
+                        if key_value[0] == 'infer_types':
+                            if key_value[1].lower() not in ['true', 'false']:
+                                raise ValueError("infer_types of read_table has to be true or false")
+                        elif key_value[0] == 'types':
+                            if not (key_value[1].startswith('[') and key_value[1].endswith(']')):
+                                raise ValueError("types of read_table has to be a list of column:type string literals")
+                            column_types = parse_column_types(key_value[1])
+                        else:
+                            raise ValueError("Unknown key-value argument for read_table")
+                    else:
+                        input_arguments.append(argument)
+                # check if only one input file argument
+                if len(input_arguments) != 1:
+                    raise ValueError("Only one input file argument allowed for read_table")
+                input_argument = input_arguments[0]
                 # the read_table argument has to be a string literal
                 if not (input_argument.startswith('"') and input_argument.endswith('"')):
                     raise ValueError("Input to read_table has to be a string literal")
                 input_file_name = input_argument[1:-1]
-                # check if extension is csv
-                if not input_file_name.endswith(".csv"):
-                    raise ValueError("Input argument to read_table does not represent a csv file")
-                # Check if the csv file has been uploaded
+                # check if extension is csv (compressed or not), or a columnar format
+                input_file_format = get_data_file_format(input_file_name)
+                if input_file_format not in settings.INPUT_FILE_EXTENSIONS:
+                    raise ValueError("Input argument to read_table does not represent a csv, parquet or arrow file")
+                if input_file_format != Path(input_file_name).suffix and input_file_format != '.csv':
+                    raise ValueError("Only csv input files to read_table can be compressed")
+                # Check if the data file has been uploaded
                 file_path = run_dir_path.joinpath(input_file_name)
                 # print(file_path)
                 if not file_path.is_file():
                     raise ValueError("read_table input file was not uploaded to file system")
-                # open data file to record some basic stats
-                with file_path.open() as data_file:
-                    csv_reader = csv.reader(data_file)
-                    headers = next(csv_reader)
-                    row_count = sum(1 for row in csv_reader) # this will not include header row
+                # open data file to read its headers
+                if file_path.suffix in settings.COLUMNAR_FILE_EXTENSIONS:
+                    # the column names of a columnar file are in its schema
+                    with read_columnar_file(file_path) as (schema, num_rows, batches):
+                        headers = schema.names
+                else:
+                    with open_data_file(file_path) as data_file:
+                        csv_reader = csv.reader([data_file.readline().decode(locale.getpreferredencoding(False))])
+                        headers = next(csv_reader)
                 # Check header conventions and max limit
                 for header in headers:
                     m = naming_convention_regex.match(header.strip())
@@ -437,8 +473,13 @@ def check_semantics_operators(intermediate_program_representation: OrderedDict,
                         raise ValueError("One or more header of input data file does not follow naming conventions")
                 if len(headers) > settings.INPUT_N_MAX_HEADERS:
                     raise ValueError("Number of columns in data file exceeds the maximum allowed")
-                # Check records limit
-                if row_count > settings.INPUT_N_MAX_RECORDS:
+                # Check the declared column types are of columns of the data file
+                for column in column_types:
+                    if column not in [header.strip() for header in headers]:
+                        raise ValueError("Type declared for a column not in the data file: " + column)
+                # Check records limit, cheaply (loading the file checks it again, exactly)
+                max_records = get_input_max_records(file_path)
+                if count_records_up_to(file_path, max_records=max_records) > max_records:
                     raise ValueError("Number of records in data file exceeds the maximum allowed")
             elif operator == settings.AUTOMATIC_OPERATORS[3]:   # 'write_table'
                 # variables
@@ -12,12 +12,14 @@ import controller.logic.job.data_access_operations as job_dao
 import controller.logic.job.helper_functions as job_helper_functions
 from controller.logic.common_logic_operations import multiple_replace
 from controller.logic.common_logic_operations import cantor_pairing, get_run_dir_path, get_run_prefix_table_name
+from controller.logic.common_logic_operations import parse_column_types
 
 from cryptography.fernet import Fernet
 from cryptography.hazmat.primitives import hashes
 from cryptography.hazmat.primitives.kdf.pbkdf2 import PBKDF2HMAC
 from collections import OrderedDict
 from pathlib import Path
+from distutils.util import strtobool
 import requests
 from requests import Session
 from urllib3.util.retry import Retry
@@ -168,13 +170,26 @@ def extract_dag_data_for_processing_read_table_job(
     """Helper function for processing read_table job"""
     relevant_data = dict()  # answer variable
 
-    input_file_node: run_components.Node = next(iter(incoming_nodes))
-    input_file_name: str = input_file_node.name
-    input_file_name = input_file_name[1:-1]  # input file name to read_table was a string literal by allowed semantics
+    input_file_name = None
+    column_types = None
+    infer_types = settings.INFER_COLUMN_TYPES
+    for input_node in incoming_nodes:
+        if '=' in input_node.name and not input_node.name.startswith('"'):
+            # key-value pair
+            key_value = input_node.name.split("=", 1)
+            key_value = [x.strip() for x in key_value]
+            if key_value[0] == 'infer_types':
+                infer_types = bool(strtobool(key_value[1]))
+            elif key_value[0] == 'types':
+                column_types = parse_column_types(key_value[1])
+        else:
+            input_file_name = input_node.name[1:-1]  # input file name to read_table was a string literal by allowed semantics
     output_table_node: run_components.Node = next(iter(outgoing_nodes))
     output_table_name: str = run_prefix_table_name + output_table_node.name
     relevant_data['input_file_name'] = input_file_name
     relevant_data['output_table_name'] = output_table_name
+    relevant_data['column_types'] = column_types
+    relevant_data['infer_types'] = infer_types
     return relevant_data
 
 
@@ -455,7 +470,9 @@ def progress_dag(
             job_helper_functions.process_read_table(
                 input_file_name=information.get('input_file_name'),
                 obj_job=obj_job,
-                output_data_table_name=information.get('output_table_name')
+                output_data_table_name=information.get('output_table_name'),
+                column_types=information.get('column_types'),
+                infer_types=information.get('infer_types')
             )
             explore_dag = True
         elif node.name == settings.AUTOMATIC_OPERATORS[1]:  # "sample_random"
@@ -442,8 +442,8 @@ def get_stats_of_worker_annotations(obj_job: job_components.Job):
     """Calculate worker statistics"""
     cursor = connection.cursor()
     try:
-        job_prefix_table_name = get_job_prefix_table_name(obj_job=obj_job)
-        table_outputs = job_prefix_table_name + "outputs"
+        table_outputs = job_dao.get_job_table_name(cursor, obj_job, "outputs")
+        job_rows, job_key_parameters = job_dao.get_job_key_condition(cursor, obj_job)
         cursor.execute(
             "select " +
                 "min(t.n_annotations), " +
@@ -456,9 +456,10 @@ def get_stats_of_worker_annotations(obj_job: job_components.Job):
                         "count(*) as n_annotations " +
                     "from " +
                         table_outputs + " " +
+                    "where " + job_rows + " " +
                     "group by worker_id "
                 ") as t ",
-            []
+            job_key_parameters
         )
         statistics_row = cursor.fetchone()
         min_annotations = statistics_row[0]
@@ -477,9 +478,8 @@ def get_accuracy(obj_job: job_components.Job):
     """Get accuracy of worker labels"""
     cursor = connection.cursor()
     try:
-        job_prefix_table_name = get_job_prefix_table_name(obj_job=obj_job)
-        table_tuples = job_prefix_table_name + "tuples"
-        table_final_labels = job_prefix_table_name + "final_labels"
+        table_tuples, table_final_labels = job_dao.get_job_table_names(cursor, obj_job, "tuples", "final_labels")
+        job_rows, job_key_parameters = job_dao.get_job_key_condition(cursor, obj_job)
 
         # 1. query for tuples
         cursor.execute(
@@ -519,6 +519,9 @@ def get_accuracy(obj_job: job_components.Job):
         columns = [col[0] for col in cursor.description]
         if 'date_creation' in columns:
             columns.remove('date_creation')
+        # the global final labels table (if the job is in it) has the job key besides
+        if 'job_key' in columns:
+            columns.remove('job_key')
         columns.remove('_id')
         column_list = "_id"
         for column in columns:
@@ -526,7 +529,8 @@ def get_accuracy(obj_job: job_components.Job):
         query_string_final_labels = "SELECT " + \
                               column_list + \
                               " FROM " + \
-                              table_final_labels
+                              table_final_labels + \
+                              " WHERE " + job_rows
 
         # 3. prepare aggregated annotations tuple by joining above two
         gold_label_column = settings.GOLD_LABEL_COLUMN_NAME
@@ -544,7 +548,7 @@ def get_accuracy(obj_job: job_components.Job):
                 query_string_final_labels +
                 ") AS T2" +
             " USING(_id)",
-            []
+            job_key_parameters
         )
         tuples_joined_final_labels = dict_fetchall(cursor)
         matches = 0
@@ -588,20 +592,21 @@ def get_e2e_time(obj_job: job_components.Job):
     time_interval = -1
     cursor = connection.cursor()
     try:
-        job_prefix_table_name = get_job_prefix_table_name(obj_job=obj_job)
-        table_assignments = job_prefix_table_name + "assignments"
-        table_final_labels = job_prefix_table_name + "final_labels"
+        table_assignments, table_final_labels = job_dao.get_job_table_names(cursor, obj_job, "assignments", "final_labels")
+        job_rows, job_key_parameters = job_dao.get_job_key_condition(cursor, obj_job)
         cursor.execute(
             "select "
             "(SELECT date_creation FROM " +
             table_final_labels +
+            " WHERE " + job_rows +
             " ORDER BY date_creation DESC LIMIT 1)" +
             " - " +
             "(SELECT date_creation FROM " +
             table_assignments +
+            " WHERE " + job_rows +
             " ORDER BY date_creation ASC LIMIT 1)" +
             " AS time_interval",
-            []
+            job_key_parameters + job_key_parameters
         )
         time_interval_row = cursor.fetchone()
         if time_interval_row:
@@ -7,7 +7,7 @@ import controller.logic.project.helper_functions as project_helper_functions
 import controller.logic.workflow.helper_functions as workflow_helper_functions
 import controller.logic.workflow.data_access_operations as workflow_dao
 import controller.logic.project.data_access_operations as project_dao
-from controller.logic.common_logic_operations import get_workflow_dir_path
+from controller.logic.common_logic_operations import get_workflow_dir_path, get_data_file_format
 
 
 def index(request:HttpRequest):
@@ -176,7 +176,7 @@ def edit_workflow_upload_files(request: HttpRequest):
                 file_type = settings.UPLOADED_FILE_TYPES[2]     # it is inst type
             elif settings.DESIGN_LAYOUT_BEGIN in file_contents and settings.DESIGN_LAYOUT_END in file_contents:
                 file_type = settings.UPLOADED_FILE_TYPES[3]     # it is layout type
-        elif extension == '.csv':
+        elif get_data_file_format(file_path.name) in settings.INPUT_FILE_EXTENSIONS:
             file_type = settings.UPLOADED_FILE_TYPES[1]
 
         obj_workflow_file = workflow_components.WorkflowFile(
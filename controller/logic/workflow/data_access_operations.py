@@ -7,6 +7,7 @@ import controller.logic.workflow.components as workflow_components
 from controller.logic.common_data_access_operations import dict_fetchall, dict_fetchone
 
 from pathlib import Path
+import hashlib
 
 
 def find_all_workflows(user_id: int, project_id: int):
@@ -160,6 +161,43 @@ def edit_workflow_basic_info(obj_workflow: workflow_components.Workflow):
         cursor.close()
 
 
+# content hashes of the uploaded data files, by file path, kept only with settings.DATASET_CACHE on.
+# the table is created by the create_shared_tables management command
+table_dataset_files = "all_dataset_files"
+
+
+def create_table_dataset_files(cursor):
+    """Create the table of content hashes of uploaded data files, unless it exists"""
+    cursor.execute(
+        "CREATE TABLE IF NOT EXISTS " +
+        table_dataset_files +
+        " (file_path text PRIMARY KEY, content_hash text NOT NULL, date_creation TIMESTAMP WITH TIME ZONE)",
+        []
+    )
+
+
+def find_content_hash(file_path_str: str):
+    """Return the sha256 hex digest of the uploaded data file, or None if it was not hashed at upload"""
+
+    if not settings.DATASET_CACHE:
+        return None
+    cursor = connection.cursor()
+    try:
+        cursor.execute(
+            "SELECT content_hash FROM " + table_dataset_files + " WHERE file_path = %s",
+            [file_path_str]
+        )
+        row = cursor.fetchone()
+        return row[0] if row is not None else None
+
+    except ValueError as err:
+        print(err.args)
+        raise ValueError('Data access exception in find content hash')
+
+    finally:
+        cursor.close()
+
+
 def store_uploaded_file(obj_workflow_file: workflow_components.WorkflowFile, f: UploadedFile):
     """Store this file and store ledger entry"""
 
@@ -173,8 +211,11 @@ def store_uploaded_file(obj_workflow_file: workflow_components.WorkflowFile, f:
         if file_path.is_file():
             raise ValueError("File with this name already exists")
 
+        # hash the contents on the way to the disk, so that a data file can be matched with an ingested table
+        content_hash = hashlib.sha256()
         with file_path.open("wb+") as destination:
             for chunk in f.chunks():
+                content_hash.update(chunk)
                 destination.write(chunk)
 
         file_path_str = str(file_path)
@@ -219,6 +260,19 @@ def store_uploaded_file(obj_workflow_file: workflow_components.WorkflowFile, f:
                     obj_workflow_file.id_field_name
                 ]
             )
+            if settings.DATASET_CACHE:
+                cursor.execute(
+                    "INSERT INTO " +
+                    table_dataset_files +
+                    " (file_path, content_hash, date_creation) VALUES (%s, %s, %s)" +
+                    " ON CONFLICT (file_path) DO UPDATE SET content_hash = EXCLUDED.content_hash," +
+                    " date_creation = EXCLUDED.date_creation",
+                    [
+                        file_path_str,
+                        content_hash.hexdigest(),
+                        timezone.now()
+                    ]
+                )
         elif obj_workflow_file.type == settings.UPLOADED_FILE_TYPES[3]:
             cursor.execute(
                 "INSERT into " +
@@ -294,6 +348,11 @@ def delete_uploaded_file(file_type: str, file_id: int, workflow_id: int, project
                     obj_workflow_file.user_id
                 ]
             )
+            if settings.DATASET_CACHE:
+                cursor.execute(
+                    "DELETE FROM " + table_dataset_files + " WHERE file_path = %s",
+                    [file_path_str]
+                )
         elif obj_workflow_file.type == settings.UPLOADED_FILE_TYPES[3]:
             cursor.execute(
                 "DELETE FROM " +
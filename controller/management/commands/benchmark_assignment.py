@@ -0,0 +1,169 @@
+"""
+Usage:
+    python manage.py benchmark_assignment --sizes 10000 100000 500000 --samples 200
+
+This command builds throwaway 3a_kn jobs of the given sizes (number of tuples), fills their outputs tables as if
+the first half of each job had already been annotated by k workers, and reports the p50/p99 latency of picking
+and locking a task for a worker, before (NOT IN anti-join) and after (NOT EXISTS over the (worker_id, _id) index).
+The synthetic jobs live under user/project/workflow/run 0 and are dropped at the end.
+"""
+
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.conf import settings
+import statistics
+import random
+import time
+
+
+class Command(BaseCommand):
+    help = 'Benchmarks the latency of task assignment across job sizes.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--sizes',
+            type=int,
+            nargs='+',
+            default=[10000, 100000, 500000],
+            help='Job sizes (number of tuples) to benchmark (default is 10000 100000 500000).'
+        )
+        parser.add_argument(
+            '--samples',
+            type=int,
+            default=200,
+            help='Number of assignment queries timed per job size and variant (default is 200).'
+        )
+        parser.add_argument(
+            '--k',
+            type=int,
+            default=3,
+            help='Number of workers that annotated each of the finished tuples (default is 3).'
+        )
+
+    def handle(self, *args, **options):
+        # Import here to ensure Django is fully loaded
+        import controller.logic.job.components as job_components
+        import controller.logic.job.data_access_operations as job_dao
+
+        self.stdout.write("size\tvariant\tp50 (ms)\tp99 (ms)")
+        for size in options['sizes']:
+            obj_job = job_components.Job(
+                run_id=0, workflow_id=0, project_id=0, user_id=0,
+                job_name=settings.HUMAN_OPERATORS[0],   # '3a_kn'
+                job_type=settings.OPERATOR_TYPES[1],    # 'human'
+                job_id=size
+            )
+            try:
+                self.create_synthetic_job(obj_job=obj_job, size=size, k=options['k'])
+                variants = {
+                    'not_in': lambda cursor, worker_id: self.get_and_lock_task_with_not_in(cursor, worker_id, obj_job),
+                    'not_exists': lambda cursor, worker_id: job_dao.get_and_lock_task_of_job_for_worker(cursor=cursor, worker_id=worker_id, obj_job=obj_job),
+                }
+                for variant, get_and_lock in variants.items():
+                    latencies = self.time_assignments(get_and_lock=get_and_lock, samples=options['samples'], k=options['k'])
+                    percentiles = statistics.quantiles(latencies, n=100)
+                    self.stdout.write(f"{size}\t{variant}\t{percentiles[49]:.3f}\t{percentiles[98]:.3f}")
+            finally:
+                self.drop_synthetic_job(obj_job=obj_job)
+
+    def create_synthetic_job(self, obj_job, size: int, k: int):
+        """Create the job level tables of a 3a_kn job, with the first half of the tuples already labeled by k workers"""
+        import controller.logic.job.data_access_operations as job_dao
+        from controller.logic.common_logic_operations import get_job_prefix_table_name
+
+        job_prefix_table_name = get_job_prefix_table_name(obj_job=obj_job)
+        data_table_name = job_prefix_table_name + "benchmark_data"
+        count_done = size // 2
+        cursor = connection.cursor()
+        try:
+            cursor.execute(
+                "CREATE TABLE " + data_table_name +
+                " AS SELECT g AS _id, CURRENT_TIMESTAMP AS date_creation FROM generate_series(1, %s) AS g",
+                [size]
+            )
+            job_dao.do_bookkeeping_3a_kn(
+                data_table_name=data_table_name,
+                instructions={},
+                layout={},
+                configuration={},
+                obj_job=obj_job,
+                annotations_per_tuple_per_worker_table_name=None,
+                aggregated_annotations_table_name=None
+            )
+            table_tasks, table_outputs = job_dao.get_job_table_names(cursor, obj_job, "tasks", "outputs")
+            job_rows, job_key_parameters = job_dao.get_job_key_condition(cursor, obj_job)
+            job_key_column, job_key_placeholder, job_key_values = job_dao.get_job_key_column(cursor, obj_job)
+            # workers 1..k have annotated every tuple of the first half, which is done by now
+            cursor.execute(
+                "INSERT INTO " + table_outputs +
+                " (" + job_key_column + "_id, annotation, worker_id) SELECT " + job_key_placeholder +
+                "t, 'label', w FROM generate_series(1, %s) AS t, generate_series(1, %s) AS w",
+                job_key_values + [count_done, k]
+            )
+            cursor.execute(
+                "UPDATE " + table_tasks +
+                " SET total_assigned = %s, done = True WHERE " + job_rows + " AND _id <= %s",
+                [k] + job_key_parameters + [count_done]
+            )
+            for table_name in [table_tasks, table_outputs]:
+                if table_name.startswith(job_prefix_table_name):
+                    cursor.execute("ANALYZE " + table_name)
+        finally:
+            cursor.close()
+
+    def get_and_lock_task_with_not_in(self, cursor, worker_id: int, obj_job):
+        """Assignment query as it was before the (worker_id, _id) index, kept here as the baseline"""
+        import controller.logic.job.data_access_operations as job_dao
+
+        table_tasks, table_outputs = job_dao.get_job_table_names(cursor, obj_job, "tasks", "outputs")
+        job_rows, job_key_parameters = job_dao.get_job_key_condition(cursor, obj_job)
+        cursor.execute(
+            "SELECT _id, total_assigned, abandoned, pending_annotations, done, date_creation FROM " +
+            table_tasks +
+            " WHERE " + job_rows + " AND done = %s AND _id NOT IN " +
+            "(SELECT _id FROM " +
+            table_outputs +
+            " WHERE " + job_rows + " AND worker_id = %s) LIMIT 1 FOR UPDATE OF " + table_tasks + " SKIP LOCKED",
+            job_key_parameters + [False] + job_key_parameters + [worker_id]
+        )
+        return cursor.fetchone()
+
+    def time_assignments(self, get_and_lock, samples: int, k: int):
+        """Time the given assignment query, rolling back every lock it takes. Returns latencies in milliseconds"""
+        latencies = []
+        cursor = connection.cursor()
+        try:
+            for i in range(samples):
+                # mix of workers who already annotated half the job and a fresh one
+                worker_id = random.randint(1, k + 1)
+                with transaction.atomic():
+                    start = time.perf_counter()
+                    get_and_lock(cursor, worker_id)
+                    latencies.append((time.perf_counter() - start) * 1000)
+                    transaction.set_rollback(True)
+        finally:
+            cursor.close()
+        return latencies
+
+    def drop_synthetic_job(self, obj_job):
+        """Drop every table that belongs to the synthetic job, and delete its rows from the consolidated job storage"""
+        import controller.logic.job.data_access_operations as job_dao
+        from controller.logic.common_logic_operations import get_job_prefix_table_name
+
+        job_prefix_table_name = get_job_prefix_table_name(obj_job=obj_job)
+        cursor = connection.cursor()
+        try:
+            job_rows, job_key_parameters = job_dao.get_job_key_condition(cursor, obj_job)
+            for table_name in job_dao.get_job_table_names(cursor, obj_job, *job_dao.CONSOLIDATED_JOB_TABLES):
+                if not table_name.startswith(job_prefix_table_name):
+                    cursor.execute("DELETE FROM " + table_name + " WHERE " + job_rows, job_key_parameters)
+            # views (e.g. the tuples of the job) first, as they depend on the tables
+            cursor.execute(
+                "SELECT table_name, table_type = 'VIEW' FROM information_schema.tables" +
+                " WHERE table_schema = 'public' AND table_name LIKE %s ORDER BY table_type = 'VIEW' DESC",
+                [job_prefix_table_name.replace('_', '\\_') + '%']
+            )
+            for table_name, is_view in cursor.fetchall():
+                cursor.execute(("DROP VIEW IF EXISTS " if is_view else "DROP TABLE IF EXISTS ") + table_name)
+        finally:
+            cursor.close()
@@ -0,0 +1,121 @@
+"""
+Usage:
+    python manage.py benchmark_ingestion --sizes 10000 100000 1000000 --columns 5
+    python manage.py benchmark_ingestion --sizes 5000000 20000000 --workers 4
+
+This command generates csv files of the given sizes (number of rows), loads each of them into a table the way
+read_table does, and reports the rows/sec before (one INSERT per row) and after (COPY FROM STDIN, in batches of
+settings.INGESTION_BATCH_SIZE rows), and with byte ranges of settings.INGESTION_CHUNK_BYTES copied concurrently by a
+pool of worker processes into the partitions of the table. The generated files and tables are deleted at the end.
+"""
+
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.conf import settings
+from pathlib import Path
+import tempfile
+import functools
+import random
+import string
+import time
+import csv
+
+
+class Command(BaseCommand):
+    help = 'Benchmarks the ingestion of read_table input files across file sizes.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--sizes',
+            type=int,
+            nargs='+',
+            default=[10000, 100000, 1000000],
+            help='File sizes (number of rows) to benchmark (default is 10000 100000 1000000).'
+        )
+        parser.add_argument(
+            '--columns',
+            type=int,
+            default=5,
+            help='Number of columns of the generated files (default is 5).'
+        )
+        parser.add_argument(
+            '--max-insert-size',
+            type=int,
+            default=1000000,
+            help='Largest file size loaded one INSERT per row as well, larger ones are only loaded with COPY (default is 1000000).'
+        )
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=settings.INGESTION_WORKERS,
+            help='Number of worker processes of the parallel ingestion (default is settings.INGESTION_WORKERS).'
+        )
+
+    def handle(self, *args, **options):
+        # Import here to ensure Django is fully loaded
+        import controller.logic.job.data_access_operations as job_dao
+
+        self.stdout.write("size\tvariant\tseconds\trows/sec")
+        with tempfile.TemporaryDirectory() as temp_dir:
+            for size in options['sizes']:
+                source_file_path = Path(temp_dir).joinpath('benchmark_' + str(size) + '.csv')
+                self.create_synthetic_file(source_file_path=source_file_path, size=size, columns=options['columns'])
+                variants = {
+                    'copy': functools.partial(job_dao.create_table_from_file, max_records=None),
+                    'parallel': functools.partial(
+                        job_dao.create_table_from_file_in_parallel, max_records=None, workers=options['workers']
+                    ),
+                }
+                if size <= options['max_insert_size']:
+                    variants['insert'] = self.create_table_from_file_with_insert
+                for variant, create_table_from_file in variants.items():
+                    target_table_name = 'benchmark_ingestion_' + variant + '_' + str(size)
+                    try:
+                        with transaction.atomic():
+                            start = time.perf_counter()
+                            create_table_from_file(source_file_path=source_file_path, target_table_name=target_table_name)
+                            seconds = time.perf_counter() - start
+                    finally:
+                        self.drop_table(table_name=target_table_name)
+                    self.stdout.write(f"{size}\t{variant}\t{seconds:.3f}\t{size / seconds:.0f}")
+                source_file_path.unlink()
+
+    def create_synthetic_file(self, source_file_path: Path, size: int, columns: int):
+        """Write a csv file with a header row and size rows of random text in the given number of columns"""
+        # values are drawn from a pool of random strings, so that files of tens of millions of rows are quick to write
+        values = [''.join(random.choices(string.ascii_letters, k=12)) for i in range(10000)]
+        with source_file_path.open(mode='w', newline='') as data_file:
+            csv_writer = csv.writer(data_file)
+            csv_writer.writerow(['col' + str(column) for column in range(columns)])
+            for i in range(size):
+                csv_writer.writerow(random.choices(values, k=columns))
+
+    def create_table_from_file_with_insert(self, source_file_path: Path, target_table_name: str):
+        """Ingestion as it was before COPY, one INSERT per row, kept here as the baseline"""
+        cursor = connection.cursor()
+        try:
+            with source_file_path.open() as data_file:
+                csv_reader = csv.reader(data_file)
+                headers = [header.strip() for header in next(csv_reader)]
+                cursor.execute(
+                    "CREATE TABLE " + target_table_name + "(_id integer" +
+                    "".join(", " + header + " text" for header in headers) +
+                    ", date_creation TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP)",
+                    []
+                )
+                query_string = "INSERT INTO " + target_table_name + "(_id" + "".join(", " + header for header in headers) + ")" + \
+                               " VALUES (%s" + ", %s" * len(headers) + ")"
+                id_value = 0
+                for row in csv_reader:
+                    id_value = id_value + 1
+                    cursor.execute(query_string, [id_value] + row)
+            return id_value
+        finally:
+            cursor.close()
+
+    def drop_table(self, table_name: str):
+        cursor = connection.cursor()
+        try:
+            cursor.execute("DROP TABLE IF EXISTS " + table_name)
+        finally:
+            cursor.close()
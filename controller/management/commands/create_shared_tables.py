@@ -0,0 +1,39 @@
+"""
+Usage:
+    python manage.py create_shared_tables
+
+This command creates the tables shared by all workflows, runs and jobs that the platform does not create on the fly:
+the table of content hashes of uploaded data files (all_dataset_files), used with settings.DATASET_CACHE on, and
+with settings.CONSOLIDATED_JOB_STORAGE on, the global tables of the tasks, assignments, outputs and final labels of
+jobs (all_job_*), hash partitioned by job. Jobs started before the global tables exist keep tables of their own.
+Run it once when setting up the database (after the base table scripts), and again after upgrading; it leaves
+existing tables as they are.
+"""
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+
+
+class Command(BaseCommand):
+    help = 'Creates the tables shared by all workflows, runs and jobs, unless they exist.'
+
+    def handle(self, *args, **options):
+        # Import here to ensure Django is fully loaded
+        import controller.logic.workflow.data_access_operations as workflow_dao
+        import controller.logic.job.data_access_operations as job_dao
+
+        cursor = connection.cursor()
+        try:
+            with transaction.atomic():
+                workflow_dao.create_table_dataset_files(cursor)
+                if settings.CONSOLIDATED_JOB_STORAGE:
+                    job_dao.create_consolidated_job_storage(cursor)
+        finally:
+            cursor.close()
+        self.stdout.write("Created the table of content hashes of uploaded data files (" + workflow_dao.table_dataset_files + ").")
+        if settings.CONSOLIDATED_JOB_STORAGE:
+            self.stdout.write(
+                "Created the global job tables (all_job_*), with " +
+                str(settings.CONSOLIDATED_JOB_STORAGE_PARTITIONS) + " partitions each."
+            )
@@ -1,12 +1,21 @@
 """
 Usage:
-    python manage.py monitor_tasks --interval 120
+    python manage.py monitor_tasks --interval 120 --workers 4
 
-This command starts the abandoned task monitor daemon with an interval of 120 seconds between checks.
+This command starts the abandoned task monitor daemon.
+Each running 3a_kn/3a_knlm job is swept for abandoned tasks when its earliest pending assignment times out, using a
+min-heap of per-job deadlines, with up to 4 jobs swept concurrently. A job without pending assignments is checked again
+after its annotation time limit (the earliest any new assignment can time out), or after 120 seconds if the limit is
+unknown. Jobs that start running are picked up through Postgres LISTEN/NOTIFY on settings.JOB_STARTED_CHANNEL.
 """
 
 from django.core.management.base import BaseCommand
+from django.db import connection
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
 import threading
+import select
+import heapq
 import time
 from django.conf import settings
 from django.utils import timezone
@@ -16,12 +25,18 @@ class Command(BaseCommand):
     help = 'Monitors and processes abandoned tasks.'
 
     def add_arguments(self, parser):
-        # Accept an interval (in seconds) for how frequently the monitor should run.
+        # Accept an interval (in seconds) for how frequently a job should be checked, when its time limit is unknown.
         parser.add_argument(
             '--interval',
             type=int,
             default=60,
-            help='Interval in seconds between checks (default is 60 seconds).'
+            help='Interval in seconds between checks of a job whose annotation time limit is unknown (default is 60 seconds).'
+        )
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=4,
+            help='Number of jobs swept concurrently (default is 4).'
         )
 
     def handle(self, *args, **options):
@@ -29,9 +44,20 @@ class Command(BaseCommand):
         logger = logging.getLogger(__name__)
         logger.info("Starting abandoned task monitor daemon...")
         self.interval = options['interval']
-        self.stdout.write(f"Starting abandoned task monitor daemon with an interval of {self.interval} seconds...")
-        t = threading.Thread(target=self.task_monitor, daemon=True)
-        t.start()
+        self.stdout.write(
+            f"Starting abandoned task monitor daemon with {options['workers']} workers "
+            f"(fallback interval of {self.interval} seconds)..."
+        )
+        # min-heap of (deadline, job key); a job has one live deadline in next_deadlines, older heap entries are skipped
+        self.deadlines = []
+        self.next_deadlines = {}
+        self.jobs = {}
+        self.time_limits = {}
+        self.sweeping = set()
+        self.condition = threading.Condition()
+        self.pool = ThreadPoolExecutor(max_workers=options['workers'])
+        threading.Thread(target=self.job_listener, daemon=True).start()
+        threading.Thread(target=self.task_monitor, daemon=True).start()
         # Keep the command running. In production, might use a more robust solution.
         # For example:
         # - Use a process manager like Supervisor
@@ -44,36 +70,161 @@ class Command(BaseCommand):
                 time.sleep(1)
         except KeyboardInterrupt:
             self.stdout.write("Daemon stopping...")
+            self.pool.shutdown(wait=False)
+
+    def schedule(self, obj_job, deadline: float):
+        """Sweep the job at the deadline (epoch seconds), or earlier if it is already due earlier"""
+        key = self.get_job_key(obj_job)
+        with self.condition:
+            self.jobs[key] = obj_job
+            current = self.next_deadlines.get(key)
+            if current is not None and current <= deadline:
+                return
+            self.next_deadlines[key] = deadline
+            heapq.heappush(self.deadlines, (deadline, key))
+            self.condition.notify()
 
     def task_monitor(self):
+        """Wait for the earliest deadline, and hand the due jobs over to the pool"""
+        while True:
+            with self.condition:
+                due_keys = []
+                while not due_keys:
+                    now = time.time()
+                    while self.deadlines and self.deadlines[0][0] <= now:
+                        deadline, key = heapq.heappop(self.deadlines)
+                        if self.next_deadlines.get(key) != deadline:
+                            # superseded by an earlier deadline of the same job
+                            continue
+                        del self.next_deadlines[key]
+                        if key not in self.sweeping:
+                            due_keys.append(key)
+                    if not due_keys:
+                        timeout = self.deadlines[0][0] - now if self.deadlines else None
+                        self.condition.wait(timeout=timeout)
+                for key in due_keys:
+                    self.sweeping.add(key)
+            for key in due_keys:
+                self.pool.submit(self.sweep, key)
+
+    def sweep(self, key: str):
+        """Abandon the timed out assignments of the job, and schedule its next sweep"""
         # Import here to ensure Django is fully loaded
         import controller.logic.job.data_access_operations as job_dao
 
-        while True:
-            print("Checking for abandoned tasks in currently running 3a_kn jobs...")
-            # Find all 3a_kn jobs that are running
-            list_3a_kn_jobs = job_dao.find_all_jobs(
-                job_type=settings.OPERATOR_TYPES[1], # 'human'
-                job_name=settings.HUMAN_OPERATORS[0], # '3a_kn
-                job_status=settings.JOB_STATUS[1]  # 'RUNNING'
+        obj_job = self.jobs[key]
+        next_deadline = None
+        try:
+            this_job = job_dao.find_job(
+                job_id=obj_job.id,
+                run_id=obj_job.run_id,
+                workflow_id=obj_job.workflow_id,
+                project_id=obj_job.project_id,
+                user_id=obj_job.user_id
             )
-            # For each running job, call abandon_tasks_3a_kn()
-            for job in list_3a_kn_jobs:
-                print(f"Checking job {job.id}...")
-                job_dao.abandon_tasks_3a_kn(obj_job=job)
-            print('Finished checking for abandoned tasks in 3a_kn jobs.')
-
-            print("Checking for abandoned tasks in currently running 3a_knlm jobs...")
-            # Find all 3a_knlm jobs that are running
-            list_3a_knlm_jobs = job_dao.find_all_jobs(
+            if this_job is None or this_job.status != settings.JOB_STATUS[1]:  # 'RUNNING'
+                # job completed or aborted, nothing to monitor anymore
+                print(f"Job {key} is not running anymore, dropping it.")
+                with self.condition:
+                    self.jobs.pop(key, None)
+                    self.time_limits.pop(key, None)
+                return
+            if obj_job.name == settings.HUMAN_OPERATORS[2]:     # '3a_knlm'
+                counts = job_dao.abandon_tasks_3a_knlm(obj_job=obj_job)
+            else:
+                counts = job_dao.abandon_tasks_3a_kn(obj_job=obj_job)
+            if counts and counts['abandoned_assignments'] > 0:
+                print(f"Job {key}: abandoned {counts['abandoned_assignments']} assignments, reopening {counts['reopened_tasks']} tasks.")
+            next_deadline = self.get_next_deadline(obj_job)
+        except Exception as e:
+            print(f"Error sweeping job {key}: {e}")
+            next_deadline = time.time() + self.interval
+        finally:
+            with self.condition:
+                # no longer sweeping before scheduling, so that task_monitor does not drop the next deadline when due
+                self.sweeping.discard(key)
+                if next_deadline is not None:
+                    self.schedule(obj_job, next_deadline)
+            # the pool threads are long lived, do not keep their db connections open between sweeps
+            connection.close()
+
+    def get_next_deadline(self, obj_job) -> float:
+        """Earliest time at which an assignment of the job can time out next"""
+        import controller.logic.job.data_access_operations as job_dao
+
+        key = self.get_job_key(obj_job)
+        if key not in self.time_limits:
+            configuration = job_dao.get_configuration(
+                requester_id=obj_job.user_id,
+                project_id=obj_job.project_id,
+                workflow_id=obj_job.workflow_id,
+                run_id=obj_job.run_id,
+                job_id=obj_job.id
+            ) or {}
+            time_limit = str(configuration.get('annotation_time_limit', '')).strip('"')
+            self.time_limits[key] = int(time_limit) if time_limit.isdigit() else self.interval
+        # an assignment made from now on times out no earlier than a time limit from now
+        deadline = time.time() + self.time_limits[key]
+        earliest_timeout: datetime = job_dao.get_earliest_assignment_timeout(obj_job=obj_job)
+        if earliest_timeout is not None:
+            deadline = min(deadline, earliest_timeout.timestamp())
+        return deadline
+
+    def job_listener(self):
+        """Schedule the running jobs, then every job that starts running afterwards, as announced on the channel"""
+        import controller.logic.job.data_access_operations as job_dao
+
+        while True:
+            try:
+                cursor = connection.cursor()
+                cursor.execute("LISTEN " + settings.JOB_STARTED_CHANNEL)
+                cursor.close()
+                # listening already, so no job can start unnoticed between this scan and the notifications
+                self.schedule_running_jobs()
+                pg_connection = connection.connection
+                while True:
+                    if select.select([pg_connection], [], [], self.interval) == ([], [], []):
+                        continue
+                    pg_connection.poll()
+                    while pg_connection.notifies:
+                        notify = pg_connection.notifies.pop(0)
+                        user_id, project_id, workflow_id, run_id, job_id = notify.payload.split('.')
+                        obj_job = job_dao.find_job(
+                            job_id=job_id,
+                            run_id=run_id,
+                            workflow_id=workflow_id,
+                            project_id=project_id,
+                            user_id=user_id
+                        )
+                        if obj_job is not None:
+                            print(f"Job {notify.payload} started running, monitoring it.")
+                            self.schedule(obj_job, time.time())
+            except Exception as e:
+                print(f"Error listening for started jobs: {e}, reconnecting...")
+                connection.close()
+                time.sleep(self.interval)
+
+    def schedule_running_jobs(self):
+        """Schedule an immediate sweep of every running 3a_kn and 3a_knlm job"""
+        import controller.logic.job.data_access_operations as job_dao
+
+        for job_name in [settings.HUMAN_OPERATORS[0], settings.HUMAN_OPERATORS[2]]:   # '3a_kn', '3a_knlm'
+            list_jobs = job_dao.find_all_jobs(
                 job_type=settings.OPERATOR_TYPES[1], # 'human'
-                job_name=settings.HUMAN_OPERATORS[2], # '3a_knlm
+                job_name=job_name,
                 job_status=settings.JOB_STATUS[1]  # 'RUNNING'
             )
-            # For each running job, call abandon_tasks_3a_knlm()
-            for job in list_3a_knlm_jobs:
-                print(f"Checking job {job.id}...")
-                job_dao.abandon_tasks_3a_knlm(obj_job=job)
-            print('Finished checking for abandoned tasks in 3a_knlm jobs.')
-            
-            time.sleep(self.interval)
+            for job in list_jobs:
+                self.schedule(job, time.time())
+
+    def get_job_key(self, obj_job) -> str:
+        """Composite id of the job, the same as announced on the job started channel"""
+        import controller.logic.job.helper_functions as job_helper_functions
+
+        return job_helper_functions.get_job_key(
+            user_id=obj_job.user_id,
+            project_id=obj_job.project_id,
+            workflow_id=obj_job.workflow_id,
+            run_id=obj_job.run_id,
+            job_id=obj_job.id
+        )
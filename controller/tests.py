@@ -1,3 +1,338 @@
-from django.test import TestCase
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.conf import settings
+from django.contrib.auth.models import Group, User
+from django.db import connection
+
+from controller.logic.common_logic_operations import infer_column_types, is_value_of_type, parse_column_types
+from controller.logic.job.components import CompiledLayout, Job
+import controller.logic.job.data_access_operations as job_dao
+from controller.enums import UserType
 
 # Create your tests here.
+
+
+class CompiledLayoutTests(SimpleTestCase):
+
+    def test_render_typed_and_null_values(self):
+        compiled_layout = CompiledLayout(
+            tuple_header=['name', 'age'],
+            question='Is ${name} ${age} years old?',
+            design_layout=settings.DEFAULT_LAYOUT
+        )
+        header_value_dict = compiled_layout.get_header_value_dict({'name': None, 'age': 42})
+        self.assertEqual(compiled_layout.render_question(header_value_dict), 'Is  42 years old?')
+        self.assertIn('<td>42', compiled_layout.render_representation(header_value_dict))
+
+
+
+class ColumnTypeTests(SimpleTestCase):
+
+    def test_integer_overflows_into_bigint_and_numeric(self):
+        self.assertTrue(is_value_of_type(str(2**31 - 1), 'integer'))
+        self.assertTrue(is_value_of_type(str(-2**31), 'integer'))
+        self.assertFalse(is_value_of_type(str(2**31), 'integer'))
+        self.assertTrue(is_value_of_type(str(2**31), 'bigint'))
+        self.assertFalse(is_value_of_type(str(2**63), 'bigint'))
+        self.assertEqual(
+            infer_column_types(['a', 'b', 'c'], [['1', str(2**31), str(2**63)], [' -2 ', '3', '4']]),
+            {'a': 'integer', 'b': 'bigint', 'c': 'numeric'}
+        )
+
+    def test_numeric_forms(self):
+        for value in ['1e5', '1.5E-3', '-2.5e+10', '.5', '5.', ' +7 ']:
+            self.assertTrue(is_value_of_type(value, 'numeric'), value)
+        for value in ['e5', '1e', '1.2.3', '.', '1,5', 'NaN']:
+            self.assertFalse(is_value_of_type(value, 'numeric'), value)
+        self.assertFalse(is_value_of_type('1e5', 'integer'))
+        self.assertEqual(infer_column_types(['a'], [['1'], ['2.5'], ['3e2']]), {'a': 'numeric'})
+
+    def test_boolean_tokens(self):
+        for value in ['true', 'FALSE', 't', 'F', 'yes', 'No', ' y ', 'n']:
+            self.assertTrue(is_value_of_type(value, 'boolean'), value)
+        for value in ['1', '0', 'on', 'off', 'maybe']:
+            self.assertFalse(is_value_of_type(value, 'boolean'), value)
+        # 0 and 1 are integers first
+        self.assertEqual(infer_column_types(['a', 'b'], [['yes', '1'], ['n', '0']]), {'a': 'boolean', 'b': 'integer'})
+
+    def test_timestamp_offsets(self):
+        self.assertTrue(is_value_of_type('2024-01-31 10:00:00', 'timestamp'))
+        self.assertTrue(is_value_of_type('2024-01-31T10:00:00', 'timestamptz'))
+        self.assertFalse(is_value_of_type('2024-01-31 10:00:00+02:00', 'timestamp'))
+        self.assertTrue(is_value_of_type('2024-01-31 10:00:00+02:00', 'timestamptz'))
+        self.assertFalse(is_value_of_type('31/01/2024', 'timestamptz'))
+        self.assertEqual(
+            infer_column_types(['a', 'b'], [['2024-01-31', '2024-01-31 10:00:00'], ['2024-02-01', '2024-02-01 10:00:00-05:00']]),
+            {'a': 'timestamp', 'b': 'timestamptz'}
+        )
+
+    def test_empty_columns_are_text(self):
+        self.assertEqual(
+            infer_column_types(['a', 'b', 'c'], [['', '1', 'x'], ['', '', 'y'], ['']]),
+            {'a': 'text', 'b': 'integer', 'c': 'text'}
+        )
+        self.assertEqual(infer_column_types(['a'], []), {'a': 'text'})
+
+    def test_parse_column_types(self):
+        self.assertEqual(
+            parse_column_types('["id:Integer", "name : text", "price:numeric"]'),
+            {'id': 'integer', 'name': 'text', 'price': 'numeric'}
+        )
+        for malformed in ['["id"]', '["id:integer:text"]', '["id:float"]', '["id:"]']:
+            with self.assertRaises(ValueError, msg=malformed):
+                parse_column_types(malformed)
+
+
+# Stand-ins for the functions of the base table scripts (all_21_together.sql), which the test database does not run
+JOB_TABLE_FUNCTIONS = {
+    "create_table_instructions": "type text, content text",
+    "create_table_layout": "type text, content text",
+    "create_table_configuration": "key text, value text, value_data_type text",
+    "create_table_tasks": "_id integer, total_assigned integer, abandoned integer, pending_annotations integer," +
+                          " done boolean, date_creation TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP",
+    "create_table_assignments": "_id integer, worker_id integer, status text, timeout_threshold_at TIMESTAMP WITH TIME ZONE," +
+                                " completed_at TIMESTAMP WITH TIME ZONE, abandoned_at TIMESTAMP WITH TIME ZONE," +
+                                " date_creation TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP",
+    "create_table_outputs": "_id integer, annotation text, worker_id integer," +
+                            " date_creation TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP",
+    "create_table_final_labels": "_id integer, label text, date_creation TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP",
+}
+
+
+class JobTablesTestCase(TestCase):
+    """Provisions 3a_kn/3a_knlm jobs over generated data tables, as bookkeeping does when a job starts"""
+
+    def setUp(self):
+        with connection.cursor() as cursor:
+            for function_name, columns in JOB_TABLE_FUNCTIONS.items():
+                cursor.execute(
+                    "CREATE OR REPLACE FUNCTION " + function_name + "(table_name text) RETURNS void AS $$" +
+                    " BEGIN EXECUTE format('CREATE TABLE %I (" + columns + ")', table_name); END" +
+                    " $$ LANGUAGE plpgsql"
+                )
+        job_dao.consolidated_jobs.clear()
+
+    def start_job(self, job_id: int, size: int, job_name: str = settings.HUMAN_OPERATORS[0]):
+        obj_job = Job(
+            run_id=1, workflow_id=1, project_id=1, user_id=0, job_name=job_name, job_type='human',
+            job_status=settings.JOB_STATUS[1], job_id=job_id
+        )
+        data_table_name = "u0_p1_w1_r1_test_data_" + str(job_id)
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "CREATE TABLE " + data_table_name + " AS SELECT g AS _id FROM generate_series(1, %s) AS g", [size]
+            )
+        job_dao.do_bookkeeping_3a_kn(
+            data_table_name=data_table_name,
+            instructions={},
+            layout={},
+            configuration={},
+            obj_job=obj_job,
+            annotations_per_tuple_per_worker_table_name=None,
+            aggregated_annotations_table_name=None
+        )
+        return obj_job
+
+
+@override_settings(CONSOLIDATED_JOB_STORAGE=True)
+class ConsolidatedJobStorageTests(JobTablesTestCase):
+
+    def setUp(self):
+        super().setUp()
+        with connection.cursor() as cursor:
+            job_dao.create_consolidated_job_storage(cursor)
+
+    def test_progress_counts_the_tasks_of_the_job_only(self):
+        first_job = self.start_job(job_id=1, size=3)
+        second_job = self.start_job(job_id=2, size=5)
+        with connection.cursor() as cursor:
+            self.assertTrue(job_dao.is_job_in_consolidated_storage(cursor, second_job))
+        self.assertEqual(job_dao.get_count_tasks(obj_job=first_job), 3)
+        self.assertEqual(job_dao.get_count_tasks(obj_job=second_job), 5)
+
+
+class JobUpgradeTests(JobTablesTestCase):
+    """Jobs started before the tables of their counters existed get them on first use"""
+
+    def test_progress_table_is_filled_in_from_the_job(self):
+        obj_job = self.start_job(job_id=1, size=4)
+        with connection.cursor() as cursor:
+            cursor.execute("INSERT INTO u0_p1_w1_r1_j1_final_labels (_id, label) VALUES (1, 'yes')")
+            cursor.execute(
+                "INSERT INTO u0_p1_w1_r1_j1_assignments (_id, worker_id, status) VALUES (1, 7, %s), (2, 7, %s), (3, 8, %s)",
+                [settings.ASSIGNMENT_STATUS[1], settings.ASSIGNMENT_STATUS[0], settings.ASSIGNMENT_STATUS[2]]
+            )
+            cursor.execute("DROP TABLE u0_p1_w1_r1_j1_progress")
+        job_dao.jobs_with_progress.discard("u0_p1_w1_r1_j1_")
+        self.assertEqual(
+            job_dao.get_progress(obj_job=obj_job),
+            {'total_tasks': 4, 'done_tasks': 1, 'in_progress': 1}
+        )
+        self.assertEqual(job_dao.get_count_tasks(obj_job=obj_job), 4)
+
+    def get_qualifying_annotation_for_task(self, task_id: int, threshold: int, worker_type: UserType = None):
+        """The label with at least threshold votes and the number of votes on the task, counted from the outputs (and
+        the auth groups of the voters) as aggregation did before the vote tally"""
+        worker_type_join = ""
+        parameters = [task_id]
+        if worker_type is not None:
+            worker_type_join = " INNER JOIN auth_user_groups AUG ON O.worker_id = AUG.user_id" + \
+                               " INNER JOIN auth_group AG ON AUG.group_id = AG.id AND AG.name = %s"
+            parameters = [worker_type.value, task_id]
+        task_outputs = "SELECT O.annotation FROM u0_p1_w1_r1_j1_outputs O" + worker_type_join + " WHERE O._id = %s"
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT annotation FROM (" + task_outputs + ") AS TASK_ANNOTATIONS" +
+                " GROUP BY annotation HAVING count(*) >= %s",
+                parameters + [threshold]
+            )
+            qualifying_annotation_row = cursor.fetchone()
+            cursor.execute("SELECT count(*) FROM (" + task_outputs + ") AS TASK_ANNOTATIONS", parameters)
+            n_task_annotations = cursor.fetchone()[0]
+        return (qualifying_annotation_row[0] if qualifying_annotation_row else None), n_task_annotations
+
+    def get_tallied_annotation_for_task(self, obj_job, task_id: int, threshold: int, worker_class: str = None):
+        """The same, from the vote tally"""
+        with connection.cursor() as cursor:
+            leading_annotation, n_leading_votes, n_task_annotations = job_dao.get_leading_annotation_for_task(
+                cursor, task_id, obj_job, worker_class
+            )
+        return (leading_annotation if n_leading_votes >= threshold else None), n_task_annotations
+
+    def add_votes(self, votes: list):
+        """Votes (task, worker, annotation) of a job started before the vote tally and the worker class existed"""
+        with connection.cursor() as cursor:
+            cursor.execute("ALTER TABLE u0_p1_w1_r1_j1_outputs DROP COLUMN worker_class")
+            cursor.execute("ALTER TABLE u0_p1_w1_r1_j1_assignments DROP COLUMN worker_class")
+            cursor.execute("DROP TABLE u0_p1_w1_r1_j1_vote_tally")
+            for task_id, worker_id, annotation in votes:
+                cursor.execute(
+                    "INSERT INTO u0_p1_w1_r1_j1_outputs (_id, worker_id, annotation) VALUES (%s, %s, %s)",
+                    [task_id, worker_id, annotation]
+                )
+        job_dao.jobs_with_worker_class.discard("u0_p1_w1_r1_j1_")
+        job_dao.jobs_with_vote_tally.discard("u0_p1_w1_r1_j1_")
+
+    def test_vote_tally_is_filled_in_from_the_outputs_of_a_3a_kn_job(self):
+        obj_job = self.start_job(job_id=1, size=4, job_name=settings.HUMAN_OPERATORS[0])
+        workers = [User.objects.create(username='worker' + str(i)).id for i in range(3)]
+        self.add_votes([
+            (1, workers[0], 'yes'), (1, workers[1], 'yes'), (1, workers[2], 'no'),
+            (2, workers[0], 'yes'), (2, workers[1], 'no'),
+            (4, workers[1], 'no'), (4, workers[2], 'no'),
+        ])
+        job_dao.add_vote_tally_table(obj_job=obj_job)
+        for task_id in range(1, 5):
+            self.assertEqual(
+                self.get_tallied_annotation_for_task(obj_job, task_id, threshold=2),
+                self.get_qualifying_annotation_for_task(task_id, threshold=2)
+            )
+        self.assertEqual(self.get_tallied_annotation_for_task(obj_job, 1, threshold=2), ('yes', 3))
+
+    def test_vote_tally_is_filled_in_by_worker_class_for_a_3a_knlm_job(self):
+        obj_job = self.start_job(job_id=1, size=3, job_name=settings.HUMAN_OPERATORS[2])
+        steward_group = Group.objects.create(name=UserType.STEWARD.value)
+        regular_group = Group.objects.create(name=UserType.REGULAR.value)
+        stewards = [User.objects.create(username='steward' + str(i)) for i in range(2)]
+        regulars = [User.objects.create(username='worker' + str(i)) for i in range(3)]
+        for steward in stewards:
+            steward.groups.add(steward_group)
+        for regular in regulars:
+            regular.groups.add(regular_group)
+        self.add_votes([
+            (1, regulars[0].id, 'yes'), (1, regulars[1].id, 'yes'), (1, stewards[0].id, 'no'),
+            (2, regulars[0].id, 'no'), (2, stewards[0].id, 'yes'), (2, stewards[1].id, 'yes'),
+            (3, regulars[2].id, 'yes'),
+        ])
+        job_dao.add_vote_tally_table(obj_job=obj_job)
+        for task_id in range(1, 4):
+            for worker_type, threshold in [(UserType.REGULAR, 2), (UserType.STEWARD, 1)]:
+                self.assertEqual(
+                    self.get_tallied_annotation_for_task(obj_job, task_id, threshold, worker_class=worker_type.value),
+                    self.get_qualifying_annotation_for_task(task_id, threshold, worker_type=worker_type)
+                )
+
+
+class AbandonExpiredAssignmentsTests(JobTablesTestCase):
+
+    def set_up_assignments(self, tasks: list, assignments: list, in_progress: int):
+        """Tasks (_id, total_assigned, pending_annotations, done) and assignments (_id, worker_id, status, worker_class,
+        expired) of the job u0_p1_w1_r1_j1_"""
+        with connection.cursor() as cursor:
+            for task_id, total_assigned, pending_annotations, done in tasks:
+                cursor.execute(
+                    "UPDATE u0_p1_w1_r1_j1_tasks SET total_assigned = %s, pending_annotations = %s, done = %s WHERE _id = %s",
+                    [total_assigned, pending_annotations, done, task_id]
+                )
+            for task_id, worker_id, status, worker_class, expired in assignments:
+                cursor.execute(
+                    "INSERT INTO u0_p1_w1_r1_j1_assignments (_id, worker_id, status, worker_class, timeout_threshold_at)" +
+                    " VALUES (%s, %s, %s, %s, CURRENT_TIMESTAMP + %s * interval '1 hour')",
+                    [task_id, worker_id, status, worker_class, -1 if expired else 1]
+                )
+            cursor.execute("UPDATE u0_p1_w1_r1_j1_progress SET in_progress = %s", [in_progress])
+
+    def get_tasks(self):
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT _id, total_assigned, abandoned, pending_annotations, done FROM u0_p1_w1_r1_j1_tasks ORDER BY _id"
+            )
+            return cursor.fetchall()
+
+    def get_assignment_statuses(self):
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT _id, worker_id, status FROM u0_p1_w1_r1_j1_assignments ORDER BY _id, worker_id")
+            return cursor.fetchall()
+
+    def test_3a_kn(self):
+        pending, completed, abandoned = settings.ASSIGNMENT_STATUS
+        regular = UserType.REGULAR.value
+        obj_job = self.start_job(job_id=1, size=3, job_name=settings.HUMAN_OPERATORS[0])
+        self.set_up_assignments(
+            tasks=[(1, 2, 2, False), (2, 1, 1, True), (3, 1, 0, True)],
+            assignments=[
+                (1, 7, pending, regular, True), (1, 8, pending, regular, False),
+                (2, 7, pending, regular, True),
+                (3, 9, completed, regular, True),
+            ],
+            in_progress=3
+        )
+        self.assertEqual(
+            job_dao.abandon_tasks_3a_kn(obj_job=obj_job),
+            {'abandoned_assignments': 2, 'reopened_tasks': 2}
+        )
+        self.assertEqual(self.get_tasks(), [(1, 2, 1, 1, False), (2, 1, 1, 0, False), (3, 1, 0, 0, True)])
+        self.assertEqual(
+            self.get_assignment_statuses(),
+            [(1, 7, abandoned), (1, 8, pending), (2, 7, abandoned), (3, 9, completed)]
+        )
+        self.assertEqual(job_dao.get_progress(obj_job=obj_job)['in_progress'], 1)
+        # nothing expired is left
+        self.assertEqual(
+            job_dao.abandon_tasks_3a_kn(obj_job=obj_job),
+            {'abandoned_assignments': 0, 'reopened_tasks': 0}
+        )
+
+    def test_3a_knlm(self):
+        pending, completed, abandoned = settings.ASSIGNMENT_STATUS
+        regular, steward = UserType.REGULAR.value, UserType.STEWARD.value
+        obj_job = self.start_job(job_id=1, size=3, job_name=settings.HUMAN_OPERATORS[2])
+        self.set_up_assignments(
+            tasks=[(1, 1, 1, True), (2, 0, 0, True), (3, 1, 1, False)],
+            assignments=[
+                (1, 7, pending, regular, True), (1, 20, pending, steward, True),
+                (2, 21, pending, steward, True),
+                (3, 8, pending, regular, False),
+            ],
+            in_progress=4
+        )
+        self.assertEqual(
+            job_dao.abandon_tasks_3a_knlm(obj_job=obj_job),
+            {'abandoned_assignments': 3, 'reopened_tasks': 2}
+        )
+        # the assignments of stewards only open their task again
+        self.assertEqual(self.get_tasks(), [(1, 1, 1, 0, False), (2, 0, 0, 0, False), (3, 1, 0, 1, False)])
+        self.assertEqual(
+            self.get_assignment_statuses(),
+            [(1, 7, abandoned), (1, 20, abandoned), (2, 21, abandoned), (3, 8, pending)]
+        )
+        self.assertEqual(job_dao.get_progress(obj_job=obj_job)['in_progress'], 1)
@@ -71,6 +71,10 @@ def process(request):
             return job_logic.skip_3a_kn(request)
         elif action == 'quit':  # quit working on this 3a_kn job
             return job_logic.quit_3a_kn(request)
+        elif action == 'lease':  # lease a batch of tasks at once
+            return job_logic.lease_3a_kn(request)
+        elif action == 'submit_batch':  # submitted annotations for the leased tasks
+            return job_logic.submit_batch_3a_kn(request)
     elif action_category == 'job_3a_knlm':    # worker interactions with 3a_knlm human jobs
         # Add user type as a request attribute for use in business logic
         request.user_type = UserType.from_user_id(request.user.id)
@@ -84,6 +88,10 @@ def process(request):
             return job_logic.skip_3a_knlm(request)
         elif action == 'quit':  # quit working on this 3a_knlm job
             return job_logic.quit_3a_knlm(request)
+        elif action == 'lease':  # lease a batch of tasks at once
+            return job_logic.lease_3a_knlm(request)
+        elif action == 'submit_batch':  # submitted annotations for the leased tasks
+            return job_logic.submit_batch_3a_knlm(request)
     elif action_category == 'simulated_run':    # handled separately at top level but uses "run" code wherever possible
         if action == 'index':   # list all simulated runs of a workflow
             return simulated_run_logic.index(request)
@@ -185,6 +185,44 @@ INPUT_N_MAX_HEADERS = 100
 
 INPUT_N_MAX_RECORDS = 500000
 
+INPUT_FILE_EXTENSIONS = ['.csv', '.parquet', '.arrow', '.feather']  # data files read_table can read
+
+# data files read with pyarrow (an optional dependency), into columns of their native types
+COLUMNAR_FILE_EXTENSIONS = ['.parquet', '.arrow', '.feather']
+
+# compressions of csv data files, stored compressed and decompressed while streaming (zstandard needs the zstandard package)
+COMPRESSED_FILE_EXTENSIONS = ['.gz', '.zst']
+
+INGESTION_BATCH_SIZE = 10000  # csv rows copied into the table of read_table per batch
+
+# opt-in: uncompressed csv input files of read_table at least PARALLEL_INGESTION_MIN_BYTES large are split into byte
+# ranges of INGESTION_CHUNK_BYTES, loaded into the partitions of their table by a pool of INGESTION_WORKERS processes.
+# these files are limited to INPUT_N_MAX_RECORDS_PARALLEL records instead of INPUT_N_MAX_RECORDS, and their records
+# must not span lines. when off, every input file is limited to INPUT_N_MAX_RECORDS records
+PARALLEL_INGESTION = False
+
+PARALLEL_INGESTION_MIN_BYTES = 64 * 1024 * 1024
+
+INGESTION_CHUNK_BYTES = 64 * 1024 * 1024
+
+INGESTION_WORKERS = 4
+
+INPUT_N_MAX_RECORDS_PARALLEL = 50000000  # records limit of the input files loaded in parallel (see PARALLEL_INGESTION)
+
+INGESTION_READ_BYTES = 1024 * 1024  # bytes read at a time when counting the lines of, or hashing, an input file
+
+# column types of the table of read_table, in the order they are tried when inferring a column's type
+INPUT_COLUMN_TYPES = ['integer', 'bigint', 'numeric', 'boolean', 'timestamp', 'timestamptz', 'text']
+
+INFER_COLUMN_TYPES = False  # default of read_table's infer_types argument, all columns are text when not inferred
+
+TYPE_INFERENCE_SAMPLE_SIZE = 1000  # csv rows read to infer the column types of read_table
+
+# opt-in: read_table makes its table a view of the table already ingested from an uploaded file with the same contents
+# (and column types), ingesting the file only once. the dataset_<hash> tables are kept (there is no eviction), and the
+# hashes of uploaded files are kept in a table created by the create_shared_tables management command
+DATASET_CACHE = False
+
 UPLOADED_FILE_TYPES = ['cy', 'input', 'inst', 'layout']
 
 SHORT_INSTRUCTIONS_BEGIN = '<short-instructions>'
@@ -221,6 +259,41 @@ DEFAULT_AGGREGATION_LABEL = 'undecided'
 
 DUMP_OPERATOR_OUTPUTS = True
 
+# Task assignment
+# Policies for the order in which open tasks are assigned, chosen per job with assignment_priority=... in the workflow
+ASSIGNMENT_PRIORITIES = ['fifo', 'nearly_done']
+# Each process keeps a ready queue of candidate tasks per running job, rebuilt from the tasks table
+READY_QUEUE_REFILL_SIZE = 1000          # task ids fetched from the tasks table per refill
+READY_QUEUE_REFRESH_INTERVAL = 30       # in seconds, after which the queue is rebuilt to pick up reopened tasks
+READY_QUEUE_MAX_ATTEMPTS = 10           # candidates tried from the queue before falling back to scanning the tasks table
+# Whether the question and layout of every task are rendered into a per-job representations table when the job starts,
+# so that serving a task (or publishing HITs to amt) reads them instead of rendering. Per job with prerender_representations=... in the workflow
+PRERENDER_REPRESENTATIONS = False
+PRERENDER_BATCH_SIZE = 1000             # tuples rendered (and amt representations streamed) per batch
+# Number of tasks a worker can lease at once, with action=lease&lease_size=...
+DEFAULT_LEASE_SIZE = 10
+MAX_LEASE_SIZE = 100
+# Postgres LISTEN/NOTIFY channel on which the id of a 3a_kn/3a_knlm job is published when it starts running (see monitor_tasks)
+JOB_STARTED_CHANNEL = 'cymphony_job_started'
+# Postgres LISTEN/NOTIFY channel on which a job announces that a task got open for assignment again (abandoned, skipped or reopened)
+TASKS_AVAILABLE_CHANNEL = 'cymphony_tasks_available'
+# Longest a work request with wait=... is parked until a task becomes available, instead of returning DELAYED_RETRY
+MAX_WORK_WAIT = 30                      # in seconds
+# Each process caches whether a worker is a steward, dropped on group changes seen by this process
+ROLE_CACHE_TTL = 300                    # in seconds, after which a cached role is looked up again (covers changes in other processes)
+# Postgres LISTEN/NOTIFY channel on which the id of a job is published whenever its status changes
+JOB_STATUS_CHANNEL = 'cymphony_job_status'
+# Each process caches the context (instructions, layout, configuration, count of tasks) of the jobs it serves annotations for,
+# dropped on status changes of the job announced on JOB_STATUS_CHANNEL
+JOB_CONTEXT_CACHE_TTL = 300             # in seconds, after which a cached context is loaded again (covers missed notifications)
+# Whether the tasks, assignments, outputs and final labels (the tables that grow with the data) of 3a_kn/3a_knlm jobs
+# started from now on are stored in global tables hash partitioned by job, instead of in tables of their own. The global
+# tables are created by the create_shared_tables management command; until then, jobs still get tables of their own.
+# The small tables of a job (progress, vote tally, configuration, layout, instructions, tuples) stay per job.
+# Jobs started with their own tables keep them, but jobs started this way need this to stay on
+CONSOLIDATED_JOB_STORAGE = False
+CONSOLIDATED_JOB_STORAGE_PARTITIONS = 16    # partitions per global table, fixed once the tables exist
+
 
 # Simulator
 GOLD_LABEL_COLUMN_NAME = 'gold_label'
@@ -76,16 +76,19 @@ def set_simulation_parameters(
     time_gaps: list,
     time_durations: list,
     annotation_times: list,
-    accuracies: list
+    accuracies: list,
+    lease_size: int = 0
 ):
-    """Set the simulation parameters from the user"""
+    """Set the simulation parameters from the user. With a lease_size, workers lease (and submit) that many tasks at once
+    instead of working on one task at a time"""
     simulation_parameters = {
         'loop_times': loop_times,
         'workers_per_burst': workers_per_burst,
         'time_gaps': time_gaps,
         'time_durations': time_durations,
         'annotation_times': annotation_times,
-        'accuracies': accuracies
+        'accuracies': accuracies,
+        'lease_size': lease_size
     }
     return simulation_parameters
 
@@ -105,6 +108,7 @@ def simulate_workers_on_job(simulation_parameters: dict, job_info: dict, log_fil
     time_durations = simulation_parameters['time_durations']
     annotation_times = simulation_parameters['annotation_times']
     accuracies = simulation_parameters['accuracies']
+    lease_size = simulation_parameters.get('lease_size', 0)
     
     # will store these in the log file, just after simulating all workers below
     parameters_simulation_workers: list = []
@@ -129,7 +133,8 @@ def simulate_workers_on_job(simulation_parameters: dict, job_info: dict, log_fil
                     time_durations[i],
                     job_info, 
                     log_file,
-                    csv_file
+                    csv_file,
+                    lease_size
                 )
             )
             y.start()
@@ -166,12 +171,13 @@ def store_actual_simulation_statistics(statistics_simulation_workers: list, log_
     log_file.write(f'Actual simulation statistics: {statistics_simulation_workers}\n')
     return
 
-def run_worker_pipeline(accuracy: float, annotation_time: int, time_duration: int, job_info: dict, log_file=None, csv_file=None):
-    """Simulating the working of one single synthetic worker"""
+def run_worker_pipeline(accuracy: float, annotation_time: int, time_duration: int, job_info: dict, log_file=None, csv_file=None, lease_size: int = 0):
+    """Simulating the working of one single synthetic worker, leasing lease_size tasks at once if given"""
     job_category = job_info['job_category']
     GOLD_LABEL_COLUMN_NAME = job_info['gold_label_column_name']
     MIN_WORKER_RETRY_DELAY = 1
     MAX_WORKER_RETRY_DELAY = 60
+    WORK_WAIT = 30  # seconds the server parks a work request until a task becomes available (0 to poll with retry delays instead)
 
     # worker characteristics
     worker_annotation_time = annotation_time
@@ -255,11 +261,61 @@ def run_worker_pipeline(accuracy: float, annotation_time: int, time_duration: in
     # print('Time difference: ', time.time() - start_ts)
     worker_code = None
     while (time.time() - start_ts) < worker_time_duration:
+        if lease_size > 0:
+            # 5'. lease a batch of tasks on the job
+            lease_url = target_url + \
+                        '/controller/?category=' + job_category + '&action=lease&uid={0}&pid={1}&wid={2}&rid={3}&jid={4}&lease_size={5}'.format(
+                            job_info['user_id'], job_info['project_id'], job_info['workflow_id'], job_info['run_id'], job_info['job_id'], lease_size
+                        )
+            lease_response_information: dict = call_lease_tasks(s, lease_url).json()
+            worker_code = lease_response_information.get('worker_code')
+            if worker_code == 1:    # ANNOTATE
+                task_option_list = lease_response_information.get('task_option_list')
+                task_ids = []
+                labels_to_annotate_with = []
+                for task in lease_response_information.get('tasks', []):
+                    if (time.time() - start_ts) >= worker_time_duration:
+                        # the rest of the lease is given back on quit, or abandoned once it expires
+                        break
+                    # worker takes some time to decide on each choice
+                    time.sleep(worker_annotation_time)
+                    label_to_annotate_with, is_match = decide_label(
+                        gold_label=task.get('header_value_dict').get(GOLD_LABEL_COLUMN_NAME),
+                        task_option_list=task_option_list,
+                        worker_accuracy=worker_accuracy
+                    )
+                    total_matches_so_far = total_matches_so_far + int(is_match)
+                    total_annotated_so_far = total_annotated_so_far + 1
+                    task_ids.append(task.get('task_id'))
+                    labels_to_annotate_with.append(label_to_annotate_with)
+                # 6'. submit the annotations of the leased tasks at once
+                submit_batch_url = target_url + '/controller/?category=' + job_category + '&action=submit_batch'
+                submit_batch_response_information: dict = call_submit_batch(
+                    s, submit_batch_url, task_ids, labels_to_annotate_with
+                ).json()
+                worker_code = submit_batch_response_information.get('worker_code')
+                if worker_code == 1:    # ANNOTATE, lease the next batch right away
+                    continue
+            if worker_code == 3:    # QUIT
+                store_worker_results(
+                    worker_username=user_name,
+                    worker_accuracy=worker_accuracy,
+                    worker_annotation_time=worker_annotation_time,
+                    total_matches_so_far=total_matches_so_far,
+                    total_annotated_so_far=total_annotated_so_far,
+                    log_file=log_file,
+                    csv_file=csv_file
+                )
+                return
+            # retry leasing after some time
+            time.sleep(random.randint(MIN_WORKER_RETRY_DELAY, MAX_WORKER_RETRY_DELAY))
+            continue
         # 5. call work on job
         work_on_job_url = target_url + \
-                          '/controller/?category=' + job_category + '&action=work&uid={0}&pid={1}&wid={2}&rid={3}&jid={4}'.format(
-                              job_info['user_id'], job_info['project_id'], job_info['workflow_id'], job_info['run_id'], job_info['job_id']
+                          '/controller/?category=' + job_category + '&action=work&uid={0}&pid={1}&wid={2}&rid={3}&jid={4}&wait={5}'.format(
+                              job_info['user_id'], job_info['project_id'], job_info['workflow_id'], job_info['run_id'], job_info['job_id'], WORK_WAIT
                           )
+        work_requested_at = time.time()
         call_work_on_job_response = call_work_on_job(
             s, work_on_job_url
         )
@@ -379,6 +435,10 @@ def run_worker_pipeline(accuracy: float, annotation_time: int, time_duration: in
             if (time.time() - start_ts) >= worker_time_duration:
                 print('Worker time duration exceeded. Breaking out of the loop.')
                 break
+        elif WORK_WAIT > 0 and time.time() - work_requested_at >= WORK_WAIT - 1:
+            # the server already waited (about) the whole wait for a task to become available, so retry working on job right
+            # away; a server that waits less (MAX_WORK_WAIT) or answers at once gets the retry delay below
+            continue
         else:   # retry working on job after some time
             pass
         delay = random.randint(MIN_WORKER_RETRY_DELAY, MAX_WORKER_RETRY_DELAY)   # eg: 1 minute delay window if (1, 60)
@@ -430,6 +490,54 @@ def run_worker_pipeline(accuracy: float, annotation_time: int, time_duration: in
         return
     return
 
+def decide_label(gold_label: str, task_option_list: list, worker_accuracy: float):
+    """Label the worker annotates a task with, and whether it is the gold label"""
+    if random.random() < worker_accuracy:   # Tosses a coin with say 83% probability of being correct
+        return gold_label, True
+    if task_option_list is None:  # free text answer
+        return gold_label + str(random.randint(1, 10)), False
+    # answer has to be from a set of choices
+    choices = task_option_list.copy()
+    choices.remove(gold_label)
+    return random.choices(choices, k=1)[0], False
+
+
+def store_worker_results(
+        worker_username: str,
+        worker_accuracy: float,
+        worker_annotation_time: int,
+        total_matches_so_far: int,
+        total_annotated_so_far: int,
+        log_file=None,
+        csv_file=None
+):
+    """Store the parameters and the statistics of a worker that has finished interacting with cymphony"""
+    # store worker parameters that got decided based on simulation parameters
+    store_actual_simulation_parameters_per_worker(
+        worker_username=worker_username,
+        worker_reliability=worker_accuracy,
+        worker_annotation_time=worker_annotation_time,
+        log_file=log_file
+    )
+    # compute statistics of worker, pertaining to worker's interaction with cymphony
+    precision = compute_worker_statistics(
+        total_matches_so_far=total_matches_so_far,
+        total_annotated_so_far=total_annotated_so_far,
+        accuracy=worker_accuracy,
+        user_name=worker_username
+    )
+    # store the above calculated worker statistics
+    store_actual_simulation_statistics_per_worker(
+        worker_username=worker_username,
+        worker_precision=precision,
+        total_matches_so_far=total_matches_so_far,
+        total_annotated_so_far=total_annotated_so_far,
+        log_file=log_file,
+        csv_file=csv_file
+    )
+    return
+
+
 def store_actual_simulation_parameters_per_worker(worker_username: str, worker_reliability: float, worker_annotation_time: int, log_file=None):
     """Store the actual simulation parameters for a worker in the log file"""
     if log_file is None:
@@ -545,6 +653,25 @@ def call_submit_annotation(s, url, label_to_annotate_with):
     return task_annotated_response
 
 
+# 5'. lease a batch of tasks on a specific job
+def call_lease_tasks(s, url):
+    method = 'GET'
+    data = None
+    tasks_to_be_annotated_response = s.get(url, data=data)
+    return tasks_to_be_annotated_response
+
+
+# 6'. submit annotations of the leased tasks at once
+def call_submit_batch(s, url, task_ids, labels_to_annotate_with):
+    method = 'POST'
+    data = {
+        'task_id': task_ids,
+        'choice': labels_to_annotate_with
+    }
+    tasks_annotated_response = s.post(url, data=data)
+    return tasks_annotated_response
+
+
 def compute_worker_statistics(
         total_matches_so_far,
         total_annotated_so_far,
@@ -564,7 +691,7 @@ def compute_worker_statistics(
         print(f'Could not compute actual accuracy of worker {user_name} because of 0 annotations.')
     return precision
 
-def simulate_bulk_with_regular_workers(composite_run_id, job_category='job_3a_knlm', gold_label_column_name='gold_label'):
+def simulate_bulk_with_regular_workers(composite_run_id, job_category='job_3a_knlm', gold_label_column_name='gold_label', lease_size=0):
     # create a log
     log_file = create_log()
     csv_file = create_csv()
@@ -598,7 +725,8 @@ def simulate_bulk_with_regular_workers(composite_run_id, job_category='job_3a_kn
         time_gaps=time_gaps,
         time_durations=time_durations,
         annotation_times=annotation_times,
-        accuracies=accuracies
+        accuracies=accuracies,
+        lease_size=lease_size
     )
     store_simulation_parameters(simulation_parameters, log_file)
 
@@ -611,5 +739,6 @@ if __name__ == '__main__':
     project_id = input('Enter the project ID: ')
     workflow_id = input('Enter the workflow ID: ')
     run_id = input('Enter the run ID: ')
+    lease_size = input('Enter the lease size (leave empty to work on one task at a time): ')
     composite_run_id = f"{user_id}.{project_id}.{workflow_id}.{run_id}"
-    simulate_bulk_with_regular_workers(composite_run_id)
\ No newline at end of file
+    simulate_bulk_with_regular_workers(composite_run_id, lease_size=int(lease_size) if lease_size else 0)
\ No newline at end of file